@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import auth, users, forums, providers, events, messages, resources, stats, sso, connections, ws
+from .endpoints import auth, users, forums, providers, events, messages, resources, stats, sso, connections, ws, sync, feed, notifications
 
 api_router = APIRouter()
 
@@ -13,6 +13,9 @@ api_router.include_router(messages.router, prefix="/messages", tags=["messages"]
 api_router.include_router(resources.router, prefix="/resources", tags=["resources"])
 api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
 api_router.include_router(connections.router, prefix="/connections", tags=["connections"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(feed.router, prefix="/feed", tags=["feed"])
+api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 api_router.include_router(ws.router, prefix="/ws", tags=["websocket"])
 
 @api_router.get("/")
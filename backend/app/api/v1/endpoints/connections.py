@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.core.security import get_current_user
 from app.models.connection import ConnectionResponse, ConnectionCreate, ConnectionAction
-from app.services import connection_service
+from app.models.user import SuggestionResponse
+from app.services import connection_service, suggestion_service
 
 router = APIRouter()
 
@@ -43,6 +44,10 @@ async def get_pending(current_user: dict = Depends(get_current_user)):
 async def get_accepted_connections(current_user: dict = Depends(get_current_user)):
     return await connection_service.get_connections(current_user["id"])
 
+@router.get("/suggestions", response_model=List[SuggestionResponse])
+async def get_suggestions(limit: int = Query(20, ge=1, le=50), current_user: dict = Depends(get_current_user)):
+    return await suggestion_service.get_suggestions(current_user, limit)
+
 @router.get("/status/{user_id}", response_model=Optional[ConnectionResponse])
 async def get_status(user_id: str, current_user: dict = Depends(get_current_user)):
     return await connection_service.get_connection_status(current_user["id"], user_id)
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
+from app.core.config import GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM
+from app.core.geo import geo_filter
 from app.core.security import get_current_user
 from app.models.event import EventCreate, EventResponse
 from app.services import event_service
@@ -16,9 +18,16 @@ async def get_events(
     is_virtual: Optional[bool] = None,
     location: Optional[str] = None,
     upcoming: bool = True,
-    limit: int = 50
+    limit: int = 50,
+    near: Optional[str] = Query(None, description="place name, e.g. \"Pune\" or \"Birmingham, UK\""),
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat")
 ):
-    return await event_service.get_events(event_type, is_virtual, location, upcoming, limit)
+    return await event_service.get_events(
+        event_type, is_virtual, location, upcoming, limit, geo_filter(near, lat, lng, radius_km, bbox)
+    )
 
 @router.get("/{event_id}", response_model=EventResponse)
 async def get_event(event_id: str):
@@ -29,4 +38,4 @@ async def get_event(event_id: str):
 
 @router.post("/{event_id}/attend")
 async def attend_event(event_id: str, current_user: dict = Depends(get_current_user)):
-    return await event_service.attend_event(event_id, current_user["id"])
+    return await event_service.attend_event(event_id, current_user["id"], current_user.get("name"))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Literal, Optional
+from app.core.security import get_current_user
+from app.models.feed import FeedPage, FollowCreate, FollowResponse
+from app.services import feed_service
+
+router = APIRouter()
+
+@router.get("", response_model=FeedPage)
+async def get_feed(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    return await feed_service.get_feed(current_user["id"], cursor, limit)
+
+@router.get("/follows", response_model=List[FollowResponse])
+async def get_follows(current_user: dict = Depends(get_current_user)):
+    return await feed_service.get_follows(current_user["id"])
+
+@router.post("/follows")
+async def follow(follow_data: FollowCreate, current_user: dict = Depends(get_current_user)):
+    return await feed_service.follow(current_user["id"], follow_data)
+
+@router.delete("/follows")
+async def unfollow(
+    kind: Literal["user", "tag", "category"],
+    value: str,
+    current_user: dict = Depends(get_current_user)
+):
+    return await feed_service.unfollow(current_user["id"], kind, value)
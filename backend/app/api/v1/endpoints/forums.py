@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
 from app.core.security import get_current_user
 from app.models.forum import ForumPostCreate, ForumPostResponse, CommentCreate, CommentResponse
 from app.services import forum_service
@@ -15,9 +15,10 @@ async def get_forum_posts(
     category: Optional[str] = None,
     tag: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    sort: Literal["recent", "trending"] = "recent"
 ):
-    return await forum_service.get_posts(category, tag, search, limit)
+    return await forum_service.get_posts(category, tag, search, limit, sort)
 
 @router.get("/{post_id}", response_model=ForumPostResponse)
 async def get_forum_post(post_id: str):
@@ -28,12 +29,21 @@ async def get_forum_post(post_id: str):
 
 @router.post("/{post_id}/like")
 async def like_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    return await forum_service.like_post(post_id, current_user["id"])
+    return await forum_service.like_post(post_id, current_user["id"], current_user.get("name"))
 
 @router.post("/{post_id}/comments", response_model=CommentResponse)
 async def create_comment(post_id: str, comment_data: CommentCreate, current_user: dict = Depends(get_current_user)):
     return await forum_service.create_comment(post_id, comment_data, current_user)
 
 @router.get("/{post_id}/comments", response_model=List[CommentResponse])
-async def get_comments(post_id: str):
-    return await forum_service.get_comments(post_id)
+async def get_comments(
+    post_id: str,
+    parent_id: Optional[str] = Query(None, description="list the replies to this comment instead of top-level comments"),
+    after: Optional[str] = Query(None, description="<created_at>|<id> of the last comment already loaded"),
+    limit: int = Query(100, ge=1, le=100)
+):
+    return await forum_service.get_comments(post_id, parent_id, after, limit)
+
+@router.get("/{post_id}/comments/{comment_id}/thread", response_model=List[CommentResponse])
+async def get_comment_thread(post_id: str, comment_id: str):
+    return await forum_service.get_comment_thread(post_id, comment_id)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
 from app.core.security import get_current_user
-from app.models.message import MessageCreate, MessageResponse, ConversationResponse
-from app.services import message_service
+from app.models.message import (
+    MessageCreate, MessageResponse, ConversationResponse, AnnouncementCreate, AnnouncementJobResponse
+)
+from app.services import message_service, announcement_service
 
 router = APIRouter()
 
@@ -14,6 +17,24 @@ async def send_message(message_data: MessageCreate, current_user: dict = Depends
 async def get_conversations(current_user: dict = Depends(get_current_user)):
     return await message_service.get_conversations(current_user["id"])
 
+@router.get("/unread")
+async def get_unread_count(current_user: dict = Depends(get_current_user)):
+    return await message_service.get_unread_count(current_user["id"])
+
+@router.post("/announcements", response_model=AnnouncementJobResponse, status_code=202)
+async def create_announcement(data: AnnouncementCreate, current_user: dict = Depends(get_current_user)):
+    return await announcement_service.create_announcement(data, current_user)
+
+@router.get("/announcements/{job_id}", response_model=AnnouncementJobResponse)
+async def get_announcement(job_id: str, current_user: dict = Depends(get_current_user)):
+    return await announcement_service.get_announcement_job(job_id, current_user["id"])
+
 @router.get("/{user_id}", response_model=List[MessageResponse])
-async def get_messages_with_user(user_id: str, current_user: dict = Depends(get_current_user)):
-    return await message_service.get_messages_with_user(user_id, current_user["id"])
+async def get_messages_with_user(
+    user_id: str,
+    before: Optional[datetime] = Query(None, description="created_at of the oldest message already loaded"),
+    before_id: Optional[str] = Query(None, description="id of that message, so messages sharing its created_at aren't skipped"),
+    limit: int = Query(100, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    return await message_service.get_messages_with_user(user_id, current_user["id"], before, before_id, limit)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from app.core.security import get_current_user
+from app.models.notification import NotificationPage, NotificationsRead
+from app.services import notification_service
+
+router = APIRouter()
+
+@router.get("", response_model=NotificationPage)
+async def get_notifications(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=50),
+    unread_only: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    return await notification_service.get_notifications(current_user["id"], cursor, limit, unread_only)
+
+@router.get("/unread")
+async def get_unread_count(current_user: dict = Depends(get_current_user)):
+    return await notification_service.get_unread_count(current_user["id"])
+
+@router.post("/read")
+async def mark_read(read_data: NotificationsRead, current_user: dict = Depends(get_current_user)):
+    return await notification_service.mark_read(current_user["id"], read_data.ids)
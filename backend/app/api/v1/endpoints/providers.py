@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
+from app.core.config import GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM
+from app.core.geo import geo_filter
 from app.core.security import get_current_user
-from app.models.provider import ServiceProviderCreate, ServiceProviderResponse
-from app.services import provider_service
+from app.models.facet import FacetsResponse
+from app.models.provider import (
+    ServiceProviderCreate, ServiceProviderResponse, ReviewCreate, ReviewResponse, ReviewSubmitResponse,
+    ProviderRecommendation
+)
+from app.services import provider_service, review_service, recommendation_service
 
 router = APIRouter()
 
@@ -16,9 +22,42 @@ async def get_providers(
     disability_focus: Optional[str] = None,
     location: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    near: Optional[str] = Query(None, description="place name, e.g. \"Pune\" or \"Birmingham, UK\""),
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    sort: Optional[Literal["top_rated"]] = None
 ):
-    return await provider_service.get_providers(service, disability_focus, location, search, limit)
+    return await provider_service.get_providers(
+        service, disability_focus, location, search, limit, geo_filter(near, lat, lng, radius_km, bbox), sort
+    )
+
+@router.get("/facets", response_model=FacetsResponse)
+async def get_provider_facets(
+    service: Optional[str] = None,
+    disability_focus: Optional[str] = None,
+    location: Optional[str] = None,
+    search: Optional[str] = None,
+    near: Optional[str] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    bbox: Optional[str] = None,
+    top: int = Query(20, ge=1, le=100, description="values returned per facet")
+):
+    return await provider_service.get_provider_facets(
+        service, disability_focus, location, search, geo_filter(near, lat, lng, radius_km, bbox), top
+    )
+
+@router.get("/recommended", response_model=List[ProviderRecommendation])
+async def get_recommended_providers(
+    services: Optional[List[str]] = Query(None, description="services the member is looking for"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    return await recommendation_service.get_recommendations(current_user, services, limit)
 
 @router.get("/{provider_id}", response_model=ServiceProviderResponse)
 async def get_provider(provider_id: str):
@@ -26,3 +65,20 @@ async def get_provider(provider_id: str):
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     return provider
+
+@router.get("/{provider_id}/reviews", response_model=List[ReviewResponse])
+async def get_reviews(
+    provider_id: str,
+    before: Optional[str] = Query(None, description="created_at of the oldest review already loaded"),
+    before_id: Optional[str] = Query(None, description="id of that review, so reviews sharing its created_at aren't skipped"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    return await review_service.get_reviews(provider_id, before, before_id, limit)
+
+@router.post("/{provider_id}/reviews", response_model=ReviewSubmitResponse)
+async def submit_review(provider_id: str, review_data: ReviewCreate, current_user: dict = Depends(get_current_user)):
+    return await review_service.submit_review(provider_id, review_data, current_user)
+
+@router.delete("/{provider_id}/reviews")
+async def delete_review(provider_id: str, current_user: dict = Depends(get_current_user)):
+    return await review_service.delete_review(provider_id, current_user["id"])
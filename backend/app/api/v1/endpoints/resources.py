@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
 from app.core.security import get_current_user
+from app.models.facet import FacetsResponse
 from app.models.resource import ResourceCreate, ResourceResponse
 from app.services import resource_service
 
@@ -15,9 +16,19 @@ async def get_resources(
     category: Optional[str] = None,
     tag: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    sort: Literal["recent", "trending"] = "recent"
 ):
-    return await resource_service.get_resources(category, tag, search, limit)
+    return await resource_service.get_resources(category, tag, search, limit, sort)
+
+@router.get("/facets", response_model=FacetsResponse)
+async def get_resource_facets(
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    search: Optional[str] = None,
+    top: int = Query(20, ge=1, le=100, description="values returned per facet")
+):
+    return await resource_service.get_resource_facets(category, tag, search, top)
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
 async def get_resource(resource_id: str):
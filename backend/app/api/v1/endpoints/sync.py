@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Depends, Query
+from app.core.security import get_current_user
+from app.services import sync_service
+
+router = APIRouter()
+
+@router.get("")
+async def sync(since: int = Query(0, ge=0), current_user: dict = Depends(get_current_user)):
+    return await sync_service.get_changes_since(current_user["id"], since)
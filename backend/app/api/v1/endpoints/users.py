@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from typing import List, Optional
+from app.core.config import GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM
+from app.core.geo import geo_filter
 from app.models.user import UserResponse
 from app.services import user_service
 
@@ -11,9 +13,16 @@ async def get_users(
     disability_category: Optional[str] = None,
     location: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    near: Optional[str] = Query(None, description="place name, e.g. \"Pune\" or \"Birmingham, UK\""),
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat")
 ):
-    return await user_service.get_users(user_type, disability_category, location, search, limit)
+    return await user_service.get_users(
+        user_type, disability_category, location, search, limit, geo_filter(near, lat, lng, radius_km, bbox)
+    )
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str):
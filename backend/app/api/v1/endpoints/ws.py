@@ -2,15 +2,19 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from app.core.websocket import manager
 from app.core.security import get_current_user
 from app.core.config import logger
+from app.services.live_updates import LIVE_TOPICS
 import json
+from typing import Optional
 
 router = APIRouter()
 
 @router.websocket("/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
+async def websocket_endpoint(websocket: WebSocket, user_id: str, epoch: Optional[str] = None, last_seq: Optional[int] = None):
     # In a production app, we would verify the user_id matches the token
     # But for now, we'll keep it simple to get it working
-    await manager.connect(user_id, websocket)
+    # Reconnecting clients pass the epoch/last_seq of their previous session to receive only the gap
+    if not await manager.connect(user_id, websocket, epoch, last_seq):
+        return
     print(f"DEBUG: WS User connected: {user_id}")
     
     # Send current online users to the new connector
@@ -30,37 +34,40 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     try:
         while True:
             data = await websocket.receive_text()
+            manager.touch(websocket)
             payload = json.loads(data)
             
-            # Handle incoming typing events
+            # Handle incoming typing events (throttled and coalesced server-side)
             if payload.get("type") == "typing":
                 recipient_id = payload.get("recipient_id")
-                is_typing = payload.get("is_typing")
-                print(f"DEBUG: Typing event from {user_id} -> {recipient_id}: {is_typing}")
                 if recipient_id:
-                    await manager.broadcast_to_user(recipient_id, {
-                        "type": "typing",
-                        "sender_id": user_id,
-                        "is_typing": is_typing
-                    })
+                    manager.typing.update(user_id, recipient_id, bool(payload.get("is_typing")))
+            # Follow or stop following a post/event page: {"type": "subscribe", "topic": "post", "id": ...}
+            elif payload.get("type") in ("subscribe", "unsubscribe"):
+                topic, item_id = payload.get("topic"), payload.get("id")
+                if topic in LIVE_TOPICS and isinstance(item_id, str) and 0 < len(item_id) <= 64:
+                    room = f"{topic}:{item_id}"
+                    if payload["type"] == "unsubscribe":
+                        manager.leave(websocket, room)
+                        await websocket.send_json({"type": "unsubscribed", "topic": topic, "id": item_id})
+                    elif manager.join(websocket, room):
+                        await websocket.send_json({"type": "subscribed", "topic": topic, "id": item_id})
+                    else:
+                        await websocket.send_json({"type": "subscribe_rejected", "topic": topic, "id": item_id, "reason": "too_many_subscriptions"})
+            # "pong" replies to the server heartbeat only need the touch above
             
     except WebSocketDisconnect:
         print(f"DEBUG: WS User disconnected: {user_id}")
-        manager.disconnect(user_id, websocket)
         # Only broadcast offline if NO sessions remain
-        if user_id not in manager.active_connections:
-            await manager.broadcast_to_user("all", {
-                "type": "presence",
-                "user_id": user_id,
-                "status": "offline"
-            })
+        if manager.disconnect(user_id, websocket):
+            await manager.user_offline(user_id)
     except Exception as e:
         print(f"DEBUG: WS error user {user_id}: {str(e)}")
         logger.error(f"WebSocket error for user {user_id}: {str(e)}")
-        manager.disconnect(user_id, websocket)
-        if user_id not in manager.active_connections:
-            await manager.broadcast_to_user("all", {
-                "type": "presence",
-                "user_id": user_id,
-                "status": "offline"
-            })
+        if manager.disconnect(user_id, websocket):
+            await manager.user_offline(user_id)
+
+@router.get("/stats")
+async def websocket_stats(current_user: dict = Depends(get_current_user)):
+    """Connection gauges for this instance"""
+    return manager.stats()
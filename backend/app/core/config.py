@@ -46,11 +46,107 @@ def get_rabbit_url() -> str:
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 RABBIT_URL = get_rabbit_url()
 
+# Messages written before the compact (v2) layout are still read until scripts/migrate_messages_v2.py has run
+MESSAGES_LEGACY_READS = os.environ.get('MESSAGES_LEGACY_READS', 'true').lower() == 'true'
+
+# Messages older than MESSAGES_HOT_DAYS are moved to compressed segments by scripts/archive_messages.py
+MESSAGES_HOT_DAYS = int(os.environ.get('MESSAGES_HOT_DAYS', '90'))
+MESSAGE_SEGMENT_SIZE = int(os.environ.get('MESSAGE_SEGMENT_SIZE', '500'))
+
+# Announcements from organizations are fanned out to their connections in chunks of this size
+ANNOUNCEMENT_BATCH_SIZE = int(os.environ.get('ANNOUNCEMENT_BATCH_SIZE', '500'))
+
+# Outgoing email: "auto" (Resend when RESEND_API_KEY is set, else log), "resend", "file" (maildir under
+# EMAIL_FILE_DIR, for local testing) or "log". Delivered from the email_outbox collection by background workers.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'auto').lower()
+EMAIL_FILE_DIR = os.environ.get('EMAIL_FILE_DIR', '/tmp/myenab-mail')
+EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', '2'))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_RETRY_BASE_SECONDS = float(os.environ.get('EMAIL_RETRY_BASE_SECONDS', '10'))
+# Per worker process; Resend's default API limit is 2 requests per second per team
+EMAIL_RATE_PER_SECOND = float(os.environ.get('EMAIL_RATE_PER_SECOND', '2'))
+EMAIL_POLL_SECONDS = float(os.environ.get('EMAIL_POLL_SECONDS', '5'))
+
+# Background jobs (event reminders, weekly digest, message archival). Each run is claimed through
+# a lock in the scheduled_jobs collection, so only one instance runs a job at a time.
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+SCHEDULER_TICK_SECONDS = float(os.environ.get('SCHEDULER_TICK_SECONDS', '30'))
+SCHEDULER_CHUNK_SIZE = int(os.environ.get('SCHEDULER_CHUNK_SIZE', '500'))
+SCHEDULER_CONCURRENCY = int(os.environ.get('SCHEDULER_CONCURRENCY', '4'))
+EVENT_REMINDER_HOURS = float(os.environ.get('EVENT_REMINDER_HOURS', '24'))
+
+# "Near me" search: default and maximum radius for near/lat/lng queries
+GEO_DEFAULT_RADIUS_KM = float(os.environ.get('GEO_DEFAULT_RADIUS_KM', '25'))
+GEO_MAX_RADIUS_KM = float(os.environ.get('GEO_MAX_RADIUS_KM', '500'))
+
+# Trending sort for forum posts and resources: engagement loses half its weight every TRENDING_HALF_LIFE_HOURS.
+# Changing it rescales stored scores; re-run scripts/backfill_trending.py afterwards.
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', '48'))
+
+# Home feed: per-user timelines filled on write, trimmed to FEED_MAX_ITEMS daily and expired after FEED_RETENTION_DAYS.
+# NGO accounts whose connections and followers exceed FEED_PULL_THRESHOLD are merged in at read time instead.
+FEED_MAX_ITEMS = int(os.environ.get('FEED_MAX_ITEMS', '500'))
+FEED_RETENTION_DAYS = int(os.environ.get('FEED_RETENTION_DAYS', '30'))
+FEED_FANOUT_BATCH = int(os.environ.get('FEED_FANOUT_BATCH', '1000'))
+FEED_PULL_THRESHOLD = int(os.environ.get('FEED_PULL_THRESHOLD', '2000'))
+
+# Notifications: repeats of the same kind on the same target within NOTIFICATION_COALESCE_SECONDS
+# are folded into one entry ("12 people liked your post"); entries expire after NOTIFICATION_RETENTION_DAYS
+NOTIFICATION_COALESCE_SECONDS = int(os.environ.get('NOTIFICATION_COALESCE_SECONDS', '3600'))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+
+# Live page updates: one change stream over forum_posts, comments and events, held by whichever worker
+# owns the lease; its resume token is saved at most every LIVE_TOKEN_SAVE_SECONDS. Needs a replica set.
+LIVE_UPDATES_ENABLED = os.environ.get('LIVE_UPDATES_ENABLED', 'true').lower() == 'true'
+LIVE_LEASE_SECONDS = float(os.environ.get('LIVE_LEASE_SECONDS', '30'))
+LIVE_TOKEN_SAVE_SECONDS = float(os.environ.get('LIVE_TOKEN_SAVE_SECONDS', '1'))
+
+# Realtime bus: "auto" (RabbitMQ, then local socket, then in-memory), "rabbitmq", "local" or "memory"
+REALTIME_BUS = os.environ.get('REALTIME_BUS', 'auto').lower()
+LOCAL_BUS_PATH = os.environ.get('LOCAL_BUS_PATH', '/tmp/myenab-bus.sock')
+
+# Ephemeral WebSocket events (typing indicators)
+TYPING_THROTTLE_SECONDS = float(os.environ.get('TYPING_THROTTLE_SECONDS', '1.0'))
+TYPING_TTL_SECONDS = float(os.environ.get('TYPING_TTL_SECONDS', '6.0'))
+EPHEMERAL_COALESCE_SECONDS = float(os.environ.get('EPHEMERAL_COALESCE_SECONDS', '0.05'))
+
+# Resumable WebSocket sessions
+WS_REPLAY_BUFFER_SIZE = int(os.environ.get('WS_REPLAY_BUFFER_SIZE', '200'))
+WS_RESUME_WINDOW_SECONDS = float(os.environ.get('WS_RESUME_WINDOW_SECONDS', '120'))
+
+# WebSocket liveness and limits
+# Protocol-level pings are sent by uvicorn (WS_PING_INTERVAL/WS_PING_TIMEOUT, see server.py and Procfile).
+# The app-level heartbeat below also catches sockets kept "alive" by intermediate proxies.
+WS_PING_INTERVAL = float(os.environ.get('WS_PING_INTERVAL', '20'))
+WS_PING_TIMEOUT = float(os.environ.get('WS_PING_TIMEOUT', '20'))
+WS_HEARTBEAT_SECONDS = float(os.environ.get('WS_HEARTBEAT_SECONDS', '30'))
+WS_IDLE_TIMEOUT_SECONDS = float(os.environ.get('WS_IDLE_TIMEOUT_SECONDS', '90'))
+WS_MAX_CONNECTIONS_PER_USER = int(os.environ.get('WS_MAX_CONNECTIONS_PER_USER', '5'))
+WS_MAX_CONNECTIONS = int(os.environ.get('WS_MAX_CONNECTIONS', '10000'))
+# Post/event pages a single socket can follow at once
+WS_MAX_SUBSCRIPTIONS = int(os.environ.get('WS_MAX_SUBSCRIPTIONS', '50'))
+
+# Graceful shutdown: clients are told to reconnect after a random delay in this range
+WS_RECONNECT_MIN_SECONDS = float(os.environ.get('WS_RECONNECT_MIN_SECONDS', '1'))
+WS_RECONNECT_MAX_SECONDS = float(os.environ.get('WS_RECONNECT_MAX_SECONDS', '15'))
+
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'temp-secret-change-me-in-production')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Per-worker caches
+CONNECTION_CACHE_MAX_USERS = int(os.environ.get('CONNECTION_CACHE_MAX_USERS', '50000'))
+CONNECTION_CACHE_TTL_SECONDS = float(os.environ.get('CONNECTION_CACHE_TTL_SECONDS', '600'))
+SUGGESTIONS_CACHE_MAX_USERS = int(os.environ.get('SUGGESTIONS_CACHE_MAX_USERS', '10000'))
+SUGGESTIONS_CACHE_TTL_SECONDS = float(os.environ.get('SUGGESTIONS_CACHE_TTL_SECONDS', '300'))
+# Unfiltered provider/resource facet counts; creates update them in place, the TTL picks up edits and deletes
+FACET_CACHE_TTL_SECONDS = float(os.environ.get('FACET_CACHE_TTL_SECONDS', '600'))
+
+# Incremental sync: per-user change log kept this long, and at most this many changes per response
+CHANGE_LOG_TTL_SECONDS = int(os.environ.get('CHANGE_LOG_TTL_SECONDS', str(7 * 24 * 3600)))
+SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES', '500'))
+
 # OIDC Configuration
 oauth = OAuth()
 OIDC_ISSUER_URL = os.environ.get('OIDC_ISSUER_URL')
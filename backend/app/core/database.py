@@ -1,6 +1,6 @@
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
-from .config import MONGO_URL, get_env_required, logger
+from .config import MONGO_URL, CHANGE_LOG_TTL_SECONDS, FEED_RETENTION_DAYS, get_env_required, logger
 import os
 
 # MongoDB connection
@@ -13,3 +13,80 @@ except Exception as e:
     logger.error(f"Failed to initialize database: {str(e)}")
     # We allow the app to boot so the user can see the error in logs
     db = None
+
+async def ensure_indexes():
+    """Create the indexes the services rely on (idempotent, runs at startup)"""
+    if db is None:
+        return
+    try:
+        # One row per pair of users regardless of direction; rows predating pair_key are
+        # left out until scripts/migrate_connection_pairs.py has backfilled them
+        await db.connections.create_index(
+            "pair_key", unique=True, partialFilterExpression={"pair_key": {"$exists": True}}
+        )
+        await db.connections.create_index([("sender_id", 1), ("status", 1)])
+        await db.connections.create_index([("receiver_id", 1), ("status", 1)])
+        await db.users.create_index("id", unique=True)
+        await db.users.create_index("disability_categories")
+        await db.users.create_index("location")
+        await db.conversations.create_index([("user_id", 1), ("peer_id", 1)], unique=True)
+        await db.conversations.create_index([("user_id", 1), ("last_message_time", -1)])
+        await db.unread_counters.create_index("user_id", unique=True)
+        await db.changes.create_index([("user_id", 1), ("version", 1)], unique=True)
+        await db.changes.create_index("created_at", expireAfterSeconds=CHANGE_LOG_TTL_SECONDS)
+        await db.sync_versions.create_index("user_id", unique=True)
+        # Compact (v2) messages are read per conversation, newest first, paged on (t, _id)
+        await db.messages.create_index([("s", 1), ("r", 1), ("t", -1), ("_id", -1)])
+        # Legacy layout, only while scripts/migrate_messages_v2.py hasn't finished
+        await db.messages.create_index(
+            [("sender_id", 1), ("recipient_id", 1), ("created_at", -1)],
+            partialFilterExpression={"sender_id": {"$exists": True}}
+        )
+        await db.messages_archive.create_index([("k", 1), ("first_t", -1)])
+        await db.announcement_jobs.create_index("id", unique=True)
+        await db.announcement_jobs.create_index([("status", 1), ("heartbeat_at", 1)])
+        await db.email_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        await db.email_outbox.create_index(
+            "dedupe_key", unique=True, partialFilterExpression={"dedupe_key": {"$exists": True}}
+        )
+        # Delivered emails are kept for a month for troubleshooting
+        await db.email_outbox.create_index("sent_at", expireAfterSeconds=30 * 24 * 3600)
+        await db.events.create_index("start_date")
+        # "Near me" search; documents without a geocoded location are left out of the index
+        await db.users.create_index([("geo", "2dsphere")])
+        await db.providers.create_index([("geo", "2dsphere")])
+        await db.events.create_index([("geo", "2dsphere")])
+        # Directory filters (and the $match ahead of filtered facet counts)
+        await db.providers.create_index("services")
+        await db.providers.create_index("disability_focus")
+        await db.providers.create_index([("rating", -1), ("reviews_count", -1)])
+        await db.provider_reviews.create_index([("provider_id", 1), ("user_id", 1)], unique=True)
+        await db.provider_reviews.create_index([("provider_id", 1), ("created_at", -1), ("id", -1)])
+        await db.resources.create_index([("category", 1), ("created_at", -1)])
+        await db.resources.create_index("tags")
+        # Chronological and trending listings, overall and per category
+        await db.resources.create_index([("created_at", -1)])
+        await db.resources.create_index([("trend", -1)])
+        await db.resources.create_index([("category", 1), ("trend", -1)])
+        await db.forum_posts.create_index([("created_at", -1)])
+        await db.forum_posts.create_index([("category", 1), ("created_at", -1)])
+        await db.forum_posts.create_index([("trend", -1)])
+        await db.forum_posts.create_index([("category", 1), ("trend", -1)])
+        # Threaded comments, paged one level at a time
+        await db.comments.create_index([("post_id", 1), ("parent_id", 1), ("created_at", 1), ("id", 1)])
+        await db.comments.create_index("id")
+        # Home feed: one range scan per page; entries expire after FEED_RETENTION_DAYS
+        await db.timelines.create_index([("user_id", 1), ("t", -1), ("item_id", -1)])
+        await db.timelines.create_index("created_at", expireAfterSeconds=FEED_RETENTION_DAYS * 24 * 3600)
+        await db.follows.create_index([("user_id", 1), ("kind", 1), ("value", 1)], unique=True)
+        await db.follows.create_index([("kind", 1), ("value", 1)])
+        await db.forum_posts.create_index([("author_id", 1), ("created_at", -1)])
+        await db.users.create_index("feed_pull", partialFilterExpression={"feed_pull": True})
+        # Notifications: one entry per (recipient, kind, target, coalescing window); read ones expire
+        await db.notifications.create_index([("user_id", 1), ("kind", 1), ("target_id", 1), ("bucket", 1)], unique=True)
+        await db.notifications.create_index([("user_id", 1), ("updated_at", -1), ("id", -1)])
+        await db.notifications.create_index("expires_at", expireAfterSeconds=0, partialFilterExpression={"read": True})
+        await db.notification_counters.create_index("user_id", unique=True)
+        logger.info("Database indexes ensured")
+    except Exception as e:
+        logger.error(f"Failed to ensure database indexes: {str(e)}")
@@ -0,0 +1,140 @@
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import logger, TYPING_THROTTLE_SECONDS, TYPING_TTL_SECONDS, EPHEMERAL_COALESCE_SECONDS
+
+# emit(user_id, event) publishes a single frame to the user's sessions
+Emitter = Callable[[str, dict], Awaitable[None]]
+
+
+class EphemeralCoalescer:
+    """
+    Buffers short-lived events (typing, read receipts) per recipient and
+    publishes everything gathered inside one window as a single frame.
+    """
+
+    def __init__(self, emit: Emitter, window: float = EPHEMERAL_COALESCE_SECONDS):
+        self.emit = emit
+        self.window = window
+        self._pending: Dict[str, List[dict]] = {}
+
+    def push(self, user_id: str, event: dict):
+        user_id = str(user_id)
+        if user_id not in self._pending:
+            self._pending[user_id] = []
+            asyncio.get_running_loop().call_later(self.window, self._schedule_flush, user_id)
+        events = self._pending[user_id]
+        # A newer typing state from the same sender supersedes the buffered one
+        if event.get("type") == "typing":
+            events[:] = [e for e in events if not (e.get("type") == "typing" and e.get("sender_id") == event.get("sender_id"))]
+        events.append(event)
+
+    def _schedule_flush(self, user_id: str):
+        asyncio.ensure_future(self.flush(user_id))
+
+    async def flush(self, user_id: str):
+        events = self._pending.pop(user_id, None)
+        if not events:
+            return
+        frame = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+        try:
+            await self.emit(user_id, frame)
+        except Exception as e:
+            logger.error(f"Failed to publish ephemeral events to {user_id}: {str(e)}")
+
+    async def flush_all(self):
+        for user_id in list(self._pending.keys()):
+            await self.flush(user_id)
+
+
+class TypingThrottler:
+    """
+    Throttles typing indicators per (sender, recipient).
+    Only state changes are forwarded: the first change goes out immediately
+    (leading edge), later changes inside the interval are collapsed into one
+    trailing update. An is_typing=True state expires on its own after the TTL
+    so a client that vanishes mid-sentence doesn't leave a stuck indicator.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[str, dict], None],
+        interval: float = TYPING_THROTTLE_SECONDS,
+        ttl: float = TYPING_TTL_SECONDS
+    ):
+        self.publish = publish
+        self.interval = interval
+        self.ttl = ttl
+        # state[(sender_id, recipient_id)] = {"sent", "latest", "last_emit", "trailing", "expiry"}
+        self._state: Dict[Tuple[str, str], dict] = {}
+
+    def update(self, sender_id: str, recipient_id: str, is_typing: bool):
+        key = (str(sender_id), str(recipient_id))
+        state = self._state.get(key)
+        if state is None:
+            state = {"sent": False, "latest": False, "last_emit": 0.0, "trailing": None, "expiry": None}
+            self._state[key] = state
+        state["latest"] = bool(is_typing)
+
+        if state["expiry"]:
+            state["expiry"].cancel()
+            state["expiry"] = None
+        if state["latest"]:
+            state["expiry"] = asyncio.get_running_loop().call_later(self.ttl, self._expire, key)
+
+        if state["latest"] == state["sent"]:
+            if state["trailing"]:
+                state["trailing"].cancel()
+                state["trailing"] = None
+            self._forget_if_idle(key)
+            return
+
+        wait = state["last_emit"] + self.interval - time.monotonic()
+        if wait <= 0:
+            self._emit(key)
+        elif not state["trailing"]:
+            state["trailing"] = asyncio.get_running_loop().call_later(wait, self._emit, key)
+
+    def clear_sender(self, sender_id: str):
+        """Expire every indicator a sender has open, e.g. when their last session closes"""
+        for key in [k for k in self._state if k[0] == str(sender_id)]:
+            self._expire(key)
+
+    def _expire(self, key: Tuple[str, str]):
+        state = self._state.get(key)
+        if not state:
+            return
+        state["latest"] = False
+        if state["expiry"]:
+            state["expiry"].cancel()
+            state["expiry"] = None
+        if state["sent"]:
+            self._emit(key)
+        else:
+            self._forget_if_idle(key)
+
+    def _emit(self, key: Tuple[str, str]):
+        state = self._state.get(key)
+        if not state:
+            return
+        state["trailing"] = None
+        if state["latest"] != state["sent"]:
+            state["sent"] = state["latest"]
+            state["last_emit"] = time.monotonic()
+            sender_id, recipient_id = key
+            self.publish(recipient_id, {
+                "type": "typing",
+                "sender_id": sender_id,
+                "is_typing": state["sent"]
+            })
+            if not state["sent"]:
+                # Keep last_emit around for one interval so quick flapping stays throttled
+                asyncio.get_running_loop().call_later(self.interval + 0.01, self._forget_if_idle, key)
+        self._forget_if_idle(key)
+
+    def _forget_if_idle(self, key: Tuple[str, str]):
+        state: Optional[dict] = self._state.get(key)
+        if not state or state["sent"] or state["latest"] or state["trailing"] or state["expiry"]:
+            return
+        if time.monotonic() - state["last_emit"] >= self.interval:
+            del self._state[key]
@@ -0,0 +1,153 @@
+import os
+import re
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional
+from fastapi import HTTPException
+from app.core.config import GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.tsv")
+EARTH_RADIUS_KM = 6378.1
+
+# Country names (and common short forms) -> ISO code, used to pick between places sharing a name
+COUNTRIES = {
+    "india": "IN", "bharat": "IN",
+    "united states": "US", "united states of america": "US", "usa": "US", "us": "US", "america": "US",
+    "united kingdom": "GB", "uk": "GB", "great britain": "GB", "britain": "GB", "england": "GB",
+    "scotland": "GB", "wales": "GB", "northern ireland": "GB",
+    "canada": "CA", "australia": "AU", "new zealand": "NZ", "ireland": "IE", "france": "FR",
+    "germany": "DE", "spain": "ES", "italy": "IT", "netherlands": "NL", "belgium": "BE",
+    "switzerland": "CH", "austria": "AT", "sweden": "SE", "norway": "NO", "denmark": "DK",
+    "finland": "FI", "poland": "PL", "portugal": "PT", "greece": "GR", "russia": "RU",
+    "turkey": "TR", "turkiye": "TR", "israel": "IL",
+    "united arab emirates": "AE", "uae": "AE", "saudi arabia": "SA", "qatar": "QA", "egypt": "EG",
+    "nigeria": "NG", "kenya": "KE", "ethiopia": "ET", "ghana": "GH", "south africa": "ZA",
+    "pakistan": "PK", "bangladesh": "BD", "sri lanka": "LK", "nepal": "NP", "china": "CN",
+    "hong kong": "HK", "japan": "JP", "south korea": "KR", "korea": "KR", "singapore": "SG",
+    "malaysia": "MY", "indonesia": "ID", "philippines": "PH", "thailand": "TH", "vietnam": "VN",
+    "brazil": "BR", "argentina": "AR", "mexico": "MX", "colombia": "CO", "chile": "CL", "peru": "PE",
+}
+
+
+class Place(NamedTuple):
+    name: str
+    country: str
+    lat: float
+    lng: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.country}"
+
+    def point(self) -> dict:
+        # GeoJSON is [longitude, latitude]
+        return {"type": "Point", "coordinates": [self.lng, self.lat]}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents stripped, punctuation and postcodes dropped: "São Paulo - 01310" -> "sao paulo" """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(word for word in re.split(r"[^a-z0-9]+", text) if word and not word.isdigit())
+
+
+class Gazetteer:
+    """Bundled offline place list (app/data/gazetteer.tsv), loaded on first lookup"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        self._index: Optional[Dict[str, List[Place]]] = None
+
+    def _load(self) -> Dict[str, List[Place]]:
+        index: Dict[str, List[Place]] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, country, lat, lng, alternates = (line.rstrip("\n").split("\t") + [""])[:5]
+                place = Place(name, country, float(lat), float(lng))
+                for alias in [name] + alternates.split(";"):
+                    key = normalize(alias)
+                    if key and place not in index.setdefault(key, []):
+                        index[key].append(place)
+        return index
+
+    def places(self) -> List[Place]:
+        if self._index is None:
+            self._index = self._load()
+        return list(dict.fromkeys(place for places in self._index.values() for place in places))
+
+    def lookup(self, location: Optional[str]) -> Optional[Place]:
+        """
+        Resolve free text such as "Andheri, Mumbai, India" or "Birmingham, UK".
+        Comma-separated parts are tried left to right (most specific first), then
+        the whole string; a country among the parts picks between namesakes.
+        """
+        if not location:
+            return None
+        if self._index is None:
+            self._index = self._load()
+        parts = [normalize(part) for part in location.split(",")]
+        parts = [part for part in parts if part]
+        country = next((COUNTRIES[part] for part in parts if part in COUNTRIES), None)
+        for key in parts + [normalize(location)]:
+            places = self._index.get(key)
+            if places:
+                return next((p for p in places if p.country == country), places[0])
+        return None
+
+
+# Global gazetteer
+gazetteer = Gazetteer()
+
+
+def location_fields(location: Optional[str]) -> dict:
+    """geo (GeoJSON point) and place (canonical "City, CC") stored next to a free-text location"""
+    place = gazetteer.lookup(location)
+    if place is None:
+        return {}
+    return {"geo": place.point(), "place": place.label}
+
+
+def _parse_bbox(bbox: str) -> List[float]:
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+    return [min_lng, min_lat, max_lng, max_lat]
+
+
+def geo_filter(
+    near: Optional[str] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = GEO_DEFAULT_RADIUS_KM,
+    bbox: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Query on the 2dsphere-indexed geo field: within radius_km of a place name
+    (near) or a coordinate (lat/lng), or inside a bounding box. None when no
+    geographic option was given.
+    """
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = _parse_bbox(bbox)
+        ring = [[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]
+        return {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}
+
+    if near:
+        place = gazetteer.lookup(near)
+        if place is None:
+            raise HTTPException(status_code=400, detail=f"Unknown place '{near}'")
+        lat, lng = place.lat, place.lng
+    elif lat is None and lng is None:
+        return None
+    elif lat is None or lng is None:
+        raise HTTPException(status_code=400, detail="lat and lng must be given together")
+    elif not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=400, detail="lat/lng out of range")
+
+    if not 0 < radius_km <= GEO_MAX_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"radius_km must be between 0 and {GEO_MAX_RADIUS_KM}")
+    # $centerSphere takes the radius in radians
+    return {"$geoWithin": {"$centerSphere": [[lng, lat], radius_km / EARTH_RADIUS_KM]}}
@@ -0,0 +1,103 @@
+import os
+import time
+import socket
+import asyncio
+from email.message import EmailMessage
+from typing import Optional
+from app.core.config import logger, EMAIL_BACKEND, EMAIL_FILE_DIR
+
+MAIL_FROM = os.environ.get("MAIL_FROM", "onboarding@resend.dev")
+
+
+def _resend_api_key() -> Optional[str]:
+    key = os.environ.get("RESEND_API_KEY")
+    if not key or "your_api_key_here" in key:
+        return None
+    return key
+
+
+class MailBackend:
+    """Delivers one rendered email; raises on failure so the outbox can retry"""
+    name = "base"
+
+    async def send(self, to: str, subject: str, html: str, text: Optional[str] = None) -> Optional[str]:
+        raise NotImplementedError
+
+
+class ResendBackend(MailBackend):
+    """Resend HTTP API; the SDK is blocking, so calls run on a worker thread"""
+    name = "resend"
+
+    def __init__(self):
+        import resend
+        resend.api_key = _resend_api_key()
+        self.resend = resend
+
+    async def send(self, to: str, subject: str, html: str, text: Optional[str] = None) -> Optional[str]:
+        params = {"from": MAIL_FROM, "to": [to], "subject": subject, "html": html}
+        if text:
+            params["text"] = text
+        response = await asyncio.to_thread(self.resend.Emails.send, params)
+        return response.get("id")
+
+
+class FileBackend(MailBackend):
+    """Writes .eml files into a maildir (new/ subfolder), for local testing"""
+    name = "file"
+
+    def __init__(self, path: str = EMAIL_FILE_DIR):
+        self.path = path
+        for sub in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        self._count = 0
+
+    def _write(self, message: EmailMessage) -> str:
+        self._count += 1
+        name = f"{time.time_ns()}.{os.getpid()}_{self._count}.{socket.gethostname()}"
+        # Maildir delivery: write under tmp/, then rename into new/ so readers never see partial files
+        tmp_path = os.path.join(self.path, "tmp", name)
+        with open(tmp_path, "wb") as f:
+            f.write(message.as_bytes())
+        os.rename(tmp_path, os.path.join(self.path, "new", name))
+        return name
+
+    async def send(self, to: str, subject: str, html: str, text: Optional[str] = None) -> Optional[str]:
+        message = EmailMessage()
+        message["From"] = MAIL_FROM
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(text or "")
+        message.add_alternative(html, subtype="html")
+        return await asyncio.to_thread(self._write, message)
+
+
+class LogBackend(MailBackend):
+    """Development fallback: prints the plain-text body (and its links) instead of sending"""
+    name = "log"
+
+    async def send(self, to: str, subject: str, html: str, text: Optional[str] = None) -> Optional[str]:
+        logger.warning(f"Email backend is 'log', not sending '{subject}' to {to}")
+        print(f"\n[MOCK EMAIL] To: {to}\n[MOCK EMAIL] Subject: {subject}\n{text or ''}\n")
+        return None
+
+
+MAIL_BACKENDS = {
+    "resend": ResendBackend,
+    "file": FileBackend,
+    "log": LogBackend,
+}
+
+def create_mail_backend(backend: str = EMAIL_BACKEND) -> MailBackend:
+    """Build the configured backend, falling back to logging when it can't be used"""
+    if backend == "auto":
+        backend = "resend" if _resend_api_key() else "log"
+    if backend not in MAIL_BACKENDS:
+        logger.warning(f"Unknown EMAIL_BACKEND '{backend}', using log")
+        backend = "log"
+    try:
+        mailer = MAIL_BACKENDS[backend]()
+    except Exception as e:
+        logger.warning(f"Email backend '{backend}' unavailable ({str(e)}), using log")
+        mailer = LogBackend()
+    logger.info(f"Email backend: {mailer.name}")
+    return mailer
@@ -0,0 +1,48 @@
+import uuid
+import time
+from collections import deque
+from itertools import islice
+from typing import List, Optional
+from app.core.config import WS_REPLAY_BUFFER_SIZE
+
+# Frames that are only meaningful live and are never numbered or replayed. Presence is
+# broadcast to everyone on every connect/disconnect and would flush durable frames out of
+# the buffers; a reconnecting client gets the current list in initial_presence instead.
+EPHEMERAL_TYPES = {"typing", "batch", "presence"}
+
+
+class ReplayBuffer:
+    """
+    Numbers the durable events sent to one user and keeps the latest ones so a
+    reconnecting client can be sent only the gap. The epoch changes whenever
+    the buffer is recreated (new worker, expired session) so sequence numbers
+    from a different buffer are never mistaken for this one.
+    """
+
+    def __init__(self, size: int = WS_REPLAY_BUFFER_SIZE):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.events = deque(maxlen=size)
+        self.linger_until: Optional[float] = None
+
+    def append(self, payload: dict) -> dict:
+        self.seq += 1
+        frame = {**payload, "seq": self.seq}
+        self.events.append(frame)
+        return frame
+
+    def since(self, last_seq: int) -> Optional[List[dict]]:
+        """Events after last_seq, or None if they are no longer all buffered"""
+        if last_seq > self.seq or last_seq < 0:
+            return None
+        if last_seq == self.seq:
+            return []
+        first_seq = self.events[0]["seq"] if self.events else self.seq + 1
+        if last_seq + 1 < first_seq:
+            return None
+        return list(islice(self.events, last_seq + 1 - first_seq, None))
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        if self.linger_until is None:
+            return False
+        return (now or time.monotonic()) >= self.linger_until
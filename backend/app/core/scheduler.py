@@ -0,0 +1,140 @@
+import os
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo.errors import DuplicateKeyError
+from app.core.config import logger, SCHEDULER_TICK_SECONDS
+from app.core.database import db
+
+JobFunc = Callable[[], Awaitable[Optional[dict]]]
+
+
+class ScheduledJob:
+    def __init__(self, name: str, interval: timedelta, func: JobFunc, lease: timedelta):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.lease = lease
+
+
+class Scheduler:
+    """
+    Runs registered jobs at fixed intervals in every worker. Job state lives in
+    the scheduled_jobs collection ({_id: name, next_run_at, locked_until, ...});
+    a worker only runs a job after atomically taking its lock, and keeps
+    renewing the lock while it runs, so each run happens on exactly one
+    instance and a crashed runner's lock simply expires.
+    """
+
+    def __init__(self, tick: float = SCHEDULER_TICK_SECONDS):
+        self.tick = tick
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running: List[asyncio.Task] = []
+
+    def register(self, name: str, interval: timedelta, func: JobFunc, lease: timedelta = timedelta(minutes=5)):
+        self.jobs[name] = ScheduledJob(name, interval, func, lease)
+
+    def start(self):
+        if self._task is None and self.jobs:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        tasks = ([self._task] if self._task else []) + self._running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running = []
+
+    async def _loop(self):
+        for job in self.jobs.values():
+            try:
+                # First deploy: schedule the first run one interval from now
+                await db.scheduled_jobs.insert_one({
+                    "_id": job.name,
+                    "next_run_at": datetime.now(timezone.utc) + job.interval,
+                    "locked_until": None,
+                    "owner": None,
+                    "runs": 0
+                })
+            except DuplicateKeyError:
+                pass
+            except Exception as e:
+                logger.error(f"Failed to register job '{job.name}': {str(e)}")
+        while True:
+            for job in self.jobs.values():
+                try:
+                    if await self._acquire(job):
+                        task = asyncio.create_task(self._run(job))
+                        self._running.append(task)
+                        task.add_done_callback(self._running.remove)
+                except Exception as e:
+                    logger.error(f"Scheduler failed to claim '{job.name}': {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    async def _acquire(self, job: ScheduledJob) -> bool:
+        now = datetime.now(timezone.utc)
+        claimed = await db.scheduled_jobs.find_one_and_update(
+            {
+                "_id": job.name,
+                "next_run_at": {"$lte": now},
+                "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]
+            },
+            {"$set": {"owner": self.owner, "locked_until": now + job.lease}}
+        )
+        return claimed is not None
+
+    async def _renew(self, job: ScheduledJob):
+        while True:
+            await asyncio.sleep(job.lease.total_seconds() / 3)
+            await db.scheduled_jobs.update_one(
+                {"_id": job.name, "owner": self.owner},
+                {"$set": {"locked_until": datetime.now(timezone.utc) + job.lease}}
+            )
+
+    async def run_now(self, name: str) -> Optional[dict]:
+        """Run a job immediately in this process, bypassing the schedule (scripts, debugging)"""
+        return await self.jobs[name].func()
+
+    async def _run(self, job: ScheduledJob):
+        renew = asyncio.create_task(self._renew(job))
+        started = datetime.now(timezone.utc)
+        status, error, result = "ok", None, None
+        try:
+            logger.info(f"Job '{job.name}' started on {self.owner}")
+            result = await job.func()
+        except asyncio.CancelledError:
+            # Shutdown: release the lock so another instance can retry soon
+            status, error = "cancelled", "worker stopped"
+            raise
+        except Exception as e:
+            status, error = "error", str(e)
+            logger.error(f"Job '{job.name}' failed: {str(e)}")
+        finally:
+            renew.cancel()
+            finished = datetime.now(timezone.utc)
+            update = {
+                "owner": None,
+                "locked_until": None,
+                "last_run_at": started,
+                "last_duration_seconds": (finished - started).total_seconds(),
+                "last_status": status,
+                "last_error": error,
+                "last_result": result
+            }
+            if status != "cancelled":
+                update["next_run_at"] = started + job.interval
+            await asyncio.shield(db.scheduled_jobs.update_one(
+                {"_id": job.name, "owner": self.owner},
+                {"$set": update, "$inc": {"runs": 1}}
+            ))
+            if status == "ok":
+                logger.info(f"Job '{job.name}' finished in {update['last_duration_seconds']:.1f}s: {result}")
+
+
+# Global scheduler instance, jobs are registered in app.services.jobs
+scheduler = Scheduler()
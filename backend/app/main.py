@@ -39,7 +39,35 @@ app.include_router(api_router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     from app.core.websocket import manager
-    await manager.init_rabbitmq()
+    from app.core.database import ensure_indexes
+    await ensure_indexes()
+    await manager.init_bus()
+    manager.start_heartbeat()
+    manager.install_drain_on_signal()
+    from app.services.announcement_service import resume_stale_jobs
+    await resume_stale_jobs()
+    from app.services.email_outbox import email_outbox
+    email_outbox.start()
+    from app.core.config import LIVE_UPDATES_ENABLED, SCHEDULER_ENABLED
+    if LIVE_UPDATES_ENABLED:
+        from app.services.live_updates import live_updates
+        live_updates.start()
+    if SCHEDULER_ENABLED:
+        from app.core.scheduler import scheduler
+        from app.services.jobs import register_jobs
+        register_jobs()
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.core.websocket import manager
+    from app.services.email_outbox import email_outbox
+    from app.core.scheduler import scheduler
+    from app.services.live_updates import live_updates
+    await scheduler.stop()
+    await live_updates.stop()
+    await email_outbox.stop()
+    await manager.close()
 
 @app.get("/")
 @app.get("/health")
@@ -48,4 +76,8 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
+    from .core.config import WS_PING_INTERVAL, WS_PING_TIMEOUT
+    uvicorn.run(
+        app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)),
+        ws_ping_interval=WS_PING_INTERVAL, ws_ping_timeout=WS_PING_TIMEOUT
+    )
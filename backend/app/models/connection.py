@@ -3,10 +3,15 @@ from typing import Optional, Literal
 from datetime import datetime
 import uuid
 
+def pair_key(user_id1: str, user_id2: str) -> str:
+    """Canonical, direction-independent key for a pair of users"""
+    return ":".join(sorted((user_id1, user_id2)))
+
 class Connection(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     sender_id: str
     receiver_id: str
+    pair_key: Optional[str] = None
     status: Literal["pending", "accepted", "declined"] = "pending"
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class FacetsResponse(BaseModel):
+    total: int
+    facets: Dict[str, List[FacetCount]]
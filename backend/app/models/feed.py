@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+class FollowCreate(BaseModel):
+    kind: Literal["user", "tag", "category"]
+    value: str
+
+class FollowResponse(BaseModel):
+    kind: str
+    value: str
+    created_at: str
+
+class FeedItem(BaseModel):
+    kind: Literal["post", "resource", "event"]
+    # Why it is in the feed: "own", "connection", "following", "tag:<tag>" or "category:<category>"
+    reason: str
+    item: dict
+
+class FeedPage(BaseModel):
+    items: List[FeedItem]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class ForumPostCreate(BaseModel):
     title: str
@@ -23,6 +23,8 @@ class ForumPostResponse(BaseModel):
 
 class CommentCreate(BaseModel):
     content: str
+    # Reply to this comment instead of the post
+    parent_id: Optional[str] = None
 
 class CommentResponse(BaseModel):
     id: str
@@ -31,3 +33,8 @@ class CommentResponse(BaseModel):
     author_id: str
     author_name: str
     created_at: str
+    parent_id: Optional[str] = None
+    # Ids from the top-level comment down to this one, "/"-separated
+    path: Optional[str] = None
+    depth: int = 0
+    replies_count: int = 0
@@ -1,5 +1,51 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from bson import ObjectId
+
+# Compact message layout, one document per message:
+#   _id: ObjectId (time-ordered, exposed as the message id)
+#   v: MESSAGE_SCHEMA_VERSION, s: sender id, r: recipient id, c: content, t: BSON date
+# Names are resolved at read time. Documents without "v" use the legacy layout
+# (uuid "id", sender_id, sender_name, recipient_id, content, ISO string created_at).
+MESSAGE_SCHEMA_VERSION = 2
+
+def format_message_time(value: datetime) -> str:
+    """ISO string with fixed microsecond precision, so API timestamps compare as strings"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat(timespec="microseconds")
+
+def compact_message(sender_id: str, recipient_id: str, content: str, created_at: datetime,
+                    _id: Optional[ObjectId] = None) -> dict:
+    return {
+        "_id": _id or ObjectId(),
+        "v": MESSAGE_SCHEMA_VERSION,
+        "s": sender_id,
+        "r": recipient_id,
+        "c": content,
+        "t": created_at
+    }
+
+def expand_message(doc: dict, names: Dict[str, str]) -> dict:
+    """API shape of a stored message in either layout"""
+    if doc.get("v") == MESSAGE_SCHEMA_VERSION:
+        return {
+            "id": str(doc["_id"]),
+            "sender_id": doc["s"],
+            "sender_name": names.get(doc["s"], ""),
+            "recipient_id": doc["r"],
+            "content": doc["c"],
+            "created_at": format_message_time(doc["t"])
+        }
+    return {
+        "id": doc["id"],
+        "sender_id": doc["sender_id"],
+        "sender_name": names.get(doc["sender_id"], doc.get("sender_name", "")),
+        "recipient_id": doc["recipient_id"],
+        "content": doc["content"],
+        "created_at": doc["created_at"]
+    }
 
 class MessageCreate(BaseModel):
     recipient_id: str
@@ -20,3 +66,18 @@ class ConversationResponse(BaseModel):
     last_message: str
     last_message_time: str
     unread_count: int
+
+class AnnouncementCreate(BaseModel):
+    content: str
+
+class AnnouncementJobResponse(BaseModel):
+    id: str
+    sender_id: str
+    content: str
+    status: str
+    total: int = 0
+    sent: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
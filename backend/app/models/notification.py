@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+NotificationKind = Literal["forum_like", "forum_comment", "comment_reply", "connection_request", "connection_accepted", "event_rsvp"]
+
+class NotificationResponse(BaseModel):
+    id: str
+    kind: NotificationKind
+    # The post, comment, event or user the notification is about
+    target_id: str
+    # Distinct people behind it ("12 people liked your post"), newest names last
+    actors_count: int
+    actor_names: List[str] = []
+    data: dict = {}
+    read: bool
+    created_at: str
+    updated_at: str
+
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    unread: int
+    next_cursor: Optional[str] = None
+
+class NotificationsRead(BaseModel):
+    # Omit to mark everything read
+    ids: Optional[List[str]] = None
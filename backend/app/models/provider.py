@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class ServiceProviderCreate(BaseModel):
@@ -26,3 +26,29 @@ class ServiceProviderResponse(BaseModel):
     rating: float = 0.0
     reviews_count: int = 0
     created_at: str
+
+class ReviewCreate(BaseModel):
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = Field(None, max_length=2000)
+
+class ReviewResponse(BaseModel):
+    id: str
+    provider_id: str
+    user_id: str
+    user_name: str
+    rating: int
+    comment: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class ReviewSubmitResponse(BaseModel):
+    review: ReviewResponse
+    # The provider's aggregate after this review
+    rating: float
+    reviews_count: int
+
+class ProviderRecommendation(BaseModel):
+    provider: ServiceProviderResponse
+    score: float
+    shared_disability_focus: List[str] = []
+    distance_km: Optional[float] = None
@@ -34,6 +34,13 @@ class UserResponse(BaseModel):
     is_verified: bool = False
     auth_provider: Optional[str] = None
 
+class SuggestionResponse(BaseModel):
+    user: UserResponse
+    mutual_connections: int = 0
+    shared_disability_categories: List[str] = []
+    same_location: bool = False
+    score: float
+
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     user_type: Optional[str] = None
@@ -0,0 +1,236 @@
+import uuid
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Set
+from fastapi import HTTPException
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.config import logger, ANNOUNCEMENT_BATCH_SIZE
+from app.core.database import db
+from app.core.websocket import manager
+from app.models.message import AnnouncementCreate, compact_message, expand_message, format_message_time
+from app.services.sync_service import record_change, record_changes
+
+ANNOUNCER_TYPES = {"ngo", "service_provider"}
+
+# A running job refreshes heartbeat_at after every chunk; one silent for this long
+# is assumed to have died with its worker and is picked up again
+JOB_STALE_AFTER = timedelta(minutes=2)
+
+# Announcement message ids kept on each conversation and unread counter, so a resent
+# chunk doesn't count a message twice (only the latest few jobs can still be resent)
+ANNOUNCEMENT_IDS_KEPT = 20
+
+# Strong references to running jobs, so the event loop doesn't drop them
+_running: Set[asyncio.Task] = set()
+
+
+async def create_announcement(data: AnnouncementCreate, current_user: dict):
+    if current_user.get("user_type") not in ANNOUNCER_TYPES:
+        raise HTTPException(status_code=403, detail="Only organizations and service providers can send announcements")
+    if not data.content.strip():
+        raise HTTPException(status_code=400, detail="Announcement cannot be empty")
+
+    now = datetime.now(timezone.utc)
+    job = {
+        "id": str(uuid.uuid4()),
+        "sender_id": current_user["id"],
+        "sender_name": current_user["name"],
+        "content": data.content,
+        "status": "queued",
+        "total": 0,
+        "sent": 0,
+        "cursor": "",
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "heartbeat_at": now,
+        "finished_at": None
+    }
+    await db.announcement_jobs.insert_one(job)
+    _start(job["id"])
+    return {k: v for k, v in job.items() if k != "_id"}
+
+
+async def get_announcement_job(job_id: str, user_id: str):
+    job = await db.announcement_jobs.find_one({"id": job_id, "sender_id": user_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    return job
+
+
+def _start(job_id: str):
+    task = asyncio.create_task(_run_job(job_id))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+
+async def resume_stale_jobs() -> dict:
+    """Pick up jobs left unfinished by a worker that stopped (at startup, then as a scheduled job)"""
+    now = datetime.now(timezone.utc)
+    resumed = 0
+    while True:
+        # Claiming by bumping the heartbeat means only one worker resumes each job
+        job = await db.announcement_jobs.find_one_and_update(
+            {"status": {"$in": ["queued", "running"]}, "heartbeat_at": {"$lt": now - JOB_STALE_AFTER}},
+            {"$set": {"heartbeat_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not job:
+            return {"resumed": resumed}
+        logger.info(f"Resuming announcement job {job['id']} after {job['sent']}/{job['total']} recipients")
+        _start(job["id"])
+        resumed += 1
+
+
+async def _recipients(sender_id: str) -> List[str]:
+    docs = await db.connections.find(
+        {"$or": [{"sender_id": sender_id}, {"receiver_id": sender_id}], "status": "accepted"},
+        {"_id": 0, "sender_id": 1, "receiver_id": 1}
+    ).to_list(None)
+    # Sorted, so the job's cursor (last recipient done) survives a restart
+    return sorted({d["receiver_id"] if d["sender_id"] == sender_id else d["sender_id"] for d in docs})
+
+
+async def _run_job(job_id: str):
+    job = await db.announcement_jobs.find_one({"id": job_id})
+    if not job or job["status"] in ("completed", "failed"):
+        return
+    try:
+        recipients = await _recipients(job["sender_id"])
+        await db.announcement_jobs.update_one({"id": job_id}, {"$set": {
+            "status": "running", "total": len(recipients), "updated_at": datetime.now(timezone.utc)
+        }})
+        pending = [r for r in recipients if r > job["cursor"]]
+        sent = len(recipients) - len(pending)
+        for start in range(0, len(pending), ANNOUNCEMENT_BATCH_SIZE):
+            chunk = pending[start:start + ANNOUNCEMENT_BATCH_SIZE]
+            await _deliver_chunk(job, chunk)
+            sent += len(chunk)
+            now = datetime.now(timezone.utc)
+            await db.announcement_jobs.update_one({"id": job_id}, {"$set": {
+                "sent": sent, "cursor": chunk[-1], "updated_at": now, "heartbeat_at": now
+            }})
+
+        now = datetime.now(timezone.utc)
+        await db.announcement_jobs.update_one({"id": job_id}, {"$set": {
+            "status": "completed", "sent": sent, "updated_at": now, "finished_at": now
+        }})
+        await record_change([job["sender_id"]], "announcement", {"id": job_id, "status": "completed", "sent": sent})
+        logger.info(f"Announcement {job_id} delivered to {sent} connections")
+    except Exception as e:
+        logger.error(f"Announcement job {job_id} failed: {str(e)}")
+        await db.announcement_jobs.update_one({"id": job_id}, {"$set": {
+            "status": "failed", "error": str(e), "updated_at": datetime.now(timezone.utc)
+        }})
+
+
+def _message_id(job: dict, recipient_id: str) -> ObjectId:
+    """
+    The same ObjectId every time a job delivers to a recipient: the job's creation
+    second (so ids still sort by time) followed by a hash of (job, recipient).
+    """
+    seconds = int(job["created_at"].replace(tzinfo=timezone.utc).timestamp())
+    digest = hashlib.sha1(f"{job['id']}:{recipient_id}".encode()).digest()
+    return ObjectId(seconds.to_bytes(4, "big") + digest[:8])
+
+
+async def _bulk_apply(collection, ops: List[UpdateOne]):
+    """Run guarded upserts; a duplicate key means the guard matched nothing because the op already applied"""
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+
+async def _deliver_chunk(job: dict, recipients: List[str]):
+    """
+    Write one chunk of announcement messages and their conversation state in bulk.
+    Message ids are derived from (job, recipient), so resending a chunk after a
+    crash reuses the messages already written, and the unread increments are
+    guarded by those ids, so each recipient is counted exactly once.
+    """
+    sender_id, content = job["sender_id"], job["content"]
+    created_at = datetime.now(timezone.utc)
+    created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+
+    docs = [
+        compact_message(sender_id, recipient_id, content, created_at, _message_id(job, recipient_id))
+        for recipient_id in recipients
+    ]
+    try:
+        await db.messages.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        # Written by an earlier attempt; its follow-up writes may not have been, so keep those recipients
+        existing = {
+            doc["_id"]: doc
+            async for doc in db.messages.find({"_id": {"$in": [docs[error["index"]]["_id"] for error in errors]}})
+        }
+        docs = [existing.get(doc["_id"], doc) for doc in docs]
+        logger.info(f"Announcement {job['id']}: {len(existing)} recipients in this chunk already had the message")
+
+    conversation_ops, counter_ops = [], []
+    for doc in docs:
+        recipient_id, message_id = doc["r"], doc["_id"]
+        last = {"last_message": content, "last_message_time": format_message_time(doc["t"]), "last_sender_id": sender_id}
+        conversation_ops.append(UpdateOne(
+            {"user_id": sender_id, "peer_id": recipient_id},
+            {"$set": last, "$setOnInsert": {"unread_count": 0, "last_read_at": None}},
+            upsert=True
+        ))
+        conversation_ops.append(UpdateOne(
+            {"user_id": recipient_id, "peer_id": sender_id, "announcement_ids": {"$ne": message_id}},
+            {
+                "$set": last,
+                "$inc": {"unread_count": 1},
+                "$push": {"announcement_ids": {"$each": [message_id], "$slice": -ANNOUNCEMENT_IDS_KEPT}},
+                "$setOnInsert": {"last_read_at": None}
+            },
+            upsert=True
+        ))
+        counter_ops.append(UpdateOne(
+            {"user_id": recipient_id, "announcement_ids": {"$ne": message_id}},
+            {
+                "$inc": {"total": 1},
+                "$push": {"announcement_ids": {"$each": [message_id], "$slice": -ANNOUNCEMENT_IDS_KEPT}}
+            },
+            upsert=True
+        ))
+    await _bulk_apply(db.conversations, conversation_ops)
+    await _bulk_apply(db.unread_counters, counter_ops)
+
+    # Read back the counts each recipient's badge should show
+    counts = {
+        c["user_id"]: c.get("unread_count", 0)
+        async for c in db.conversations.find(
+            {"user_id": {"$in": recipients}, "peer_id": sender_id}, {"_id": 0, "user_id": 1, "unread_count": 1}
+        )
+    }
+    totals = {
+        c["user_id"]: c.get("total", 0)
+        async for c in db.unread_counters.find({"user_id": {"$in": recipients}}, {"_id": 0, "user_id": 1, "total": 1})
+    }
+
+    names = {sender_id: job["sender_name"]}
+    messages, unread = {}, {}
+    for doc in docs:
+        message = expand_message(doc, names)
+        message["is_read"] = False
+        messages[doc["r"]] = {"type": "new_message", "message": message}
+        unread[doc["r"]] = {"type": "unread", "user_id": sender_id, "count": counts.get(doc["r"], 0), "total": totals.get(doc["r"], 0)}
+
+    await record_changes(
+        [(r, "new_message", messages[r]["message"]) for r in recipients]
+        + [(r, "unread", {k: v for k, v in unread[r].items() if k != "type"}) for r in recipients]
+    )
+    try:
+        await manager.broadcast_to_users(messages)
+        await manager.broadcast_to_users(unread)
+    except Exception as e:
+        logger.error(f"Failed to broadcast announcement chunk: {str(e)}")
@@ -2,11 +2,17 @@ import uuid
 import secrets
 from datetime import datetime, timezone, timedelta
 from fastapi import HTTPException
+from app.core.config import logger
 from app.core.database import db
+from app.core.geo import location_fields
 from app.core.security import hash_password, verify_password, create_token
 from app.models.user import UserCreate, UserLogin
 from .email_service import send_reset_password_email, send_verification_email
 
+RESET_TOKEN_TTL = timedelta(hours=1)
+# Reset requests within this long of the last one resend (and dedupe to) the same token
+RESET_TOKEN_REUSE = timedelta(minutes=15)
+
 async def register_user(user_data: UserCreate):
     # Check if email exists
     existing = await db.users.find_one({"email": user_data.email})
@@ -28,7 +34,8 @@ async def register_user(user_data: UserCreate):
         "location": user_data.location,
         "avatar_url": None,
         "created_at": now,
-        "is_verified": False
+        "is_verified": False,
+        **location_fields(user_data.location)
     }
     
     await db.users.insert_one(user_doc)
@@ -36,8 +43,11 @@ async def register_user(user_data: UserCreate):
     # Generate verification token (24h)
     verify_token = create_token(user_id, expires_delta=timedelta(hours=24), additional_data={"type": "verification"})
     
-    # Send verification email
-    await send_verification_email(user_data.email, verify_token)
+    # Queue verification email (delivered in the background); the account exists either way
+    try:
+        await send_verification_email(user_data.email, verify_token)
+    except Exception as e:
+        logger.error(f"Failed to queue verification email for {user_data.email}: {str(e)}")
     
     return {
         "message": "Registration successful! Please check your email to verify your account.",
@@ -116,19 +126,25 @@ async def request_password_reset(email: str):
         # For security, don't reveal if email exists, but we'll return a success message anyway
         return {"message": "If an account exists with this email, a reset link will be sent."}
     
-    reset_token = secrets.token_urlsafe(32)
-    expires = datetime.now(timezone.utc) + timedelta(hours=1)
-    
-    await db.users.update_one(
-        {"id": user["id"]},
-        {"$set": {
-            "reset_token": reset_token,
-            "reset_token_expires": expires.isoformat()
-        }}
-    )
+    now = datetime.now(timezone.utc)
+    reset_token, expires_at = user.get("reset_token"), user.get("reset_token_expires")
+    # A token issued moments ago is sent again rather than replaced, so the outbox can dedupe the email
+    if not reset_token or not expires_at or expires_at <= (now + RESET_TOKEN_TTL - RESET_TOKEN_REUSE).isoformat():
+        reset_token = secrets.token_urlsafe(32)
+        expires_at = (now + RESET_TOKEN_TTL).isoformat()
+        await db.users.update_one(
+            {"id": user["id"]},
+            {"$set": {
+                "reset_token": reset_token,
+                "reset_token_expires": expires_at
+            }}
+        )
     
-    # Send real email via Resend
-    await send_reset_password_email(email, reset_token)
+    # Queued in the outbox, delivered in the background
+    try:
+        await send_reset_password_email(email, reset_token, user["id"], expires_at)
+    except Exception as e:
+        logger.error(f"Failed to queue password reset email for {email}: {str(e)}")
     
     return {"message": "If an account exists, a reset link has been sent to your email."}
 
@@ -0,0 +1,71 @@
+from typing import Set
+from app.core.cache import TTLCache
+from app.core.config import CONNECTION_CACHE_MAX_USERS, CONNECTION_CACHE_TTL_SECONDS
+from app.core.database import db
+from app.core.websocket import manager
+
+
+class ConnectionGraphCache:
+    """
+    Per-worker adjacency sets of accepted connections, loaded lazily per user.
+    Kept current through "ctl.connections" bus events so every worker sees
+    accepts/removals made elsewhere; the TTL only bounds staleness if the bus
+    drops an event.
+    """
+
+    def __init__(self, max_users: int = CONNECTION_CACHE_MAX_USERS, ttl: float = CONNECTION_CACHE_TTL_SECONDS):
+        self._adjacency = TTLCache(max_users, ttl)
+        # Bumped on every change so loads that raced with one are not cached
+        self._generation = 0
+
+    async def neighbors(self, user_id: str) -> Set[str]:
+        cached = self._adjacency.get(user_id)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        docs = await db.connections.find(
+            {"$or": [{"sender_id": user_id}, {"receiver_id": user_id}], "status": "accepted"},
+            {"_id": 0, "sender_id": 1, "receiver_id": 1}
+        ).to_list(None)
+        neighbors = {d["receiver_id"] if d["sender_id"] == user_id else d["sender_id"] for d in docs}
+        if generation == self._generation:
+            self._adjacency.set(user_id, neighbors)
+        return neighbors
+
+    async def are_connected(self, user_a: str, user_b: str) -> bool:
+        # Answer from whichever side is already cached before touching the database
+        for user_id, other in ((user_a, user_b), (user_b, user_a)):
+            cached = self._adjacency.get(user_id)
+            if cached is not None:
+                return other in cached
+        return user_b in await self.neighbors(user_a)
+
+    def apply(self, user_a: str, user_b: str, status: str):
+        """Update cached adjacency for a connection whose status changed"""
+        self._generation += 1
+        for user_id, other in ((user_a, user_b), (user_b, user_a)):
+            neighbors = self._adjacency.peek(user_id)
+            if neighbors is None:
+                continue
+            if status == "accepted":
+                neighbors.add(other)
+            else:
+                neighbors.discard(other)
+
+    async def on_change(self, payload: dict):
+        self.apply(payload["sender_id"], payload["receiver_id"], payload["status"])
+
+
+async def publish_connection_change(sender_id: str, receiver_id: str, status: str):
+    """Tell every worker's caches that a connection changed status"""
+    await manager.publish_control("connections", {
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "status": status
+    })
+
+
+# Global cache instance
+connection_cache = ConnectionGraphCache()
+manager.subscribe("connections", connection_cache.on_change)
@@ -1,29 +1,40 @@
 from typing import List, Optional
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 from app.core.database import db
-from app.models.connection import Connection
+from app.models.connection import Connection, pair_key
+from app.services.connection_cache import publish_connection_change
+from app.services.sync_service import record_change
+from app.services.notification_service import notify
 import uuid
 
 async def create_connection_request(sender_id: str, receiver_id: str):
-    # Check if a connection or request already exists
-    existing = await db.connections.find_one({
-        "$or": [
-            {"sender_id": sender_id, "receiver_id": receiver_id},
-            {"sender_id": receiver_id, "receiver_id": sender_id}
-        ]
-    })
-    
-    if existing:
-        return existing, "Already exists"
-    
+    key = pair_key(sender_id, receiver_id)
     new_connection = Connection(
         sender_id=sender_id,
         receiver_id=receiver_id,
+        pair_key=key,
         status="pending"
     )
-    
     connection_dict = new_connection.model_dump()
-    await db.connections.insert_one(connection_dict)
+    
+    # Single atomic upsert on the unique pair key: concurrent requests from both
+    # sides can't both insert, whichever direction they come from
+    try:
+        result = await db.connections.update_one(
+            {"pair_key": key},
+            {"$setOnInsert": {k: v for k, v in connection_dict.items() if k != "pair_key"}},
+            upsert=True
+        )
+        created = result.upserted_id is not None
+    except DuplicateKeyError:
+        created = False
+    
+    if not created:
+        existing = await db.connections.find_one({"pair_key": key}, {"_id": 0})
+        return existing, "Already exists"
+    
+    await publish_connection_change(sender_id, receiver_id, "pending")
     
     # Enrich with names for the response
     sender = await db.users.find_one({"id": sender_id}, {"name": 1})
@@ -32,7 +43,12 @@ async def create_connection_request(sender_id: str, receiver_id: str):
         connection_dict["sender_name"] = sender.get("name")
     if receiver:
         connection_dict["receiver_name"] = receiver.get("name")
-        
+    
+    await record_change([sender_id, receiver_id], "connection", connection_dict)
+    await notify(
+        receiver_id, "connection_request", receiver_id, sender_id, connection_dict.get("sender_name"),
+        {"connection_id": connection_dict["id"]}
+    )
     return connection_dict, "Created"
 
 async def respond_to_connection_request(request_id: str, user_id: str, action: str):
@@ -49,12 +65,19 @@ async def respond_to_connection_request(request_id: str, user_id: str, action: s
         
     connection = await db.connections.find_one({"id": request_id}, {"_id": 0})
     if connection:
+        await publish_connection_change(connection["sender_id"], connection["receiver_id"], status)
         sender = await db.users.find_one({"id": connection["sender_id"]}, {"name": 1})
         receiver = await db.users.find_one({"id": connection["receiver_id"]}, {"name": 1})
         if sender:
             connection["sender_name"] = sender.get("name")
         if receiver:
             connection["receiver_name"] = receiver.get("name")
+        await record_change([connection["sender_id"], connection["receiver_id"]], "connection", connection)
+        if status == "accepted":
+            await notify(
+                connection["sender_id"], "connection_accepted", connection["sender_id"], user_id,
+                connection.get("receiver_name"), {"connection_id": request_id}
+            )
             
     return connection
 
@@ -93,12 +116,7 @@ async def get_connections(user_id: str):
     return connections
 
 async def get_connection_status(user_id1: str, user_id2: str):
-    connection = await db.connections.find_one({
-        "$or": [
-            {"sender_id": user_id1, "receiver_id": user_id2},
-            {"sender_id": user_id2, "receiver_id": user_id1}
-        ]
-    }, {"_id": 0})
+    connection = await db.connections.find_one({"pair_key": pair_key(user_id1, user_id2)}, {"_id": 0})
     
     if connection:
         sender = await db.users.find_one({"id": connection["sender_id"]}, {"name": 1})
@@ -0,0 +1,183 @@
+import random
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.core.config import (
+    logger, EMAIL_WORKERS, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_SECONDS, EMAIL_RATE_PER_SECOND, EMAIL_POLL_SECONDS
+)
+from app.core.database import db
+from app.core.mail import MailBackend, create_mail_backend
+
+# A claimed email not finished within this long (worker died mid-send) is claimed again
+SEND_LEASE = timedelta(seconds=60)
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class RateLimiter:
+    """Token bucket shared by this process's outbox workers"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class EmailOutbox:
+    """
+    Persistent email queue. Requests only insert into email_outbox; a pool of
+    workers per process claims due emails, sends them through the configured
+    backend and retries failures with exponential backoff.
+    """
+
+    def __init__(self, workers: int = EMAIL_WORKERS):
+        self.workers = workers
+        self.backend: Optional[MailBackend] = None
+        self.limiter = RateLimiter(EMAIL_RATE_PER_SECOND)
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def enqueue_many(self, emails: List[dict]) -> int:
+        """Queue several emails ({to, subject, html, text, dedupe_key}) with one insert; returns how many were new"""
+        if not emails:
+            return 0
+        docs = [self._document(**email) for email in emails]
+        try:
+            result = await db.email_outbox.insert_many(docs, ordered=False)
+            queued = len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Duplicates (already queued dedupe keys) are skipped, the rest are inserted
+            queued = e.details.get("nInserted", 0)
+        if queued:
+            self._wakeup.set()
+        return queued
+
+    async def enqueue(self, to: str, subject: str, html: str, text: Optional[str] = None,
+                      dedupe_key: Optional[str] = None) -> bool:
+        """Queue an email; False when one with the same dedupe_key was already queued"""
+        doc = self._document(to, subject, html, text, dedupe_key)
+        try:
+            await db.email_outbox.insert_one(doc)
+        except DuplicateKeyError:
+            logger.info(f"Email '{dedupe_key}' already queued, skipping")
+            return False
+        self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _document(to: str, subject: str, html: str, text: Optional[str] = None,
+                  dedupe_key: Optional[str] = None) -> dict:
+        now = datetime.now(timezone.utc)
+        doc = {
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "text": text,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "sent_at": None
+        }
+        if dedupe_key:
+            doc["dedupe_key"] = dedupe_key
+        return doc
+
+    def start(self):
+        if self._tasks:
+            return
+        self.backend = create_mail_backend()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await db.email_outbox.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}}
+            ]},
+            {"$set": {"status": "sending", "locked_until": now + SEND_LEASE}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                email = await self._claim()
+                if email is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), EMAIL_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.limiter.acquire()
+                await self._send(email)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email worker {index} error: {str(e)}")
+                await asyncio.sleep(EMAIL_POLL_SECONDS)
+
+    async def _send(self, email: dict):
+        try:
+            provider_id = await self.backend.send(email["to"], email["subject"], email["html"], email.get("text"))
+        except Exception as e:
+            attempts = email["attempts"]
+            if attempts >= EMAIL_MAX_ATTEMPTS:
+                logger.error(f"Giving up on email to {email['to']} after {attempts} attempts: {str(e)}")
+                update = {"status": "failed", "last_error": str(e), "locked_until": None}
+            else:
+                # Exponential backoff with jitter so a provider outage doesn't retry in lockstep
+                delay = min(MAX_RETRY_DELAY_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+                delay *= random.uniform(0.8, 1.2)
+                logger.warning(f"Email to {email['to']} failed (attempt {attempts}), retrying in {delay:.0f}s: {str(e)}")
+                update = {
+                    "status": "pending",
+                    "last_error": str(e),
+                    "locked_until": None,
+                    "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)
+                }
+            await db.email_outbox.update_one({"_id": email["_id"]}, {"$set": update})
+            return
+
+        await db.email_outbox.update_one({"_id": email["_id"]}, {"$set": {
+            "status": "sent",
+            "sent_at": datetime.now(timezone.utc),
+            "provider_id": provider_id,
+            "locked_until": None,
+            # Bodies aren't needed once delivered (and may hold one-time links)
+            "html": None,
+            "text": None
+        }})
+        logger.info(f"Email '{email['subject']}' sent to {email['to']}")
+
+
+# Global outbox instance
+email_outbox = EmailOutbox()
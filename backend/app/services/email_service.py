@@ -1,113 +1,43 @@
 import os
-from app.core.config import logger
-MAIL_FROM = os.environ.get("MAIL_FROM", "onboarding@resend.dev")
+from typing import Dict, Iterable, Optional, Tuple
+from app.services.email_outbox import email_outbox
+from app.services.email_templates import DEFAULT_LOCALE, email_templates
 
-async def send_reset_password_email(email: str, token: str):
+def frontend_url() -> str:
+    return os.environ.get('FRONTEND_URL', 'http://localhost:3000').rstrip('/')
+
+async def send_templated_email(email: str, template: str, context: Dict[str, object],
+                               locale: str = DEFAULT_LOCALE, dedupe_key: Optional[str] = None):
     """
-    Sends a password reset email using Resend API.
+    Renders a registered template and queues it; the outbox workers deliver it.
     """
-    try:
-        import resend
-        resend.api_key = os.environ.get("RESEND_API_KEY")
-    except ImportError:
-        logger.warning(f"Resend module not found. Falling back to mock for {email}")
-        resend = None
+    rendered = email_templates.render(template, context, locale)
+    return await email_outbox.enqueue(email, rendered.subject, rendered.html, text=rendered.text, dedupe_key=dedupe_key)
 
-    # The frontend URL for password reset
-    frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000').rstrip('/')
-    reset_link = f"{frontend_url}/reset-password?token={token}"
-    
-    html_content = f"""
-    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background-color: #ffffff;">
-        <h2 style="color: #333333; text-align: center;">Reset Your Password</h2>
-        <p style="color: #555555; font-size: 16px; line-height: 1.5;">
-            You requested to reset your password for your <strong>MyEnAb</strong> account. Click the button below to set a new password:
-        </p>
-        <div style="text-align: center; margin: 30px 0;">
-            <a href="{reset_link}" style="background-color: #000000; color: #ffffff; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block;">Reset Password</a>
-        </div>
-        <p style="color: #777777; font-size: 14px; line-height: 1.5;">
-            If the button doesn't work, you can copy and paste this link into your browser:
-            <br>
-            <a href="{reset_link}" style="color: #007bff;">{reset_link}</a>
-        </p>
-        <hr style="border: 0; border-top: 1px solid #eeeeee; margin: 30px 0;">
-        <p style="color: #999999; font-size: 12px; text-align: center;">
-            If you didn't request this, you can safely ignore this email. This link will expire in 1 hour.
-        </p>
-    </div>
+async def send_templated_emails(template: str, recipients: Iterable[Tuple[str, str, Dict[str, object], Optional[str]]]):
     """
+    Bulk form for (email, locale, context, dedupe_key) recipients, rendered and queued in one batch.
+    """
+    recipients = list(recipients)
+    rendered = email_templates.render_many(template, ((locale, context) for _, locale, context, _ in recipients))
+    return await email_outbox.enqueue_many([
+        {"to": email, "subject": r.subject, "html": r.html, "text": r.text, "dedupe_key": dedupe_key}
+        for (email, _, _, dedupe_key), r in zip(recipients, rendered)
+    ])
 
-    try:
-        if not resend or not os.environ.get("RESEND_API_KEY") or "your_api_key_here" in os.environ.get("RESEND_API_KEY"):
-            logger.warning(f"RESEND_API_KEY not set or resend module missing. Logging email token for {email}: {token}")
-            print(f"\n[MOCK EMAIL] To: {email}\n[MOCK EMAIL] Link: {reset_link}\n")
-            return
-            
-        params = {
-            "from": MAIL_FROM,
-            "to": [email],
-            "subject": "Reset your password - MyEnAb",
-            "html": html_content,
-        }
-
-        response = resend.Emails.send(params)
-        logger.info(f"Email sent successfully to {email}. ID: {response.get('id')}")
-        return response
-    except Exception as e:
-        logger.error(f"Failed to send email to {email}: {str(e)}")
-        # Don't raise error to avoid exposing email issues to end users
-        # But log it for troubleshooting
-async def send_verification_email(email: str, token: str):
+async def send_reset_password_email(email: str, token: str, user_id: str, expires_at: str, locale: str = DEFAULT_LOCALE):
     """
-    Sends a verification email with a 24-hour link.
+    Queues a password reset email (link valid for 1 hour). Repeated requests
+    reuse the same token for a while, and queue one email per user and token.
     """
-    try:
-        import resend
-        resend.api_key = os.environ.get("RESEND_API_KEY")
-    except ImportError:
-        logger.warning(f"Resend module not found. Falling back to mock for {email}")
-        resend = None
+    link = f"{frontend_url()}/reset-password?token={token}"
+    return await send_templated_email(
+        email, "reset_password", {"link": link}, locale, dedupe_key=f"reset:{user_id}:{expires_at}"
+    )
 
-    frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000').rstrip('/')
-    verify_link = f"{frontend_url}/verify-email?token={token}"
-    
-    html_content = f"""
-    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background-color: #ffffff;">
-        <h2 style="color: #333333; text-align: center;">Verify Your Account</h2>
-        <p style="color: #555555; font-size: 16px; line-height: 1.5;">
-            Welcome to <strong>MyEnAb</strong>! Please verify your email address to complete your registration. This link will expire in 24 hours.
-        </p>
-        <div style="text-align: center; margin: 30px 0;">
-            <a href="{verify_link}" style="background-color: #000000; color: #ffffff; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block;">Verify Email</a>
-        </div>
-        <p style="color: #777777; font-size: 14px; line-height: 1.5;">
-            If the button doesn't work, you can copy and paste this link into your browser:
-            <br>
-            <a href="{verify_link}" style="color: #007bff;">{verify_link}</a>
-        </p>
-        <hr style="border: 0; border-top: 1px solid #eeeeee; margin: 30px 0;">
-        <p style="color: #999999; font-size: 12px; text-align: center;">
-            Building a world where barriers disappear and every ability flourishes.
-        </p>
-    </div>
+async def send_verification_email(email: str, token: str, locale: str = DEFAULT_LOCALE):
     """
-
-    try:
-        if not resend or not os.environ.get("RESEND_API_KEY") or "your_api_key_here" in os.environ.get("RESEND_API_KEY"):
-            logger.warning(f"RESEND_API_KEY not set. Logging verification link for {email}: {verify_link}")
-            print(f"\n[MOCK EMAIL] To: {email}\n[MOCK EMAIL] Link: {verify_link}\n")
-            return
-            
-        params = {
-            "from": MAIL_FROM,
-            "to": [email],
-            "subject": "Verify your email - MyEnAb",
-            "html": html_content,
-        }
-
-        response = resend.Emails.send(params)
-        logger.info(f"Verification email sent to {email}")
-        return response
-    except Exception as e:
-        logger.error(f"Failed to send verification email to {email}: {str(e)}")
+    Queues a verification email with a 24-hour link.
+    """
+    link = f"{frontend_url()}/verify-email?token={token}"
+    return await send_templated_email(email, "verify_email", {"link": link}, locale, dedupe_key=f"verify:{token}")
@@ -0,0 +1,234 @@
+import re
+from html import escape
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_LOCALE = "en"
+
+# {name} placeholders are HTML-escaped when rendered; names ending in _html are inserted as-is
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class CompiledTemplate:
+    """A template split once into static chunks and placeholder names"""
+
+    def __init__(self, source: str, escape_values: bool = True):
+        pieces = PLACEHOLDER.split(source)
+        # split() alternates static text and captured names: s0, n0, s1, n1, ..., sN
+        self.statics: Tuple[str, ...] = tuple(pieces[0::2])
+        self.names: Tuple[str, ...] = tuple(pieces[1::2])
+        self._slots = tuple(zip(
+            self.names, (escape_values and not n.endswith("_html") for n in self.names), self.statics[1:]
+        ))
+
+    def render(self, context: Dict[str, object]) -> str:
+        out = [self.statics[0]]
+        # The same value (e.g. a link used three times) is escaped once
+        values: Dict[str, str] = {}
+        for name, escaped, static in self._slots:
+            value = values.get(name)
+            if value is None:
+                value = str(context[name])
+                value = values[name] = escape(value) if escaped else value
+            out.append(value)
+            out.append(static)
+        return "".join(out)
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplate:
+    def __init__(self, name: str, locale: str, subject: str, html: str, text: str,
+                 item_html: Optional[str] = None, item_text: Optional[str] = None):
+        self.name = name
+        self.locale = locale
+        # Subjects and text bodies are plain text, nothing to escape
+        self.subject = CompiledTemplate(subject, escape_values=False)
+        self.html = CompiledTemplate(html)
+        self.text = CompiledTemplate(text, escape_values=False)
+        # List templates (e.g. the digest) render each entry with these into items_html/items_text
+        self.item_html = CompiledTemplate(item_html) if item_html else None
+        self.item_text = CompiledTemplate(item_text, escape_values=False) if item_text else None
+
+    def render(self, context: Dict[str, object]) -> RenderedEmail:
+        return RenderedEmail(self.subject.render(context), self.html.render(context), self.text.render(context))
+
+    def render_items(self, items: Iterable[Dict[str, object]]) -> Dict[str, str]:
+        items = list(items)
+        return {
+            "items_html": "".join(self.item_html.render(item) for item in items),
+            "items_text": "\n".join(self.item_text.render(item) for item in items)
+        }
+
+
+def _layout(heading: str, intro: str, button: str, fallback: str, footer: str) -> str:
+    """Shared card layout; {link} is filled in at render time"""
+    return f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background-color: #ffffff;">
+        <h2 style="color: #333333; text-align: center;">{heading}</h2>
+        <p style="color: #555555; font-size: 16px; line-height: 1.5;">
+            {intro}
+        </p>
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{{link}}" style="background-color: #000000; color: #ffffff; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block;">{button}</a>
+        </div>
+        <p style="color: #777777; font-size: 14px; line-height: 1.5;">
+            {fallback}
+            <br>
+            <a href="{{link}}" style="color: #007bff;">{{link}}</a>
+        </p>
+        <hr style="border: 0; border-top: 1px solid #eeeeee; margin: 30px 0;">
+        <p style="color: #999999; font-size: 12px; text-align: center;">
+            {footer}
+        </p>
+    </div>
+    """
+
+
+TAGLINE = {
+    "en": "Building a world where barriers disappear and every ability flourishes.",
+    "es": "Construyendo un mundo donde las barreras desaparecen y cada capacidad florece.",
+}
+FALLBACK = {
+    "en": "If the button doesn't work, you can copy and paste this link into your browser:",
+    "es": "Si el botón no funciona, copia y pega este enlace en tu navegador:",
+}
+
+# name -> locale -> parts of the layout plus subject and plain-text body
+TEMPLATES = {
+    "reset_password": {
+        "en": {
+            "subject": "Reset your password - MyEnAb",
+            "heading": "Reset Your Password",
+            "intro": "You requested to reset your password for your <strong>MyEnAb</strong> account. Click the button below to set a new password:",
+            "button": "Reset Password",
+            "footer": "If you didn't request this, you can safely ignore this email. This link will expire in 1 hour.",
+            "text": "Reset your MyEnAb password: {link}",
+        },
+        "es": {
+            "subject": "Restablece tu contraseña - MyEnAb",
+            "heading": "Restablece tu contraseña",
+            "intro": "Solicitaste restablecer la contraseña de tu cuenta de <strong>MyEnAb</strong>. Haz clic en el botón para elegir una nueva:",
+            "button": "Restablecer contraseña",
+            "footer": "Si no lo solicitaste, puedes ignorar este correo. El enlace caduca en 1 hora.",
+            "text": "Restablece tu contraseña de MyEnAb: {link}",
+        },
+    },
+    "verify_email": {
+        "en": {
+            "subject": "Verify your email - MyEnAb",
+            "heading": "Verify Your Account",
+            "intro": "Welcome to <strong>MyEnAb</strong>! Please verify your email address to complete your registration. This link will expire in 24 hours.",
+            "button": "Verify Email",
+            "footer": TAGLINE["en"],
+            "text": "Verify your MyEnAb email address: {link}",
+        },
+        "es": {
+            "subject": "Verifica tu correo - MyEnAb",
+            "heading": "Verifica tu cuenta",
+            "intro": "¡Bienvenido a <strong>MyEnAb</strong>! Verifica tu correo electrónico para completar el registro. El enlace caduca en 24 horas.",
+            "button": "Verificar correo",
+            "footer": TAGLINE["es"],
+            "text": "Verifica tu correo de MyEnAb: {link}",
+        },
+    },
+    "event_reminder": {
+        "en": {
+            "subject": "Reminder: {event_title} - MyEnAb",
+            "heading": "Your Event Is Coming Up",
+            "intro": "<strong>{event_title}</strong> starts on {starts_at} ({location}).",
+            "button": "View Event",
+            "footer": TAGLINE["en"],
+            "text": "Reminder: {event_title} starts on {starts_at} ({location}). Details: {link}",
+        },
+        "es": {
+            "subject": "Recordatorio: {event_title} - MyEnAb",
+            "heading": "Tu evento se acerca",
+            "intro": "<strong>{event_title}</strong> empieza el {starts_at} ({location}).",
+            "button": "Ver evento",
+            "footer": TAGLINE["es"],
+            "text": "Recordatorio: {event_title} empieza el {starts_at} ({location}). Detalles: {link}",
+        },
+    },
+    "digest": {
+        "en": {
+            "subject": "Your weekly MyEnAb digest",
+            "heading": "This Week in the Community",
+            "intro": "Here are the most active discussions from the past week:</p><ul style=\"color: #555555; font-size: 15px; line-height: 1.6;\">{items_html}</ul><p>",
+            "button": "Open the Forums",
+            "footer": TAGLINE["en"],
+            "text": "This week on MyEnAb:\n{items_text}\n\nOpen the forums: {link}",
+            "item_html": '<li><a href="{url}" style="color: #007bff;">{title}</a> ({comments} comments)</li>',
+            "item_text": "- {title} ({comments} comments): {url}",
+        },
+        "es": {
+            "subject": "Tu resumen semanal de MyEnAb",
+            "heading": "Esta semana en la comunidad",
+            "intro": "Estas son las conversaciones más activas de la última semana:</p><ul style=\"color: #555555; font-size: 15px; line-height: 1.6;\">{items_html}</ul><p>",
+            "button": "Abrir los foros",
+            "footer": TAGLINE["es"],
+            "text": "Esta semana en MyEnAb:\n{items_text}\n\nAbrir los foros: {link}",
+            "item_html": '<li><a href="{url}" style="color: #007bff;">{title}</a> ({comments} comentarios)</li>',
+            "item_text": "- {title} ({comments} comentarios): {url}",
+        },
+    },
+}
+
+class TemplateRegistry:
+    """Every (template, locale) compiled once at import; rendering only joins chunks"""
+
+    def __init__(self, templates: Dict[str, Dict[str, dict]]):
+        self._compiled: Dict[Tuple[str, str], EmailTemplate] = {}
+        # (name, requested locale) -> template after fallback
+        self._resolved: Dict[Tuple[str, str], EmailTemplate] = {}
+        for name, locales in templates.items():
+            for locale, parts in locales.items():
+                html = _layout(parts["heading"], parts["intro"], parts["button"], FALLBACK[locale], parts["footer"])
+                self._compiled[(name, locale)] = EmailTemplate(
+                    name, locale, parts["subject"], html, parts["text"], parts.get("item_html"), parts.get("item_text")
+                )
+
+    def get(self, name: str, locale: str = DEFAULT_LOCALE) -> EmailTemplate:
+        """Exact locale, then its language ("es-MX" -> "es"), then DEFAULT_LOCALE"""
+        template = self._resolved.get((name, locale))
+        if template is not None:
+            return template
+        normalized = (locale or DEFAULT_LOCALE).replace("_", "-")
+        for candidate in (normalized, normalized.split("-")[0].lower(), DEFAULT_LOCALE):
+            template = self._compiled.get((name, candidate))
+            if template:
+                self._resolved[(name, locale)] = template
+                return template
+        raise KeyError(f"Unknown email template '{name}'")
+
+    def render(self, name: str, context: Dict[str, object], locale: str = DEFAULT_LOCALE) -> RenderedEmail:
+        return self.get(name, locale).render(context)
+
+    def render_many(self, name: str, contexts: Iterable[Tuple[str, Dict[str, object]]]) -> List[RenderedEmail]:
+        """Bulk sends: (locale, context) pairs, resolving each locale's template once"""
+        resolved: Dict[str, EmailTemplate] = {}
+        results = []
+        for locale, context in contexts:
+            template = resolved.get(locale)
+            if template is None:
+                template = resolved[locale] = self.get(name, locale)
+            results.append(template.render(context))
+        return results
+
+    def locales(self, name: str) -> List[str]:
+        return sorted(locale for n, locale in self._compiled if n == name)
+
+
+def digest_items(posts: Iterable[dict], frontend_url: str, locale: str = DEFAULT_LOCALE) -> Dict[str, str]:
+    """items_html/items_text context for the digest template, in the reader's locale"""
+    return email_templates.get("digest", locale).render_items(
+        {"url": f"{frontend_url}/forums/{post['id']}", "title": post["title"], "comments": post.get("comments_count", 0)}
+        for post in posts
+    )
+
+
+# Global registry, compiled at startup
+email_templates = TemplateRegistry(TEMPLATES)
@@ -3,7 +3,10 @@ from datetime import datetime, timezone
 from typing import List, Optional
 from fastapi import HTTPException
 from app.core.database import db
+from app.core.geo import location_fields
 from app.models.event import EventCreate
+from app.services.feed_service import fan_out
+from app.services.notification_service import notify
 
 async def create_event(event_data: EventCreate, current_user: dict):
     event_id = str(uuid.uuid4())
@@ -24,18 +27,21 @@ async def create_event(event_data: EventCreate, current_user: dict):
         "organizer_name": current_user["name"],
         "attendees": [],
         "attendees_count": 0,
-        "created_at": now
+        "created_at": now,
+        **location_fields(event_data.location)
     }
     
     await db.events.insert_one(event_doc)
-    return {k: v for k, v in event_doc.items() if k not in ["_id", "attendees"]}
+    await fan_out("event", event_id, now, current_user["id"], current_user.get("user_type"), event_data.event_type)
+    return {k: v for k, v in event_doc.items() if k not in ["_id", "attendees", "geo"]}
 
 async def get_events(
     event_type: Optional[str] = None,
     is_virtual: Optional[bool] = None,
     location: Optional[str] = None,
     upcoming: bool = True,
-    limit: int = 50
+    limit: int = 50,
+    geo: Optional[dict] = None
 ):
     query = {}
     if event_type:
@@ -44,6 +50,8 @@ async def get_events(
         query["is_virtual"] = is_virtual
     if location:
         query["location"] = {"$regex": location, "$options": "i"}
+    if geo:
+        query["geo"] = geo
     if upcoming:
         query["start_date"] = {"$gte": datetime.now(timezone.utc).isoformat()}
     
@@ -54,7 +62,7 @@ async def get_event_by_id(event_id: str):
     event = await db.events.find_one({"id": event_id}, {"_id": 0, "attendees": 0})
     return event
 
-async def attend_event(event_id: str, user_id: str):
+async def attend_event(event_id: str, user_id: str, user_name: Optional[str] = None):
     event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -73,4 +81,5 @@ async def attend_event(event_id: str, user_id: str):
             {"id": event_id},
             {"$push": {"attendees": user_id}, "$inc": {"attendees_count": 1}}
         )
+        await notify(event.get("organizer_id"), "event_rsvp", event_id, user_id, user_name, {"event_title": event.get("title")})
         return {"attending": True}
@@ -0,0 +1,116 @@
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import logger, FACET_CACHE_TTL_SECONDS
+from app.core.database import db
+from app.core.websocket import manager
+
+
+def facet_pipeline(query: dict, fields: Iterable[str], top: Optional[int] = None) -> List[dict]:
+    """One $facet aggregation counting every field (array fields per element) plus the total"""
+    facets = {"_total": [{"$count": "n"}]}
+    for field in fields:
+        # $unwind treats scalars as one-element arrays, so single-valued fields work too
+        stages = [
+            {"$unwind": f"${field}"},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ]
+        if top:
+            stages.append({"$limit": top})
+        facets[field] = stages
+    return [{"$match": query}, {"$facet": facets}]
+
+
+async def _aggregate(collection: str, query: dict, fields: Tuple[str, ...], top: Optional[int]) -> Tuple[int, Dict[str, Counter]]:
+    rows = await db[collection].aggregate(facet_pipeline(query, fields, top)).to_list(1)
+    row = rows[0] if rows else {}
+    total = row["_total"][0]["n"] if row.get("_total") else 0
+    counts = {
+        field: Counter({str(b["_id"]): b["count"] for b in row.get(field, []) if b["_id"] not in (None, "")})
+        for field in fields
+    }
+    return total, counts
+
+
+def _response(total: int, counts: Dict[str, Counter], top: int) -> dict:
+    return {
+        "total": total,
+        "facets": {
+            field: [{"value": value, "count": count} for value, count in sorted(
+                counter.items(), key=lambda item: (-item[1], item[0])
+            )[:top]]
+            for field, counter in counts.items()
+        }
+    }
+
+
+class FacetCounts:
+    """
+    Unfiltered facet counts of one collection for a per-worker filter sidebar.
+    Loaded with one $facet aggregation and incremented in place from
+    "ctl.facets" bus events published on create, so new documents show up on
+    every worker without recounting; the TTL reloads to pick up edits and deletes.
+    """
+
+    def __init__(self, collection: str, fields: Tuple[str, ...], ttl: float = FACET_CACHE_TTL_SECONDS):
+        self.collection = collection
+        self.fields = fields
+        self.ttl = ttl
+        self._total = 0
+        self._counts: Optional[Dict[str, Counter]] = None
+        self._expires_at = 0.0
+        # Bumped on every change so loads that raced with one are not cached
+        self._generation = 0
+
+    async def get(self, top: int) -> dict:
+        if self._counts is None or time.monotonic() >= self._expires_at:
+            generation = self._generation
+            total, counts = await _aggregate(self.collection, {}, self.fields, None)
+            if generation != self._generation:
+                return _response(total, counts, top)
+            self._total, self._counts = total, counts
+            self._expires_at = time.monotonic() + self.ttl
+            logger.info(f"Facet counts loaded for {self.collection}: {total} documents")
+        return _response(self._total, self._counts, top)
+
+    async def query(self, query: dict, top: int) -> dict:
+        """Counts for the documents matching query; the unfiltered case is served from memory"""
+        if not query:
+            return await self.get(top)
+        total, counts = await _aggregate(self.collection, query, self.fields, top)
+        return _response(total, counts, top)
+
+    def apply(self, values: Dict[str, List[str]]):
+        self._generation += 1
+        if self._counts is None:
+            return
+        self._total += 1
+        for field, field_values in values.items():
+            counter = self._counts.setdefault(field, Counter())
+            for value in field_values:
+                counter[value] += 1
+
+    async def record(self, doc: dict):
+        """Tell every worker a document was created"""
+        values = {}
+        for field in self.fields:
+            value = doc.get(field)
+            items = value if isinstance(value, list) else [value]
+            values[field] = [str(v) for v in items if v not in (None, "")]
+        await manager.publish_control("facets", {"collection": self.collection, "values": values})
+
+
+# Global per-worker counts
+provider_facets = FacetCounts("providers", ("services", "disability_focus", "location"))
+resource_facets = FacetCounts("resources", ("category", "tags"))
+FACETS = {f.collection: f for f in (provider_facets, resource_facets)}
+
+
+async def _on_facet_change(payload: dict):
+    facets = FACETS.get(payload.get("collection"))
+    if facets:
+        facets.apply(payload["values"])
+
+
+manager.subscribe("facets", _on_facet_change)
@@ -0,0 +1,198 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from fastapi import HTTPException
+from app.core.cache import TTLCache
+from app.core.config import logger, FEED_MAX_ITEMS, FEED_FANOUT_BATCH, FEED_PULL_THRESHOLD
+from app.core.database import db
+from app.models.feed import FollowCreate
+from app.services.connection_cache import connection_cache
+
+# Feed kind -> collection and projection used to hydrate timeline entries
+SOURCES = {
+    "post": ("forum_posts", {"_id": 0, "liked_by": 0, "trend": 0}),
+    "resource": ("resources", {"_id": 0, "trend": 0}),
+    "event": ("events", {"_id": 0, "attendees": 0, "geo": 0}),
+}
+ENTRY_PROJECTION = {"_id": 0, "t": 1, "kind": 1, "item_id": 1, "reason": 1}
+# Timelines and pulled posts are both read newest first, ties broken by item id
+ORDER = [("t", -1), ("item_id", -1)]
+
+# Authors whose posts are merged in at read time; a handful of large NGOs, shared by all readers
+_pull_authors = TTLCache(1, 60)
+
+
+async def pull_authors() -> Set[str]:
+    authors = _pull_authors.get("all")
+    if authors is None:
+        docs = await db.users.find({"feed_pull": True}, {"_id": 0, "id": 1}).to_list(None)
+        authors = {d["id"] for d in docs}
+        _pull_authors.set("all", authors)
+    return authors
+
+
+async def _followers(kind: str, values: Iterable[str]) -> Dict[str, str]:
+    """user_id -> the value they follow, for everyone following one of values"""
+    values = [v for v in values if v]
+    if not values:
+        return {}
+    cursor = db.follows.find({"kind": kind, "value": {"$in": values}}, {"_id": 0, "user_id": 1, "value": 1})
+    return {doc["user_id"]: doc["value"] async for doc in cursor}
+
+
+async def fan_out(
+    kind: str,
+    item_id: str,
+    created_at: str,
+    author_id: str,
+    author_type: Optional[str] = None,
+    category: Optional[str] = None,
+    tags: Iterable[str] = ()
+) -> int:
+    """
+    Push a new item onto the timelines of everyone who should see it: the
+    author, their accepted connections and followers, and followers of its
+    category and tags. Posts of large NGO accounts are switched to fan-out on
+    read instead of writing to every follower's timeline.
+    """
+    audience: Dict[str, str] = {}
+    for user_id, value in (await _followers("category", [category] if category else [])).items():
+        audience[user_id] = f"category:{value}"
+    for user_id, value in (await _followers("tag", tags)).items():
+        audience[user_id] = f"tag:{value}"
+
+    # Only posts are merged in at read time (see _pulled); resources and events are always pushed
+    if kind != "post" or author_id not in await pull_authors():
+        followers = await _followers("user", [author_id])
+        connections = await connection_cache.neighbors(author_id)
+        if kind == "post" and author_type == "ngo" and len(followers.keys() | connections) > FEED_PULL_THRESHOLD:
+            await db.users.update_one({"id": author_id}, {"$set": {"feed_pull": True}})
+            _pull_authors.clear()
+            logger.info(f"Feed: {author_id} has {len(followers.keys() | connections)} readers, switching to fan-out on read")
+        else:
+            audience.update({user_id: "following" for user_id in followers})
+            audience.update({user_id: "connection" for user_id in connections})
+    audience[author_id] = "own"
+
+    now = datetime.now(timezone.utc)
+    entries = [
+        {"user_id": user_id, "t": created_at, "kind": kind, "item_id": item_id, "reason": reason, "created_at": now}
+        for user_id, reason in audience.items()
+    ]
+    for start in range(0, len(entries), FEED_FANOUT_BATCH):
+        await db.timelines.insert_many(entries[start:start + FEED_FANOUT_BATCH], ordered=False)
+    return len(entries)
+
+
+def _parse_cursor(cursor: str):
+    t, sep, item_id = cursor.rpartition("|")
+    if not sep or not t:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return t, item_id
+
+
+def _after(cursor: Optional[str], t_field: str, id_field: str) -> dict:
+    if not cursor:
+        return {}
+    t, item_id = _parse_cursor(cursor)
+    return {"$or": [{t_field: {"$lt": t}}, {t_field: t, id_field: {"$lt": item_id}}]}
+
+
+async def _pulled(user_id: str, cursor: Optional[str], limit: int) -> List[dict]:
+    """Posts of fan-out-on-read authors this user is connected to or follows"""
+    authors = await pull_authors()
+    if not authors:
+        return []
+    connections = await connection_cache.neighbors(user_id)
+    followed = await db.follows.find(
+        {"user_id": user_id, "kind": "user", "value": {"$in": list(authors)}}, {"_id": 0, "value": 1}
+    ).to_list(None)
+    reasons = {doc["value"]: "following" for doc in followed}
+    reasons.update({author: "connection" for author in authors & connections})
+    if not reasons:
+        return []
+    posts = await db.forum_posts.find(
+        {"author_id": {"$in": list(reasons)}, **_after(cursor, "created_at", "id")},
+        {"_id": 0, "id": 1, "created_at": 1, "author_id": 1}
+    ).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
+    return [
+        {"t": p["created_at"], "kind": "post", "item_id": p["id"], "reason": reasons[p["author_id"]]}
+        for p in posts
+    ]
+
+
+async def get_feed(user_id: str, cursor: Optional[str] = None, limit: int = 20):
+    # The timeline page is one range scan on (user_id, t, item_id)
+    entries = await db.timelines.find(
+        {"user_id": user_id, **_after(cursor, "t", "item_id")}, ENTRY_PROJECTION
+    ).sort(ORDER).limit(limit).to_list(limit)
+    pulled = await _pulled(user_id, cursor, limit)
+    if pulled:
+        # A pulled post may also be on the timeline (pushed before its author switched to
+        # pull, or through a category or tag follow); keep the timeline entry
+        merged = {}
+        for entry in entries + pulled:
+            merged.setdefault((entry["kind"], entry["item_id"]), entry)
+        entries = sorted(merged.values(), key=lambda e: (e["t"], e["item_id"]), reverse=True)[:limit]
+    next_cursor = f"{entries[-1]['t']}|{entries[-1]['item_id']}" if len(entries) == limit else None
+
+    # Hydrate with one primary-key lookup per kind; deleted items drop out
+    docs = {}
+    for kind, (collection, projection) in SOURCES.items():
+        ids = [e["item_id"] for e in entries if e["kind"] == kind]
+        if ids:
+            async for doc in db[collection].find({"id": {"$in": ids}}, projection):
+                docs[(kind, doc["id"])] = doc
+    items = [
+        {"kind": e["kind"], "reason": e["reason"], "item": docs[(e["kind"], e["item_id"])]}
+        for e in entries if (e["kind"], e["item_id"]) in docs
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def trim_timelines(max_items: int = FEED_MAX_ITEMS) -> Dict[str, int]:
+    """Keep at most max_items entries per timeline"""
+    over = db.timelines.aggregate([
+        {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": max_items}}}
+    ], allowDiskUse=True)
+    users, removed = 0, 0
+    async for row in over:
+        oldest_kept = await db.timelines.find(
+            {"user_id": row["_id"]}, {"_id": 0, "t": 1, "item_id": 1}
+        ).sort(ORDER).skip(max_items - 1).limit(1).to_list(1)
+        if not oldest_kept:
+            continue
+        cursor = f"{oldest_kept[0]['t']}|{oldest_kept[0]['item_id']}"
+        result = await db.timelines.delete_many({"user_id": row["_id"], **_after(cursor, "t", "item_id")})
+        users += 1
+        removed += result.deleted_count
+    return {"users": users, "removed": removed}
+
+
+async def get_follows(user_id: str):
+    return await db.follows.find({"user_id": user_id}, {"_id": 0, "kind": 1, "value": 1, "created_at": 1}).sort(
+        "created_at", -1
+    ).to_list(None)
+
+
+async def follow(user_id: str, follow_data: FollowCreate):
+    value = follow_data.value.strip()
+    if not value:
+        raise HTTPException(status_code=400, detail="Nothing to follow")
+    if follow_data.kind == "user":
+        if value == user_id:
+            raise HTTPException(status_code=400, detail="You can't follow yourself")
+        if not await db.users.find_one({"id": value}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="User not found")
+    now = datetime.now(timezone.utc).isoformat()
+    await db.follows.update_one(
+        {"user_id": user_id, "kind": follow_data.kind, "value": value},
+        {"$setOnInsert": {"created_at": now}},
+        upsert=True
+    )
+    return {"following": True}
+
+
+async def unfollow(user_id: str, kind: str, value: str):
+    result = await db.follows.delete_one({"user_id": user_id, "kind": kind, "value": value})
+    return {"following": False, "removed": result.deleted_count}
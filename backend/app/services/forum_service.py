@@ -4,6 +4,13 @@ from typing import List, Optional
 from fastapi import HTTPException
 from app.core.database import db
 from app.models.forum import ForumPostCreate, CommentCreate
+from app.services.feed_service import fan_out
+from app.services.notification_service import notify
+from app.services.sync_service import record_change
+from app.services.trending import CREATE_WEIGHT, LIKE_WEIGHT, COMMENT_WEIGHT, event_term, trend_fields
+
+# Replies nest at most this deep (top-level comments are depth 0)
+MAX_COMMENT_DEPTH = 8
 
 async def create_post(post_data: ForumPostCreate, current_user: dict):
     post_id = str(uuid.uuid4())
@@ -22,17 +29,20 @@ async def create_post(post_data: ForumPostCreate, current_user: dict):
         "updated_at": now,
         "likes": 0,
         "comments_count": 0,
-        "liked_by": []
+        "liked_by": [],
+        "trend": event_term(CREATE_WEIGHT)
     }
     
     await db.forum_posts.insert_one(post_doc)
-    return {k: v for k, v in post_doc.items() if k not in ["_id", "liked_by"]}
+    await fan_out("post", post_id, now, current_user["id"], current_user.get("user_type"), post_data.category, post_data.tags)
+    return {k: v for k, v in post_doc.items() if k not in ["_id", "liked_by", "trend"]}
 
 async def get_posts(
     category: Optional[str] = None,
     tag: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    sort: str = "recent"
 ):
     query = {}
     if category:
@@ -45,14 +55,16 @@ async def get_posts(
             {"content": {"$regex": search, "$options": "i"}}
         ]
     
-    posts = await db.forum_posts.find(query, {"_id": 0, "liked_by": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    # Both orders are single index scans ((category,) created_at / trend descending)
+    order = "trend" if sort == "trending" else "created_at"
+    posts = await db.forum_posts.find(query, {"_id": 0, "liked_by": 0, "trend": 0}).sort(order, -1).limit(limit).to_list(limit)
     return posts
 
 async def get_post_by_id(post_id: str):
-    post = await db.forum_posts.find_one({"id": post_id}, {"_id": 0, "liked_by": 0})
+    post = await db.forum_posts.find_one({"id": post_id}, {"_id": 0, "liked_by": 0, "trend": 0})
     return post
 
-async def like_post(post_id: str, user_id: str):
+async def like_post(post_id: str, user_id: str, user_name: Optional[str] = None):
     post = await db.forum_posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -64,36 +76,101 @@ async def like_post(post_id: str, user_id: str):
             {"id": post_id},
             {"$pull": {"liked_by": user_id}, "$inc": {"likes": -1}}
         )
-        return {"liked": False}
+        liked = False
     else:
         # Like
         await db.forum_posts.update_one(
             {"id": post_id},
             {"$push": {"liked_by": user_id}, "$inc": {"likes": 1}}
         )
-        return {"liked": True}
+        # Unlikes don't take the engagement back out of the decayed sum; it fades on its own
+        await db.forum_posts.update_one({"id": post_id}, [{"$set": trend_fields(LIKE_WEIGHT)}])
+        liked = True
+    
+    if post["author_id"] != user_id:
+        await record_change([post["author_id"]], "forum_like", {"post_id": post_id, "user_id": user_id, "liked": liked})
+        if liked:
+            await notify(post["author_id"], "forum_like", post_id, user_id, user_name, {"post_title": post["title"]})
+    return {"liked": liked}
 
 async def create_comment(post_id: str, comment_data: CommentCreate, current_user: dict):
-    post = await db.forum_posts.find_one({"id": post_id})
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
     comment_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
-    
+    path, depth, parent = comment_id, 0, None
+    if comment_data.parent_id:
+        parent = await db.comments.find_one(
+            {"id": comment_data.parent_id, "post_id": post_id},
+            {"_id": 0, "path": 1, "depth": 1, "author_id": 1}
+        )
+        if not parent:
+            raise HTTPException(status_code=404, detail="Comment not found")
+        if parent.get("depth", 0) >= MAX_COMMENT_DEPTH:
+            raise HTTPException(status_code=400, detail="Reply thread is too deep")
+        path = f"{parent.get('path') or comment_data.parent_id}/{comment_id}"
+        depth = parent.get("depth", 0) + 1
+
+    post = await db.forum_posts.find_one({"id": post_id}, {"_id": 0, "author_id": 1, "title": 1})
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
     comment_doc = {
         "id": comment_id,
         "post_id": post_id,
+        "parent_id": comment_data.parent_id,
+        "path": path,
+        "depth": depth,
         "content": comment_data.content,
         "author_id": current_user["id"],
         "author_name": current_user["name"],
-        "created_at": now
+        "created_at": now,
+        "replies_count": 0
     }
-    
+
     await db.comments.insert_one(comment_doc)
-    await db.forum_posts.update_one({"id": post_id}, {"$inc": {"comments_count": 1}})
-    return {k: v for k, v in comment_doc.items() if k != "_id"}
+    # Counters only move once the comment exists, so a failed insert can't leave them ahead
+    if parent:
+        await db.comments.update_one({"id": comment_data.parent_id}, {"$inc": {"replies_count": 1}})
+    await db.forum_posts.update_one({"id": post_id}, [{"$set": {
+        "comments_count": {"$add": [{"$ifNull": ["$comments_count", 0]}, 1]},
+        **trend_fields(COMMENT_WEIGHT)
+    }}])
+    comment = {k: v for k, v in comment_doc.items() if k != "_id"}
+    recipients = {post["author_id"]} | ({parent["author_id"]} if parent else set())
+    recipients.discard(current_user["id"])
+    if recipients:
+        await record_change(list(recipients), "forum_comment", {"post_title": post["title"], "comment": comment})
+    data = {"post_id": post_id, "post_title": post["title"], "comment_id": comment_id}
+    if parent:
+        await notify(parent["author_id"], "comment_reply", comment_data.parent_id, current_user["id"], current_user["name"], data)
+    if not parent or parent["author_id"] != post["author_id"]:
+        await notify(post["author_id"], "forum_comment", post_id, current_user["id"], current_user["name"], data)
+    return comment
 
-async def get_comments(post_id: str):
-    comments = await db.comments.find({"post_id": post_id}, {"_id": 0}).sort("created_at", 1).to_list(100)
+def _comment_cursor(cursor: str):
+    created_at, sep, comment_id = cursor.rpartition("|")
+    if not sep or not created_at:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, comment_id
+
+async def get_comments(post_id: str, parent_id: Optional[str] = None, after: Optional[str] = None, limit: int = 100):
+    """
+    One level of a thread, oldest first: top-level comments, or the direct
+    replies to parent_id. Pass "<created_at>|<id>" of the last comment loaded
+    as after for the next page.
+    """
+    # parent_id None also matches comments written before threading
+    query = {"post_id": post_id, "parent_id": parent_id}
+    if after:
+        created_at, comment_id = _comment_cursor(after)
+        query["$or"] = [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "id": {"$gt": comment_id}}]
+    comments = await db.comments.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).limit(limit).to_list(limit)
     return comments
+
+async def get_comment_thread(post_id: str, comment_id: str):
+    """A comment and its ancestors, top-level first, read in one query from its path"""
+    comment = await db.comments.find_one({"id": comment_id, "post_id": post_id}, {"_id": 0, "path": 1})
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    ids = (comment.get("path") or comment_id).split("/")
+    docs = {c["id"]: c async for c in db.comments.find({"id": {"$in": ids}}, {"_id": 0})}
+    return [docs[i] for i in ids if i in docs]
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from app.core.config import logger, SCHEDULER_CHUNK_SIZE, SCHEDULER_CONCURRENCY, EVENT_REMINDER_HOURS
+from app.core.database import db
+from app.core.scheduler import scheduler
+from app.services.announcement_service import resume_stale_jobs
+from app.services.email_service import frontend_url, send_templated_emails
+from app.services.email_templates import DEFAULT_LOCALE, digest_items
+from app.services.feed_service import trim_timelines
+from app.services.message_archive import archive_cold_messages
+
+DIGEST_POSTS = 5
+RECIPIENT_PROJECTION = {"_id": 0, "id": 1, "email": 1, "locale": 1}
+
+
+def _chunks(items: List[str], size: int = SCHEDULER_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _format_start(value: str) -> str:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%A %d %B %Y, %H:%M")
+    except (AttributeError, ValueError):
+        return value
+
+
+async def _remind_event(event: dict, limit: asyncio.Semaphore) -> int:
+    """Email all attendees of one event, a chunk of users (one query, one insert) at a time"""
+    context = {
+        "event_title": event["title"],
+        "starts_at": _format_start(event["start_date"]),
+        "location": event.get("virtual_link") if event.get("is_virtual") else event.get("location", ""),
+        "link": f"{frontend_url()}/events"
+    }
+    queued = 0
+    for chunk in _chunks(event.get("attendees", [])):
+        async with limit:
+            users = await db.users.find({"id": {"$in": chunk}, "email": {"$ne": None}}, RECIPIENT_PROJECTION).to_list(None)
+            queued += await send_templated_emails("event_reminder", (
+                (u["email"], u.get("locale") or DEFAULT_LOCALE, context, f"event-reminder:{event['id']}:{u['id']}")
+                for u in users
+            ))
+    # Only marked once every chunk is queued; a rerun after a crash is deduplicated by the outbox
+    await db.events.update_one({"id": event["id"]}, {"$set": {"reminder_sent_at": datetime.now(timezone.utc).isoformat()}})
+    return queued
+
+
+async def send_event_reminders() -> Dict[str, int]:
+    """Remind attendees of events starting within EVENT_REMINDER_HOURS"""
+    now = datetime.now(timezone.utc)
+    events = await db.events.find({
+        "start_date": {"$gte": now.isoformat(), "$lte": (now + timedelta(hours=EVENT_REMINDER_HOURS)).isoformat()},
+        "reminder_sent_at": {"$exists": False},
+        "attendees_count": {"$gt": 0}
+    }, {"_id": 0, "id": 1, "title": 1, "start_date": 1, "location": 1, "is_virtual": 1, "virtual_link": 1, "attendees": 1}).to_list(None)
+
+    limit = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+    queued = await asyncio.gather(*(_remind_event(event, limit) for event in events))
+    return {"events": len(events), "emails": sum(queued)}
+
+
+async def send_weekly_digest() -> Dict[str, int]:
+    """Email every verified member the most active forum posts of the past week"""
+    now = datetime.now(timezone.utc)
+    posts = await db.forum_posts.aggregate([
+        {"$match": {"created_at": {"$gte": (now - timedelta(days=7)).isoformat()}}},
+        {"$addFields": {"activity": {"$add": [{"$ifNull": ["$comments_count", 0]}, {"$ifNull": ["$likes", 0]}]}}},
+        {"$sort": {"activity": -1, "created_at": -1}},
+        {"$limit": DIGEST_POSTS},
+        {"$project": {"_id": 0, "id": 1, "title": 1, "comments_count": 1}}
+    ]).to_list(DIGEST_POSTS)
+    if not posts:
+        return {"posts": 0, "emails": 0}
+
+    base = frontend_url()
+    # One context per locale: the item lines are localized too
+    contexts: Dict[str, dict] = {}
+
+    def context(locale: str) -> dict:
+        if locale not in contexts:
+            contexts[locale] = {**digest_items(posts, base, locale), "link": f"{base}/forums"}
+        return contexts[locale]
+
+    year, week, _ = now.isocalendar()
+    limit = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+
+    async def send_chunk(users: List[dict]) -> int:
+        async with limit:
+            return await send_templated_emails("digest", (
+                (u["email"], u.get("locale") or DEFAULT_LOCALE, context(u.get("locale") or DEFAULT_LOCALE),
+                 f"digest:{year}-{week}:{u['id']}")
+                for u in users
+            ))
+
+    # Stream members in chunks; at most SCHEDULER_CONCURRENCY chunks are being queued at once
+    pending, chunk = set(), []
+    queued = 0
+    cursor = db.users.find(
+        {"is_verified": True, "digest_opt_out": {"$ne": True}, "email": {"$ne": None}}, RECIPIENT_PROJECTION
+    ).batch_size(SCHEDULER_CHUNK_SIZE)
+    async for user in cursor:
+        chunk.append(user)
+        if len(chunk) >= SCHEDULER_CHUNK_SIZE:
+            pending.add(asyncio.create_task(send_chunk(chunk)))
+            chunk = []
+            if len(pending) >= SCHEDULER_CONCURRENCY:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                queued += sum(t.result() for t in done)
+    if chunk:
+        pending.add(asyncio.create_task(send_chunk(chunk)))
+    if pending:
+        queued += sum(await asyncio.gather(*pending))
+    return {"posts": len(posts), "emails": queued}
+
+
+async def archive_messages() -> Dict[str, int]:
+    return await archive_cold_messages()
+
+
+def register_jobs():
+    scheduler.register("event_reminders", timedelta(minutes=15), send_event_reminders)
+    scheduler.register("weekly_digest", timedelta(days=7), send_weekly_digest, lease=timedelta(minutes=15))
+    scheduler.register("archive_messages", timedelta(days=1), archive_messages, lease=timedelta(minutes=30))
+    scheduler.register("trim_timelines", timedelta(days=1), trim_timelines, lease=timedelta(minutes=30))
+    # Jobs interrupted by a quick redeploy only look stale once the new workers are up
+    scheduler.register("resume_announcements", timedelta(minutes=1), resume_stale_jobs)
+    logger.info(f"Registered background jobs: {', '.join(scheduler.jobs)}")
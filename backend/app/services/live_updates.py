@@ -0,0 +1,194 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from app.core.config import logger, LIVE_LEASE_SECONDS, LIVE_TOKEN_SAVE_SECONDS
+from app.core.database import db
+from app.core.websocket import manager
+
+# Pages a socket can follow: rooms are "post:<id>" and "event:<id>"
+LIVE_TOPICS = ("post", "event")
+STATE_ID = "live_updates"
+# Fields whose change is worth a frame; other updates (e.g. trend) are dropped
+COUNTERS = {"forum_posts": ("likes", "comments_count"), "events": ("attendees_count",)}
+
+# Only what a page viewer can see change: comments, and counters of existing posts and events.
+# Arrays are cut server-side so a popular post's liked_by never travels; updatedFields is
+# reduced to its keys for the same reason.
+PIPELINE = [
+    {"$match": {"$or": [
+        {"ns.coll": "comments", "operationType": {"$in": ["insert", "update", "replace"]}},
+        {"ns.coll": {"$in": list(COUNTERS)}, "operationType": {"$in": ["update", "replace"]}}
+    ]}},
+    {"$addFields": {"changed": {"$map": {
+        "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+        "in": "$$this.k"
+    }}}},
+    {"$project": {
+        "updateDescription": 0,
+        "fullDocument._id": 0,
+        "fullDocument.liked_by": 0,
+        "fullDocument.attendees": 0,
+        "fullDocument.trend": 0,
+        "fullDocument.geo": 0
+    }}
+]
+
+# Resume tokens the server can no longer honour (history rolled off the oplog, invalidated stream)
+STALE_TOKEN_CODES = {260, 280, 286}
+NOT_REPLICA_SET_CODE = 40573
+
+
+def to_frame(change: dict) -> Optional[Tuple[str, dict]]:
+    """The room and WebSocket frame for one change stream event, or None if nobody needs it"""
+    doc = change.get("fullDocument")
+    if not doc:
+        # Deleted before the lookup
+        return None
+    collection = change["ns"]["coll"]
+    if collection == "comments":
+        kind = "comment_added" if change["operationType"] == "insert" else "comment_updated"
+        return f"post:{doc['post_id']}", {"type": kind, "post_id": doc["post_id"], "comment": doc}
+
+    counters = COUNTERS[collection]
+    # Replaces carry no updatedFields; always forward those
+    if change["operationType"] == "update" and not set(change.get("changed") or ()) & set(counters):
+        return None
+    values = {field: doc.get(field, 0) for field in counters}
+    if collection == "forum_posts":
+        return f"post:{doc['id']}", {"type": "post_updated", "post_id": doc["id"], **values}
+    return f"event:{doc['id']}", {"type": "event_updated", "event_id": doc["id"], **values}
+
+
+class LiveUpdates:
+    """
+    Tails one change stream for the whole deployment. Workers compete for a
+    lease in change_stream_state, as the scheduler does for jobs; the holder
+    watches, publishes each change to its page room over the realtime bus so
+    every worker reaches its own subscribers, and saves the resume token so
+    whoever holds the lease next (after a restart or a crash) continues from
+    there instead of from "now".
+    """
+
+    def __init__(self, lease_seconds: float = LIVE_LEASE_SECONDS):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leading = False
+        self.counters = {"changes": 0, "published": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                if await self._acquire():
+                    if not await self._lead():
+                        return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live updates failed on {self.owner}: {str(e)}")
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+
+    async def _acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.change_stream_state.update_one(
+                {"_id": STATE_ID, "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "locked_until": now + self.lease}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The state document exists and another worker holds the lease
+            return False
+        return True
+
+    async def _renew(self) -> bool:
+        result = await db.change_stream_state.update_one(
+            {"_id": STATE_ID, "owner": self.owner},
+            {"$set": {"locked_until": datetime.now(timezone.utc) + self.lease}}
+        )
+        return result.matched_count == 1
+
+    async def _release(self):
+        await db.change_stream_state.update_one(
+            {"_id": STATE_ID, "owner": self.owner}, {"$set": {"owner": None, "locked_until": None}}
+        )
+
+    async def _save(self, token: Optional[dict]):
+        if token is not None:
+            await db.change_stream_state.update_one(
+                {"_id": STATE_ID, "owner": self.owner},
+                {"$set": {"resume_token": token, "token_saved_at": datetime.now(timezone.utc)}}
+            )
+
+    async def _lead(self) -> bool:
+        """Watch while the lease holds; False when the deployment can't run change streams at all"""
+        self.leading = True
+        logger.info(f"Live updates: {self.owner} is watching forum_posts, comments and events")
+        watch = asyncio.create_task(self._watch())
+        try:
+            while True:
+                done, _ = await asyncio.wait({watch}, timeout=self.lease.total_seconds() / 3)
+                if done:
+                    return watch.result()
+                if not await self._renew():
+                    logger.warning(f"Live updates: {self.owner} lost the lease, stopping its change stream")
+                    return True
+        finally:
+            self.leading = False
+            if not watch.done():
+                watch.cancel()
+                await asyncio.gather(watch, return_exceptions=True)
+            await asyncio.shield(self._release())
+
+    async def _watch(self) -> bool:
+        state = await db.change_stream_state.find_one({"_id": STATE_ID}, {"resume_token": 1})
+        token = (state or {}).get("resume_token")
+        try:
+            async with db.watch(PIPELINE, full_document="updateLookup", resume_after=token) as stream:
+                saved, saved_at = token, time.monotonic()
+                try:
+                    while stream.alive:
+                        # One getMore: waits up to the server's await time, then returns None when idle
+                        change = await stream.try_next()
+                        if change is not None:
+                            self.counters["changes"] += 1
+                            frame = to_frame(change)
+                            if frame:
+                                await manager.publish_room(*frame)
+                                self.counters["published"] += 1
+                        # The token advances while idle too; saving it keeps it inside the oplog window
+                        if stream.resume_token != saved and time.monotonic() - saved_at >= LIVE_TOKEN_SAVE_SECONDS:
+                            saved, saved_at = stream.resume_token, time.monotonic()
+                            await self._save(saved)
+                finally:
+                    await asyncio.shield(self._save(stream.resume_token))
+        except OperationFailure as e:
+            if e.code == NOT_REPLICA_SET_CODE:
+                logger.warning("Live updates disabled: MongoDB change streams need a replica set")
+                return False
+            if token is not None and e.code in STALE_TOKEN_CODES:
+                # Changes in the gap are lost; clients refetch when they next open the page
+                logger.warning(f"Live updates: saved resume token no longer usable ({e.code}), starting from now")
+                await db.change_stream_state.update_one({"_id": STATE_ID}, {"$unset": {"resume_token": ""}})
+                return True
+            raise
+        return True
+
+
+# Global instance, started in the app startup hook
+live_updates = LiveUpdates()
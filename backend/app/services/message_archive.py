@@ -0,0 +1,100 @@
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import bson
+from pymongo.errors import DuplicateKeyError
+from app.core.config import logger, MESSAGES_HOT_DAYS, MESSAGE_SEGMENT_SIZE
+from app.core.database import db
+from app.models.connection import pair_key
+from app.models.message import MESSAGE_SCHEMA_VERSION
+
+# Cold tier: messages older than MESSAGES_HOT_DAYS move out of the hot collection
+# (and its indexes) into append-only segments in messages_archive, one document per
+# up to MESSAGE_SEGMENT_SIZE consecutive messages of a conversation:
+#   {_id: first message _id, k: pair_key, first_t, last_t, count, data: zlib(BSON {"m": [...]})}
+# Segments are indexed only by (k, first_t), a handful of entries per conversation.
+
+
+def _encode_segment(docs: List[dict]) -> bytes:
+    return zlib.compress(bson.encode({"m": docs}), 6)
+
+
+def _decode_segment(data: bytes) -> List[dict]:
+    return bson.decode(zlib.decompress(data))["m"]
+
+
+async def archive_conversation(user_a: str, user_b: str, cutoff: datetime,
+                               segment_size: int = MESSAGE_SEGMENT_SIZE) -> int:
+    """Move one conversation's messages older than cutoff into segments, oldest first"""
+    key = pair_key(user_a, user_b)
+    query = {
+        "v": MESSAGE_SCHEMA_VERSION,
+        "$or": [{"s": user_a, "r": user_b}, {"s": user_b, "r": user_a}],
+        "t": {"$lt": cutoff}
+    }
+    moved = 0
+    while True:
+        docs = await db.messages.find(query).sort([("t", 1), ("_id", 1)]).limit(segment_size).to_list(segment_size)
+        if not docs:
+            return moved
+        # Keyed by the first message's _id: rerunning after a crash between the
+        # insert and the delete rebuilds the same segment and only finishes the delete
+        try:
+            await db.messages_archive.insert_one({
+                "_id": docs[0]["_id"],
+                "k": key,
+                "first_t": docs[0]["t"],
+                "last_t": docs[-1]["t"],
+                "count": len(docs),
+                "data": _encode_segment(docs)
+            })
+        except DuplicateKeyError:
+            pass
+        await db.messages.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        moved += len(docs)
+
+
+async def archive_cold_messages(hot_days: int = MESSAGES_HOT_DAYS, segment_size: int = MESSAGE_SEGMENT_SIZE) -> dict:
+    """Archive every conversation's messages older than hot_days"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=hot_days)
+    pairs = db.messages.aggregate([
+        {"$match": {"v": MESSAGE_SCHEMA_VERSION, "t": {"$lt": cutoff}}},
+        {"$group": {"_id": {
+            "a": {"$cond": [{"$lte": ["$s", "$r"]}, "$s", "$r"]},
+            "b": {"$cond": [{"$lte": ["$s", "$r"]}, "$r", "$s"]}
+        }}}
+    ], allowDiskUse=True)
+
+    conversations, moved = 0, 0
+    async for pair in pairs:
+        moved += await archive_conversation(pair["_id"]["a"], pair["_id"]["b"], cutoff, segment_size)
+        conversations += 1
+    logger.info(f"Archived {moved} messages from {conversations} conversations older than {cutoff.isoformat()}")
+    return {"conversations": conversations, "messages": moved}
+
+
+async def get_archived_messages(user_a: str, user_b: str, before: Optional[datetime], limit: int,
+                                before_id: Optional[bson.ObjectId] = None) -> List[dict]:
+    """Up to limit archived messages older than before (or, with before_id, than (before, before_id)), newest first"""
+    query = {"k": pair_key(user_a, user_b)}
+    if before is not None and before.tzinfo is not None:
+        # Decoded segments hold naive UTC datetimes
+        before = before.astimezone(timezone.utc).replace(tzinfo=None)
+    if before is not None:
+        # A segment starting at the cursor's own timestamp may still hold messages below its id
+        query["first_t"] = {"$lte" if before_id is not None else "$lt": before}
+    cursor = db.messages_archive.find(query, {"data": 1}).sort([("first_t", -1), ("_id", -1)])
+
+    messages: List[dict] = []
+    async for segment in cursor:
+        docs = _decode_segment(segment["data"])
+        if before_id is not None:
+            docs = [d for d in docs if (d["t"], d["_id"]) < (before, before_id)]
+        elif before is not None:
+            docs = [d for d in docs if d["t"] < before]
+        # Segments written before ties were ordered by _id may hold them in any order
+        docs.sort(key=lambda d: (d["t"], d["_id"]))
+        messages.extend(reversed(docs))
+        if len(messages) >= limit:
+            break
+    return messages[:limit]
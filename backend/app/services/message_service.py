@@ -1,105 +1,236 @@
-import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 from fastapi import HTTPException
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.core.config import MESSAGES_LEGACY_READS
 from app.core.database import db
-from app.models.message import MessageCreate
-from app.services import connection_service
+from app.models.message import MessageCreate, compact_message, expand_message, format_message_time
+from app.services.connection_cache import connection_cache
+from app.services.message_archive import get_archived_messages
+from app.services.sync_service import record_change
 
 async def send_message(message_data: MessageCreate, current_user: dict):
-    # Check recipient exists
-    recipient = await db.users.find_one({"id": message_data.recipient_id})
-    if not recipient:
-        raise HTTPException(status_code=404, detail="Recipient not found")
-    
-    # Check if they are connected
-    connection = await connection_service.get_connection_status(current_user["id"], message_data.recipient_id)
-    if not connection or connection.get("status") != "accepted":
+    # Check if they are connected (cached adjacency, no round trip on a hit)
+    if not await connection_cache.are_connected(current_user["id"], message_data.recipient_id):
+        # Only look the recipient up to tell "unknown user" apart from "not connected"
+        recipient = await db.users.find_one({"id": message_data.recipient_id}, {"_id": 1})
+        if not recipient:
+            raise HTTPException(status_code=404, detail="Recipient not found")
         raise HTTPException(
             status_code=403, 
             detail="You can only message members you are connected with. Please send a connection request first."
         )
     
-    message_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
-    
-    message_doc = {
-        "id": message_id,
-        "sender_id": current_user["id"],
-        "sender_name": current_user["name"],
-        "recipient_id": message_data.recipient_id,
-        "content": message_data.content,
-        "is_read": False,
-        "created_at": now
-    }
+    # BSON dates keep milliseconds; truncate now so the response matches what is stored
+    created_at = datetime.now(timezone.utc)
+    created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+    now = format_message_time(created_at)
     
+    message_doc = compact_message(current_user["id"], message_data.recipient_id, message_data.content, created_at)
     await db.messages.insert_one(message_doc)
+    message = expand_message(message_doc, {current_user["id"]: current_user["name"]})
+    message["is_read"] = False
+    unread = await _record_conversation(current_user["id"], message_data.recipient_id, message_data.content, now)
+    await record_change([current_user["id"], message_data.recipient_id], "new_message", message)
+    await record_change([message_data.recipient_id], "unread", unread)
     
     # Broadcast to recipient via WebSocket
     try:
         from app.core.websocket import manager
         await manager.broadcast_to_user(message_data.recipient_id, {
             "type": "new_message",
-            "message": {k: v for k, v in message_doc.items() if k != "_id"}
+            "message": message
         })
+        await manager.broadcast_to_user(message_data.recipient_id, {"type": "unread", **unread})
     except Exception as e:
         from app.core.config import logger
         logger.error(f"Failed to broadcast message: {str(e)}")
         
-    return {k: v for k, v in message_doc.items() if k != "_id"}
+    return message
+
+async def _record_conversation(sender_id: str, recipient_id: str, content: str, now: str) -> dict:
+    """
+    Update both sides' conversation summaries and the recipient's unread
+    counters, so listing conversations and the badge never scan messages.
+    """
+    last = {"last_message": content, "last_message_time": now, "last_sender_id": sender_id}
+    await db.conversations.update_one(
+        {"user_id": sender_id, "peer_id": recipient_id},
+        {"$set": last, "$setOnInsert": {"unread_count": 0, "last_read_at": None}},
+        upsert=True
+    )
+    conversation = await db.conversations.find_one_and_update(
+        {"user_id": recipient_id, "peer_id": sender_id},
+        {"$set": last, "$inc": {"unread_count": 1}, "$setOnInsert": {"last_read_at": None}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    counter = await db.unread_counters.find_one_and_update(
+        {"user_id": recipient_id},
+        {"$inc": {"total": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"user_id": sender_id, "count": conversation["unread_count"], "total": counter["total"]}
+
+async def _count_received(user_id: str, peer_id: str, after: Optional[str], up_to: str, limit: int) -> int:
+    """Messages from peer_id to user_id with after < created_at <= up_to, counting at most limit"""
+    window = {"$lte": datetime.fromisoformat(up_to)}
+    if after:
+        window["$gt"] = datetime.fromisoformat(after)
+    count = await db.messages.count_documents({"s": peer_id, "r": user_id, "t": window}, limit=limit)
+    if MESSAGES_LEGACY_READS and count < limit:
+        legacy_window = {"$lte": up_to, **({"$gt": after} if after else {})}
+        count += await db.messages.count_documents(
+            {"sender_id": peer_id, "recipient_id": user_id, "created_at": legacy_window}, limit=limit - count
+        )
+    return count
+
+async def mark_conversation_read(user_id: str, peer_id: str, up_to: str):
+    """
+    Move the read cursor to up_to, the created_at of the newest message the
+    reader was shown, and take only the messages up to it off the unread
+    counts; one that arrived meanwhile stays unread. A no-op (no writes) when
+    nothing is unread or the cursor is already past up_to.
+    """
+    before = await db.conversations.find_one_and_update(
+        {
+            "user_id": user_id, "peer_id": peer_id, "unread_count": {"$gt": 0},
+            "$or": [{"last_read_at": None}, {"last_read_at": {"$lt": up_to}}]
+        },
+        {"$set": {"last_read_at": up_to}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not before:
+        return
+    read_count = await _count_received(user_id, peer_id, before.get("last_read_at"), up_to, before["unread_count"])
+    conversation = await db.conversations.find_one_and_update(
+        {"user_id": user_id, "peer_id": peer_id},
+        {"$inc": {"unread_count": -read_count}},
+        return_document=ReturnDocument.AFTER
+    )
+    counter = await db.unread_counters.find_one_and_update(
+        {"user_id": user_id},
+        {"$inc": {"total": -read_count}},
+        return_document=ReturnDocument.AFTER
+    )
+    unread = {
+        "user_id": peer_id,
+        "count": max(conversation["unread_count"], 0),
+        "total": max((counter or {}).get("total", 0), 0)
+    }
+    read = {"reader_id": user_id, "last_read_at": up_to}
+    await record_change([user_id], "unread", unread)
+    await record_change([peer_id], "read", read)
+    try:
+        from app.core.websocket import manager
+        # Reader's other sessions update their badge, the peer learns its messages were read
+        await manager.broadcast_to_user(user_id, {"type": "unread", **unread})
+        await manager.broadcast_to_user(peer_id, {"type": "read", **read})
+    except Exception as e:
+        from app.core.config import logger
+        logger.error(f"Failed to broadcast read state: {str(e)}")
+
+async def get_unread_count(user_id: str):
+    counter = await db.unread_counters.find_one({"user_id": user_id}, {"_id": 0, "total": 1})
+    return {"total": max((counter or {}).get("total", 0), 0)}
 
 async def get_conversations(user_id: str):
-    pipeline = [
-        {"$match": {"$or": [
-            {"sender_id": user_id},
-            {"recipient_id": user_id}
-        ]}},
-        {"$sort": {"created_at": -1}},
-        {"$group": {
-            "_id": {"$cond": [
-                {"$eq": ["$sender_id", user_id]},
-                "$recipient_id",
-                "$sender_id"
-            ]},
-            "last_message": {"$first": "$content"},
-            "last_message_time": {"$first": "$created_at"},
-            "unread_count": {"$sum": {"$cond": [
-                {"$and": [
-                    {"$eq": ["$recipient_id", user_id]},
-                    {"$eq": ["$is_read", False]}
-                ]},
-                1, 0
-            ]}}
-        }}
-    ]
+    conversations = await db.conversations.find(
+        {"user_id": user_id}, {"_id": 0}
+    ).sort("last_message_time", -1).to_list(100)
     
-    conversations = await db.messages.aggregate(pipeline).to_list(100)
+    # Get user names in one query
+    peer_ids = [conv["peer_id"] for conv in conversations]
+    users = await db.users.find({"id": {"$in": peer_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    names = {u["id"]: u["name"] for u in users}
     
-    # Get user names
     result = []
     for conv in conversations:
-        user = await db.users.find_one({"id": conv["_id"]}, {"_id": 0, "name": 1})
-        if user:
+        if conv["peer_id"] in names:
             result.append({
-                "user_id": conv["_id"],
-                "user_name": user["name"],
+                "user_id": conv["peer_id"],
+                "user_name": names[conv["peer_id"]],
                 "last_message": conv["last_message"],
                 "last_message_time": conv["last_message_time"],
-                "unread_count": conv["unread_count"]
+                "unread_count": conv.get("unread_count", 0)
             })
     return result
 
-async def get_messages_with_user(other_user_id: str, current_user_id: str):
-    messages = await db.messages.find({
-        "$or": [
+def _parse_before_id(before_id: Optional[str]) -> Optional[ObjectId]:
+    # Legacy-layout messages carry uuid ids; those only break ties within the legacy layout
+    if before_id is None or not ObjectId.is_valid(before_id):
+        return None
+    return ObjectId(before_id)
+
+
+async def get_messages_with_user(other_user_id: str, current_user_id: str,
+                                 before: Optional[datetime] = None, before_id: Optional[str] = None,
+                                 limit: int = 100):
+    """
+    The latest `limit` messages of a thread, oldest first; with `before` (and
+    `before_id`, the oldest message's created_at and id), the page preceding it.
+    Messages sharing that timestamp are told apart by id, so none fall between
+    pages. Pages past the hot window come from the archive.
+    """
+    query = {"$or": [
+        {"s": current_user_id, "r": other_user_id},
+        {"s": other_user_id, "r": current_user_id}
+    ]}
+    oid = _parse_before_id(before_id)
+    if before is not None:
+        if oid is not None:
+            query = {"$and": [query, {"$or": [{"t": {"$lt": before}}, {"t": before, "_id": {"$lt": oid}}]}]}
+        else:
+            query["t"] = {"$lt": before}
+    docs = await db.messages.find(query).sort([("t", -1), ("_id", -1)]).limit(limit).to_list(limit)
+    if MESSAGES_LEGACY_READS:
+        legacy_query = {"$or": [
             {"sender_id": current_user_id, "recipient_id": other_user_id},
             {"sender_id": other_user_id, "recipient_id": current_user_id}
-        ]
-    }, {"_id": 0}).sort("created_at", 1).to_list(100)
+        ]}
+        if before is not None:
+            created_at = format_message_time(before)
+            if before_id is not None:
+                legacy_query = {"$and": [legacy_query, {"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "id": {"$lt": before_id}}
+                ]}]}
+            else:
+                legacy_query["created_at"] = {"$lt": created_at}
+        docs += await db.messages.find(legacy_query, {"_id": 0}).sort(
+            [("created_at", -1), ("id", -1)]
+        ).limit(limit).to_list(limit)
+    if len(docs) < limit:
+        # The archive continues below the oldest hot message, or below the caller's cursor
+        archive_before, archive_oid = min(((d["t"], d["_id"]) for d in docs if "t" in d), default=(before, oid))
+        docs += await get_archived_messages(
+            current_user_id, other_user_id, archive_before, limit - len(docs), archive_oid
+        )
+    
+    users = await db.users.find(
+        {"id": {"$in": [current_user_id, other_user_id]}}, {"_id": 0, "id": 1, "name": 1}
+    ).to_list(2)
+    names = {u["id"]: u["name"] for u in users}
+    # Newest `limit` across layouts and tiers, oldest first
+    messages = sorted((expand_message(doc, names) for doc in docs), key=lambda m: (m["created_at"], m["id"]))[-limit:]
+    
+    # Opening the thread (not paging back through it) reads it
+    if before is None:
+        # One cursor write instead of flagging every message, up to the newest one shown here
+        received = [m["created_at"] for m in messages if m["sender_id"] == other_user_id]
+        if received:
+            await mark_conversation_read(current_user_id, other_user_id, received[-1])
     
-    # Mark messages as read
-    await db.messages.update_many(
-        {"sender_id": other_user_id, "recipient_id": current_user_id, "is_read": False},
-        {"$set": {"is_read": True}}
+    # My messages count as read up to the other side's cursor
+    peer_cursor = await db.conversations.find_one(
+        {"user_id": other_user_id, "peer_id": current_user_id}, {"_id": 0, "last_read_at": 1}
     )
+    peer_read_at = (peer_cursor or {}).get("last_read_at") or ""
+    for message in messages:
+        if message["sender_id"] == current_user_id:
+            message["is_read"] = message["created_at"] <= peer_read_at
+        else:
+            message["is_read"] = True
     return messages
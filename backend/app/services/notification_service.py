@@ -0,0 +1,139 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import logger, NOTIFICATION_COALESCE_SECONDS, NOTIFICATION_RETENTION_DAYS
+from app.core.database import db
+from app.core.websocket import manager
+
+# Most recent actor names kept per notification, for "Ana, Ben and 10 others"
+MAX_ACTOR_NAMES = 3
+PROJECTION = {"_id": 0, "user_id": 0, "bucket": 0, "actor_ids": 0, "expires_at": 0}
+
+
+async def _push(user_id: str, message: dict):
+    try:
+        await manager.broadcast_to_user(user_id, message)
+    except Exception as e:
+        logger.error(f"Failed to push {message.get('type')} to {user_id}: {str(e)}")
+
+
+async def _add_unread(user_id: str, delta: int) -> int:
+    counter = await db.notification_counters.find_one_and_update(
+        {"user_id": user_id}, {"$inc": {"unread": delta}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return max(counter["unread"], 0)
+
+
+async def notify(
+    user_id: str,
+    kind: str,
+    target_id: str,
+    actor_id: str,
+    actor_name: Optional[str] = None,
+    data: Optional[dict] = None
+):
+    """
+    Tell user_id that actor_id did kind to target_id and push it to their sockets.
+    Repeats within one coalescing window land on the same entry, counting each
+    actor once, so a burst of likes is one document rather than one per like.
+    Like record_change, a failure is logged and never fails the write that caused it.
+    """
+    if not user_id or user_id == actor_id:
+        return None
+    now = datetime.now(timezone.utc)
+    key = {
+        "user_id": user_id,
+        "kind": kind,
+        "target_id": target_id,
+        "bucket": int(now.timestamp()) // NOTIFICATION_COALESCE_SECONDS
+    }
+    # Only matches while this actor isn't counted yet
+    query = {**key, "actor_ids": {"$ne": actor_id}}
+    update = {
+        "$push": {
+            "actor_ids": actor_id,
+            "actor_names": {"$each": [actor_name or "Someone"], "$slice": -MAX_ACTOR_NAMES}
+        },
+        "$inc": {"actors_count": 1},
+        "$set": {
+            "read": False,
+            "data": data or {},
+            "updated_at": now.isoformat(),
+            "expires_at": now + timedelta(days=NOTIFICATION_RETENTION_DAYS)
+        },
+        "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now.isoformat()}
+    }
+    try:
+        try:
+            # BEFORE is None for a new entry; either way we learn whether it was unread already
+            before = await db.notifications.find_one_and_update(
+                query, update, projection={"_id": 0, "read": 1}, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # The entry exists: either it already counts this actor (a re-like), or a concurrent first write won
+            before = await db.notifications.find_one_and_update(
+                query, update, projection={"_id": 0, "read": 1}, return_document=ReturnDocument.BEFORE
+            )
+            if before is None:
+                return None
+
+        if before is None or before.get("read"):
+            unread = {"unread": await _add_unread(user_id, 1)}
+        else:
+            unread = await get_unread_count(user_id)
+        notification = await db.notifications.find_one(key, PROJECTION)
+        await _push(user_id, {"type": "notification", "notification": notification, **unread})
+        return notification
+    except Exception as e:
+        logger.error(f"Failed to record {kind} notification for {user_id}: {str(e)}")
+        return None
+
+
+def _parse_cursor(cursor: str):
+    updated_at, sep, notification_id = cursor.rpartition("|")
+    if not sep or not updated_at:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return updated_at, notification_id
+
+
+async def get_notifications(user_id: str, cursor: Optional[str] = None, limit: int = 20, unread_only: bool = False):
+    """
+    Most recently active first. Pass next_cursor for older pages; an entry that
+    gains actors meanwhile moves back to the top rather than into a later page.
+    """
+    query = {"user_id": user_id}
+    if unread_only:
+        query["read"] = False
+    if cursor:
+        updated_at, notification_id = _parse_cursor(cursor)
+        query["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "id": {"$lt": notification_id}}
+        ]
+    items = await db.notifications.find(query, PROJECTION).sort(
+        [("updated_at", -1), ("id", -1)]
+    ).limit(limit).to_list(limit)
+    next_cursor = f"{items[-1]['updated_at']}|{items[-1]['id']}" if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor, **await get_unread_count(user_id)}
+
+
+async def get_unread_count(user_id: str):
+    counter = await db.notification_counters.find_one({"user_id": user_id}, {"_id": 0, "unread": 1})
+    return {"unread": max((counter or {}).get("unread", 0), 0)}
+
+
+async def mark_read(user_id: str, ids: Optional[List[str]] = None):
+    """Mark the given notifications, or all of them, read; a no-op (no counter write) when none were unread"""
+    query = {"user_id": user_id, "read": False}
+    if ids is not None:
+        query["id"] = {"$in": ids}
+    result = await db.notifications.update_many(query, {"$set": {"read": True}})
+    if not result.modified_count:
+        return await get_unread_count(user_id)
+    unread = {"unread": await _add_unread(user_id, -result.modified_count)}
+    # The reader's other sessions clear the same entries and badge
+    await _push(user_id, {"type": "notifications_read", "ids": ids, **unread})
+    return unread
@@ -2,6 +2,9 @@ import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 from app.core.database import db
+from app.core.geo import location_fields
+from app.services.facet_service import provider_facets
+from app.services.recommendation_service import publish_provider_change
 from app.models.provider import ServiceProviderCreate
 
 async def create_provider(provider_data: ServiceProviderCreate, current_user: dict):
@@ -21,20 +24,24 @@ async def create_provider(provider_data: ServiceProviderCreate, current_user: di
         "owner_id": current_user["id"],
         "is_verified": False,
         "rating": 0.0,
+        "rating_sum": 0,
         "reviews_count": 0,
-        "created_at": now
+        "created_at": now,
+        **location_fields(provider_data.location)
     }
     
     await db.providers.insert_one(provider_doc)
-    return {k: v for k, v in provider_doc.items() if k != "_id"}
+    await provider_facets.record(provider_doc)
+    await publish_provider_change(provider_doc)
+    return {k: v for k, v in provider_doc.items() if k not in ["_id", "geo", "rating_sum"]}
 
-async def get_providers(
+def _provider_query(
     service: Optional[str] = None,
     disability_focus: Optional[str] = None,
     location: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
-):
+    geo: Optional[dict] = None
+) -> dict:
     query = {}
     if service:
         query["services"] = service
@@ -42,15 +49,43 @@ async def get_providers(
         query["disability_focus"] = disability_focus
     if location:
         query["location"] = {"$regex": location, "$options": "i"}
+    if geo:
+        query["geo"] = geo
     if search:
         query["$or"] = [
             {"name": {"$regex": search, "$options": "i"}},
             {"description": {"$regex": search, "$options": "i"}}
         ]
-    
-    providers = await db.providers.find(query, {"_id": 0}).limit(limit).to_list(limit)
+    return query
+
+async def get_providers(
+    service: Optional[str] = None,
+    disability_focus: Optional[str] = None,
+    location: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: int = 50,
+    geo: Optional[dict] = None,
+    sort: Optional[str] = None
+):
+    query = _provider_query(service, disability_focus, location, search, geo)
+    cursor = db.providers.find(query, {"_id": 0})
+    if sort == "top_rated":
+        # Served by the (rating, reviews_count) index; ties go to the provider with more reviews
+        cursor = cursor.sort([("rating", -1), ("reviews_count", -1)])
+    providers = await cursor.limit(limit).to_list(limit)
     return providers
 
+async def get_provider_facets(
+    service: Optional[str] = None,
+    disability_focus: Optional[str] = None,
+    location: Optional[str] = None,
+    search: Optional[str] = None,
+    geo: Optional[dict] = None,
+    top: int = 20
+):
+    """Counts per services, disability_focus and location value for the providers matching the filters"""
+    return await provider_facets.query(_provider_query(service, disability_focus, location, search, geo), top)
+
 async def get_provider_by_id(provider_id: str):
     provider = await db.providers.find_one({"id": provider_id}, {"_id": 0})
     return provider
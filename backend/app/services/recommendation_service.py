@@ -0,0 +1,241 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.core.config import logger, GEO_DEFAULT_RADIUS_KM
+from app.core.database import db
+from app.core.geo import EARTH_RADIUS_KM, gazetteer
+from app.core.websocket import manager
+
+# Scoring weights
+FOCUS_WEIGHT = 3.0
+SERVICE_WEIGHT = 2.0
+DISTANCE_WEIGHT = 2.0
+RATING_WEIGHT = 1.0
+# Proximity is exp(-distance / DISTANCE_SCALE_KM): 1 next door, ~0.37 at the scale
+DISTANCE_SCALE_KM = GEO_DEFAULT_RADIUS_KM
+# Reviews needed before a provider's rating counts at half weight
+RATING_CONFIDENCE_REVIEWS = 5
+
+FEATURE_FIELDS = {"_id": 0, "id": 1, "disability_focus": 1, "services": 1, "geo": 1, "rating": 1, "reviews_count": 1}
+
+
+class Vocabulary:
+    """Term -> column, append-only so existing rows never need re-encoding"""
+
+    def __init__(self):
+        self.columns: Dict[str, int] = {}
+
+    def column(self, term: str) -> int:
+        index = self.columns.get(term)
+        if index is None:
+            index = self.columns[term] = len(self.columns)
+        return index
+
+    def vector(self, terms: Iterable[str], width: int) -> np.ndarray:
+        vector = np.zeros(width, dtype=np.float32)
+        for term in terms:
+            index = self.columns.get(term)
+            if index is not None and index < width:
+                vector[index] = 1.0
+        return vector
+
+
+class ProviderMatrix:
+    """
+    Every provider encoded as one row of preallocated NumPy arrays, loaded
+    once per worker and kept current from "ctl.providers" bus events:
+    focus/services are 0/1 term matrices, position is the unit vector of the
+    provider's coordinates (zero when it has none), quality its confidence-
+    weighted rating. Scoring a member is then a couple of matrix-vector
+    products over all providers at once.
+    """
+
+    def __init__(self, capacity: int = 1024, terms: int = 32):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.focus_terms = Vocabulary()
+        self.service_terms = Vocabulary()
+        self.focus = np.zeros((capacity, terms), dtype=np.float32)
+        self.services = np.zeros((capacity, terms), dtype=np.float32)
+        self.position = np.zeros((capacity, 3), dtype=np.float32)
+        self.located = np.zeros(capacity, dtype=bool)
+        self.quality = np.zeros(capacity, dtype=np.float32)
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        # Changes seen while the matrix is loading, applied once it's done
+        self._backlog: Optional[List[dict]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            self._backlog = []
+            async for doc in db.providers.find({}, FEATURE_FIELDS).batch_size(5000):
+                self.upsert(doc)
+            for change in self._backlog:
+                self._apply(change)
+            self._backlog = None
+            self.loaded = True
+            logger.info(f"Provider matrix loaded: {len(self.ids)} providers, "
+                        f"{len(self.focus_terms.columns)} focus and {len(self.service_terms.columns)} service terms")
+
+    def _grow(self, rows: int, focus_terms: int, service_terms: int):
+        """Double whichever dimension ran out, copying the filled part"""
+        def resized(array: np.ndarray, shape: tuple) -> np.ndarray:
+            if shape == array.shape:
+                return array
+            grown = np.zeros(shape, dtype=array.dtype)
+            grown[tuple(slice(0, n) for n in array.shape)] = array
+            return grown
+
+        capacity = self.focus.shape[0]
+        while capacity < rows:
+            capacity *= 2
+        focus_width, service_width = self.focus.shape[1], self.services.shape[1]
+        while focus_width < focus_terms:
+            focus_width *= 2
+        while service_width < service_terms:
+            service_width *= 2
+        self.focus = resized(self.focus, (capacity, focus_width))
+        self.services = resized(self.services, (capacity, service_width))
+        self.position = resized(self.position, (capacity, 3))
+        self.located = resized(self.located, (capacity,))
+        self.quality = resized(self.quality, (capacity,))
+
+    def upsert(self, doc: dict):
+        """Encode (or re-encode) a provider document's row"""
+        provider_id = doc["id"]
+        row = self.rows.get(provider_id)
+        if row is None:
+            row = self.rows[provider_id] = len(self.ids)
+            self.ids.append(provider_id)
+        focus = [self.focus_terms.column(t) for t in doc.get("disability_focus") or []]
+        services = [self.service_terms.column(t) for t in doc.get("services") or []]
+        self._grow(len(self.ids), len(self.focus_terms.columns), len(self.service_terms.columns))
+
+        self.focus[row] = 0
+        self.focus[row, focus] = 1.0
+        self.services[row] = 0
+        self.services[row, services] = 1.0
+        geo = doc.get("geo")
+        if geo:
+            self.position[row] = unit_vector(geo["coordinates"][1], geo["coordinates"][0])
+            self.located[row] = True
+        else:
+            self.position[row] = 0
+            self.located[row] = False
+        self.set_rating(provider_id, doc.get("rating") or 0.0, doc.get("reviews_count") or 0)
+
+    def set_rating(self, provider_id: str, rating: float, reviews_count: int):
+        row = self.rows.get(provider_id)
+        if row is not None:
+            self.quality[row] = (rating / 5.0) * reviews_count / (reviews_count + RATING_CONFIDENCE_REVIEWS)
+
+    def _apply(self, change: dict):
+        if "doc" in change:
+            self.upsert(change["doc"])
+        else:
+            self.set_rating(change["id"], change["rating"], change["reviews_count"])
+
+    async def on_change(self, payload: dict):
+        if self._backlog is not None:
+            self._backlog.append(payload)
+        elif self.loaded:
+            self._apply(payload)
+
+    def score(
+        self,
+        categories: Iterable[str],
+        services: Iterable[str] = (),
+        lat: Optional[float] = None,
+        lng: Optional[float] = None
+    ) -> np.ndarray:
+        """Score of every provider for one member, in row order"""
+        n = len(self.ids)
+        categories, services = set(categories), set(services)
+        scores = RATING_WEIGHT * self.quality[:n]
+        if categories:
+            member = self.focus_terms.vector(categories, self.focus.shape[1])
+            # Share of the member's categories the provider focuses on
+            scores = scores + (FOCUS_WEIGHT / len(categories)) * (self.focus[:n] @ member)
+        if services:
+            wanted = self.service_terms.vector(services, self.services.shape[1])
+            scores = scores + (SERVICE_WEIGHT / len(services)) * (self.services[:n] @ wanted)
+        if lat is not None and lng is not None:
+            scores = scores + DISTANCE_WEIGHT * np.exp(-self.distances_km(lat, lng) / DISTANCE_SCALE_KM)
+        return scores
+
+    def distances_km(self, lat: float, lng: float) -> np.ndarray:
+        """Great-circle distance to every provider (inf for providers without coordinates)"""
+        n = len(self.ids)
+        cosines = np.clip(self.position[:n] @ unit_vector(lat, lng), -1.0, 1.0)
+        return np.where(self.located[:n], EARTH_RADIUS_KM * np.arccos(cosines), np.inf)
+
+    def top(self, scores: np.ndarray, k: int) -> List[int]:
+        """Rows of the k best positive scores, best first, without sorting everything"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [int(row) for row in candidates if scores[row] > 0]
+
+
+def unit_vector(lat: float, lng: float) -> np.ndarray:
+    lat_r, lng_r = np.radians(lat), np.radians(lng)
+    return np.array([np.cos(lat_r) * np.cos(lng_r), np.cos(lat_r) * np.sin(lng_r), np.sin(lat_r)], dtype=np.float32)
+
+
+# Global matrix
+provider_matrix = ProviderMatrix()
+manager.subscribe("providers", provider_matrix.on_change)
+
+
+async def publish_provider_change(doc: dict):
+    """Tell every worker's matrix that a provider was created or edited"""
+    await manager.publish_control("providers", {"doc": {k: doc.get(k) for k in FEATURE_FIELDS if k != "_id"}})
+
+
+async def publish_rating_change(provider_id: str, rating: float, reviews_count: int):
+    await manager.publish_control("providers", {"id": provider_id, "rating": rating, "reviews_count": reviews_count})
+
+
+def _member_position(member: dict):
+    geo = member.get("geo")
+    if geo:
+        return geo["coordinates"][1], geo["coordinates"][0]
+    place = gazetteer.lookup(member.get("location"))
+    return (place.lat, place.lng) if place else (None, None)
+
+
+async def get_recommendations(current_user: dict, services: Optional[List[str]] = None, limit: int = 10):
+    await provider_matrix.ensure_loaded()
+    categories = set(current_user.get("disability_categories") or []) - {"prefer_not_to_say"}
+    lat, lng = _member_position(current_user)
+    scores = provider_matrix.score(categories, services or (), lat, lng)
+    rows = provider_matrix.top(scores, limit)
+    if not rows:
+        return []
+
+    ids = [provider_matrix.ids[row] for row in rows]
+    docs = {doc["id"]: doc async for doc in db.providers.find({"id": {"$in": ids}}, {"_id": 0})}
+    distances = provider_matrix.distances_km(lat, lng) if lat is not None else None
+    results = []
+    for row, provider_id in zip(rows, ids):
+        doc = docs.get(provider_id)
+        if doc is None:
+            continue
+        shared = sorted(categories & set(doc.get("disability_focus") or []))
+        distance = float(distances[row]) if distances is not None and np.isfinite(distances[row]) else None
+        results.append({
+            "provider": doc,
+            "score": round(float(scores[row]), 4),
+            "shared_disability_focus": shared,
+            "distance_km": round(distance, 1) if distance is not None else None
+        })
+    return results
@@ -3,6 +3,9 @@ from datetime import datetime, timezone
 from typing import List, Optional
 from app.core.database import db
 from app.models.resource import ResourceCreate
+from app.services.facet_service import resource_facets
+from app.services.feed_service import fan_out
+from app.services.trending import CREATE_WEIGHT, VIEW_WEIGHT, event_term, trend_fields
 
 async def create_resource(resource_data: ResourceCreate, current_user: dict):
     resource_id = str(uuid.uuid4())
@@ -19,18 +22,19 @@ async def create_resource(resource_data: ResourceCreate, current_user: dict):
         "author_id": current_user["id"],
         "author_name": current_user["name"],
         "created_at": now,
-        "views": 0
+        "views": 0,
+        "trend": event_term(CREATE_WEIGHT)
     }
     
     await db.resources.insert_one(resource_doc)
-    return {k: v for k, v in resource_doc.items() if k != "_id"}
+    await resource_facets.record(resource_doc)
+    await fan_out(
+        "resource", resource_id, now, current_user["id"], current_user.get("user_type"),
+        resource_data.category, resource_data.tags
+    )
+    return {k: v for k, v in resource_doc.items() if k not in ["_id", "trend"]}
 
-async def get_resources(
-    category: Optional[str] = None,
-    tag: Optional[str] = None,
-    search: Optional[str] = None,
-    limit: int = 50
-):
+def _resource_query(category: Optional[str] = None, tag: Optional[str] = None, search: Optional[str] = None) -> dict:
     query = {}
     if category:
         query["category"] = category
@@ -41,14 +45,36 @@ async def get_resources(
             {"title": {"$regex": search, "$options": "i"}},
             {"description": {"$regex": search, "$options": "i"}}
         ]
-    
-    resources = await db.resources.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    return query
+
+async def get_resources(
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: int = 50,
+    sort: str = "recent"
+):
+    query = _resource_query(category, tag, search)
+    order = "trend" if sort == "trending" else "created_at"
+    resources = await db.resources.find(query, {"_id": 0, "trend": 0}).sort(order, -1).limit(limit).to_list(limit)
     return resources
 
+async def get_resource_facets(
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    search: Optional[str] = None,
+    top: int = 20
+):
+    """Counts per category and tag for the resources matching the filters"""
+    return await resource_facets.query(_resource_query(category, tag, search), top)
+
 async def get_resource_by_id(resource_id: str):
-    resource = await db.resources.find_one({"id": resource_id}, {"_id": 0})
+    resource = await db.resources.find_one({"id": resource_id}, {"_id": 0, "trend": 0})
     if resource:
         # Increment views
-        await db.resources.update_one({"id": resource_id}, {"$inc": {"views": 1}})
+        await db.resources.update_one({"id": resource_id}, [{"$set": {
+            "views": {"$add": [{"$ifNull": ["$views", 0]}, 1]},
+            **trend_fields(VIEW_WEIGHT)
+        }}])
         resource["views"] += 1
     return resource
@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.database import db
+from app.models.provider import ReviewCreate
+from app.services.recommendation_service import publish_rating_change
+
+
+def _aggregate_update(sum_delta: int, count_delta: int) -> list:
+    """
+    Pipeline update applying one review's change to the provider's running
+    totals and recomputing the average from them in the same atomic write,
+    so concurrent reviews never re-read or re-aggregate the reviews collection.
+    """
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, sum_delta]},
+            "reviews_count": {"$add": [{"$ifNull": ["$reviews_count", 0]}, count_delta]}
+        }},
+        {"$set": {"rating": {"$cond": [
+            {"$gt": ["$reviews_count", 0]}, {"$divide": ["$rating_sum", "$reviews_count"]}, 0.0
+        ]}}}
+    ]
+
+
+async def _apply(provider_id: str, sum_delta: int, count_delta: int) -> dict:
+    provider = await db.providers.find_one_and_update(
+        {"id": provider_id}, _aggregate_update(sum_delta, count_delta),
+        projection={"_id": 0, "rating": 1, "reviews_count": 1}, return_document=ReturnDocument.AFTER
+    )
+    if provider is None:
+        return {"rating": 0.0, "reviews_count": 0}
+    await publish_rating_change(provider_id, provider["rating"], provider["reviews_count"])
+    return provider
+
+
+async def submit_review(provider_id: str, review_data: ReviewCreate, current_user: dict):
+    """Create the caller's review of a provider, or replace it if they already wrote one"""
+    provider = await db.providers.find_one({"id": provider_id}, {"_id": 0, "owner_id": 1})
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    if provider.get("owner_id") == current_user["id"]:
+        raise HTTPException(status_code=403, detail="You can't review your own provider")
+
+    now = datetime.now(timezone.utc).isoformat()
+    key = {"provider_id": provider_id, "user_id": current_user["id"]}
+    update = {
+        "$set": {
+            "rating": review_data.rating,
+            "comment": review_data.comment,
+            "user_name": current_user["name"],
+            "updated_at": now
+        },
+        "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now}
+    }
+    try:
+        # BEFORE tells us whether this was an edit and which rating it replaced
+        previous = await db.provider_reviews.find_one_and_update(
+            key, update, upsert=True, return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # A concurrent submit by the same user inserted first; apply this one as an edit of it
+        previous = await db.provider_reviews.find_one_and_update(key, update, return_document=ReturnDocument.BEFORE)
+        if previous is None:
+            raise HTTPException(status_code=409, detail="Your review changed meanwhile, please try again")
+    if previous is None:
+        aggregate = await _apply(provider_id, review_data.rating, 1)
+    elif previous["rating"] != review_data.rating:
+        aggregate = await _apply(provider_id, review_data.rating - previous["rating"], 0)
+    else:
+        aggregate = await db.providers.find_one({"id": provider_id}, {"_id": 0, "rating": 1, "reviews_count": 1})
+
+    review = await db.provider_reviews.find_one(key, {"_id": 0})
+    return {"review": review, "rating": aggregate.get("rating", 0.0), "reviews_count": aggregate.get("reviews_count", 0)}
+
+
+async def delete_review(provider_id: str, user_id: str):
+    review = await db.provider_reviews.find_one_and_delete({"provider_id": provider_id, "user_id": user_id})
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    aggregate = await _apply(provider_id, -review["rating"], -1)
+    return {"deleted": True, "rating": aggregate.get("rating", 0.0), "reviews_count": aggregate.get("reviews_count", 0)}
+
+
+async def get_reviews(provider_id: str, before: Optional[str] = None, before_id: Optional[str] = None, limit: int = 20):
+    """Newest first; pass the created_at and id of the last review loaded as before/before_id for the next page"""
+    query = {"provider_id": provider_id}
+    if before and before_id:
+        query["$or"] = [{"created_at": {"$lt": before}}, {"created_at": before, "id": {"$lt": before_id}}]
+    elif before:
+        query["created_at"] = {"$lt": before}
+    return await db.provider_reviews.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit).to_list(limit)
@@ -0,0 +1,168 @@
+import sys
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional, Set
+from app.core.cache import TTLCache
+from app.core.config import logger, SUGGESTIONS_CACHE_MAX_USERS, SUGGESTIONS_CACHE_TTL_SECONDS
+from app.core.database import db
+from app.core.websocket import manager
+
+# Scoring weights
+MUTUAL_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+LOCATION_WEIGHT = 2.0
+
+# Bounds that keep one suggestion request cheap on hubs with thousands of connections
+MAX_FRIENDS_SCANNED = 500
+MAX_FRIENDS_OF_FRIEND_SCANNED = 1000
+MAX_GRAPH_CANDIDATES = 200
+MAX_PROFILE_CANDIDATES = 100
+
+
+class ConnectionGraph:
+    """
+    In-memory snapshot of the connections collection, loaded once per worker
+    and kept current from "ctl.connections" bus events.
+    accepted[u] holds u's connections; related[u] holds everyone u has a
+    pending or declined row with, who must not be suggested either.
+    """
+
+    def __init__(self):
+        self.accepted: Dict[str, Set[str]] = {}
+        self.related: Dict[str, Set[str]] = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        # Changes seen while the snapshot is loading, applied once it's done
+        self._backlog: Optional[List[dict]] = None
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            self._backlog = []
+            cursor = db.connections.find({}, {"_id": 0, "sender_id": 1, "receiver_id": 1, "status": 1})
+            edges = 0
+            async for doc in cursor.batch_size(5000):
+                self._apply(doc["sender_id"], doc["receiver_id"], doc.get("status"))
+                edges += 1
+            for change in self._backlog:
+                self._apply(change["sender_id"], change["receiver_id"], change["status"])
+            self._backlog = None
+            self.loaded = True
+            logger.info(f"Connection graph loaded: {edges} rows, {len(self.accepted)} connected users")
+
+    def _apply(self, user_a: str, user_b: str, status: Optional[str]):
+        # Interned ids keep hundreds of thousands of edges from holding duplicate strings
+        user_a, user_b = sys.intern(user_a), sys.intern(user_b)
+        for user_id, other in ((user_a, user_b), (user_b, user_a)):
+            if status == "accepted":
+                self.accepted.setdefault(user_id, set()).add(other)
+                self._discard(self.related, user_id, other)
+            else:
+                self.related.setdefault(user_id, set()).add(other)
+                self._discard(self.accepted, user_id, other)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], user_id: str, other: str):
+        neighbors = index.get(user_id)
+        if neighbors is not None:
+            neighbors.discard(other)
+            if not neighbors:
+                del index[user_id]
+
+    async def on_change(self, payload: dict):
+        if self._backlog is not None:
+            self._backlog.append(payload)
+        elif self.loaded:
+            self._apply(payload["sender_id"], payload["receiver_id"], payload["status"])
+        # Both endpoints' suggestions change, and so do mutual counts seen by their connections
+        affected = {payload["sender_id"], payload["receiver_id"]}
+        for user_id in list(affected):
+            affected |= self.accepted.get(user_id, set())
+        for user_id in affected:
+            suggestions_cache.pop(user_id)
+
+    def friends_of_friends(self, user_id: str) -> Counter:
+        """Candidate -> number of mutual accepted connections"""
+        friends = self.accepted.get(user_id, set())
+        excluded = friends | self.related.get(user_id, set()) | {user_id}
+        mutuals: Counter = Counter()
+        for friend in list(friends)[:MAX_FRIENDS_SCANNED]:
+            for candidate in list(self.accepted.get(friend, ()))[:MAX_FRIENDS_OF_FRIEND_SCANNED]:
+                if candidate not in excluded:
+                    mutuals[candidate] += 1
+        return mutuals
+
+    def excluded(self, user_id: str) -> Set[str]:
+        return self.accepted.get(user_id, set()) | self.related.get(user_id, set()) | {user_id}
+
+
+# Global graph and per-user result cache
+connection_graph = ConnectionGraph()
+suggestions_cache = TTLCache(SUGGESTIONS_CACHE_MAX_USERS, SUGGESTIONS_CACHE_TTL_SECONDS)
+manager.subscribe("connections", connection_graph.on_change)
+
+
+def _normalize_location(location: Optional[str]) -> str:
+    return (location or "").strip().lower()
+
+
+async def get_suggestions(current_user: dict, limit: int = 20):
+    user_id = current_user["id"]
+    cached = suggestions_cache.get(user_id)
+    if cached is not None:
+        return cached[:limit]
+
+    await connection_graph.ensure_loaded()
+    mutuals = connection_graph.friends_of_friends(user_id)
+    candidate_ids = [uid for uid, _ in mutuals.most_common(MAX_GRAPH_CANDIDATES)]
+
+    categories = set(current_user.get("disability_categories") or []) - {"prefer_not_to_say"}
+    location = _normalize_location(current_user.get("location"))
+    projection = {"_id": 0, "password": 0, "reset_token": 0, "reset_token_expires": 0}
+
+    candidates = {}
+    if candidate_ids:
+        async for doc in db.users.find({"id": {"$in": candidate_ids}}, projection):
+            candidates[doc["id"]] = doc
+
+    # Members with a shared profile, so people without connections still get suggestions
+    profile_filters = []
+    if categories:
+        profile_filters.append({"disability_categories": {"$in": list(categories)}})
+    if current_user.get("location"):
+        profile_filters.append({"location": current_user["location"]})
+    if profile_filters:
+        excluded = connection_graph.excluded(user_id)
+        cursor = db.users.find({"$or": profile_filters}, projection).limit(MAX_PROFILE_CANDIDATES + len(excluded))
+        async for doc in cursor:
+            if doc["id"] not in excluded and doc["id"] not in candidates:
+                candidates[doc["id"]] = doc
+                if len(candidates) >= MAX_GRAPH_CANDIDATES + MAX_PROFILE_CANDIDATES:
+                    break
+
+    results = []
+    for candidate_id, doc in candidates.items():
+        shared = sorted(categories & set(doc.get("disability_categories") or []))
+        same_location = bool(location) and _normalize_location(doc.get("location")) == location
+        score = (
+            MUTUAL_WEIGHT * mutuals.get(candidate_id, 0)
+            + CATEGORY_WEIGHT * len(shared)
+            + (LOCATION_WEIGHT if same_location else 0)
+        )
+        if score <= 0:
+            continue
+        results.append({
+            "user": doc,
+            "mutual_connections": mutuals.get(candidate_id, 0),
+            "shared_disability_categories": shared,
+            "same_location": same_location,
+            "score": score
+        })
+
+    results.sort(key=lambda r: r["score"], reverse=True)
+    results = results[:max(limit, 50)]
+    suggestions_cache.set(user_id, results)
+    return results[:limit]
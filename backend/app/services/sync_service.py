@@ -0,0 +1,116 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Tuple
+from pymongo import ReturnDocument
+from app.core.config import logger, SYNC_MAX_CHANGES
+from app.core.database import db
+
+
+async def record_change(user_ids: Iterable[str], kind: str, data: dict):
+    """
+    Append a change to each user's log under their next version number.
+    A failure here only costs the client a full snapshot on its next sync,
+    so it never fails the write that caused it.
+    """
+    now = datetime.now(timezone.utc)
+    for user_id in set(user_ids):
+        try:
+            counter = await db.sync_versions.find_one_and_update(
+                {"user_id": user_id},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            await db.changes.insert_one({
+                "user_id": user_id,
+                "version": counter["version"],
+                "kind": kind,
+                "data": data,
+                "created_at": now
+            })
+        except Exception as e:
+            logger.error(f"Failed to record {kind} change for {user_id}: {str(e)}")
+
+
+async def record_changes(entries: List[Tuple[str, str, dict]]):
+    """
+    Bulk form of record_change for fan-out writes: entries are (user_id, kind, data).
+    Each user's range of versions is reserved by one atomic increment and taken
+    from that increment's own result, so concurrent writers never overlap; the
+    log entries themselves are then written with a single insert.
+    """
+    if not entries:
+        return
+    counts = Counter(user_id for user_id, _, _ in entries)
+    now = datetime.now(timezone.utc)
+    try:
+        counters = await asyncio.gather(*(
+            db.sync_versions.find_one_and_update(
+                {"user_id": user_id}, {"$inc": {"version": count}},
+                projection={"_id": 0, "user_id": 1, "version": 1}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            for user_id, count in counts.items()
+        ))
+        next_version = {c["user_id"]: c["version"] - counts[c["user_id"]] + 1 for c in counters}
+        docs = []
+        for user_id, kind, data in entries:
+            if user_id not in next_version:
+                continue
+            docs.append({"user_id": user_id, "version": next_version[user_id], "kind": kind, "data": data, "created_at": now})
+            next_version[user_id] += 1
+        await db.changes.insert_many(docs, ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to record {len(entries)} changes: {str(e)}")
+
+
+async def _current_version(user_id: str) -> int:
+    counter = await db.sync_versions.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+    return (counter or {}).get("version", 0)
+
+
+async def _snapshot(user_id: str, version: int):
+    # Local imports: those services record changes through this module
+    from app.services import connection_service, message_service
+    return {
+        "version": version,
+        "full": True,
+        "changes": [],
+        "has_more": False,
+        "snapshot": {
+            "conversations": await message_service.get_conversations(user_id),
+            "connections": await connection_service.get_connections(user_id),
+            "pending": await connection_service.get_pending_requests(user_id),
+            "unread": await message_service.get_unread_count(user_id)
+        }
+    }
+
+
+async def get_changes_since(user_id: str, since: int):
+    # Read the version first: changes recorded meanwhile are returned again next time, never skipped
+    version = await _current_version(user_id)
+    if since <= 0 or since > version:
+        return await _snapshot(user_id, version)
+    if since == version:
+        return {"version": version, "full": False, "changes": [], "has_more": False}
+
+    changes = await db.changes.find(
+        {"user_id": user_id, "version": {"$gt": since}},
+        {"_id": 0, "user_id": 0, "created_at": 0}
+    ).sort("version", 1).limit(SYNC_MAX_CHANGES).to_list(SYNC_MAX_CHANGES)
+
+    # Expired or missing entries leave a hole after the cursor: deltas can't be trusted
+    if not changes or changes[0]["version"] != since + 1:
+        return await _snapshot(user_id, version)
+    # A hole inside the page (a write still in flight, or one that failed after reserving its
+    # version) ends the page just before it; the next call starts at the hole and sees it
+    contiguous = 1
+    while contiguous < len(changes) and changes[contiguous]["version"] == since + contiguous + 1:
+        contiguous += 1
+    changes = changes[:contiguous]
+    return {
+        "version": changes[-1]["version"],
+        "full": False,
+        "changes": changes,
+        "has_more": changes[-1]["version"] < version
+    }
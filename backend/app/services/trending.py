@@ -0,0 +1,59 @@
+import math
+from datetime import datetime, timezone
+from typing import Optional, Union
+from app.core.config import TRENDING_HALF_LIFE_HOURS
+
+# An item's trending score at time T is sum(w_i * exp(-lambda * (T - t_i))) over its engagement
+# events (weight w_i at time t_i). Dividing by exp(-lambda * T) gives every item the same factor,
+# so documents store trend = ln(sum(w_i * exp(lambda * (t_i - EPOCH)))), which never changes as
+# time passes: an event only adds a term, folded in log space (log-sum-exp) to keep the number
+# small, and sorting on trend descending is an ordinary index scan.
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DECAY_PER_SECOND = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+# Event weights; publishing counts as one engagement so new items can surface
+CREATE_WEIGHT = 1.0
+VIEW_WEIGHT = 1.0
+LIKE_WEIGHT = 3.0
+COMMENT_WEIGHT = 5.0
+
+# Stands in for ln(0) on documents without a trend yet
+NO_TREND = -1e9
+
+
+def _timestamp(at: Union[datetime, str, None]) -> datetime:
+    if at is None:
+        return datetime.now(timezone.utc)
+    if isinstance(at, str):
+        at = datetime.fromisoformat(at)
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+
+def event_term(weight: float, at: Union[datetime, str, None] = None) -> float:
+    """ln(w * exp(lambda * (t - EPOCH)))"""
+    return math.log(weight) + DECAY_PER_SECOND * (_timestamp(at) - EPOCH).total_seconds()
+
+
+def add_event(trend: Optional[float], weight: float, at: Union[datetime, str, None] = None) -> float:
+    """Python counterpart of trend_fields, for backfills"""
+    term = event_term(weight, at)
+    if trend is None:
+        return term
+    high, low = max(trend, term), min(trend, term)
+    return high + math.log1p(math.exp(low - high))
+
+
+def trend_fields(weight: float, at: Union[datetime, str, None] = None) -> dict:
+    """
+    $set fields for a pipeline update folding one event into the stored trend
+    atomically: logaddexp(trend, term) = max + ln(1 + exp(-|trend - term|)).
+    """
+    term = event_term(weight, at)
+    return {"trend": {"$let": {
+        "vars": {"current": {"$ifNull": ["$trend", NO_TREND]}, "term": term},
+        "in": {"$add": [
+            {"$max": ["$$current", "$$term"]},
+            {"$ln": {"$add": [1, {"$exp": {"$multiply": [-1, {"$abs": {"$subtract": ["$$current", "$$term"]}}]}}]}}
+        ]}
+    }}}
+
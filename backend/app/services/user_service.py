@@ -1,5 +1,6 @@
 from typing import List, Optional
 from app.core.database import db
+from app.core.geo import location_fields
 from app.models.user import UserUpdate
 
 async def get_users(
@@ -7,7 +8,8 @@ async def get_users(
     disability_category: Optional[str] = None,
     location: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    geo: Optional[dict] = None
 ):
     from app.core.config import logger
     query = {}
@@ -17,6 +19,8 @@ async def get_users(
         query["disability_categories"] = disability_category
     if location:
         query["location"] = {"$regex": location, "$options": "i"}
+    if geo:
+        query["geo"] = geo
     if search:
         query["name"] = {"$regex": search, "$options": "i"}
     
@@ -44,8 +48,15 @@ async def get_user_by_id(user_id: str):
 
 async def update_user(user_id: str, update_data: UserUpdate):
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
+    update = {"$set": update_dict}
+    if "location" in update_dict:
+        # Re-geocode; a location the gazetteer doesn't know drops the old coordinates
+        fields = location_fields(update_dict["location"])
+        update_dict.update(fields)
+        if not fields:
+            update["$unset"] = {"geo": "", "place": ""}
     if update_dict:
-        await db.users.update_one({"id": user_id}, {"$set": update_dict})
+        await db.users.update_one({"id": user_id}, update)
     
     updated_user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
     return updated_user
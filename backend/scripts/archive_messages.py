@@ -0,0 +1,48 @@
+"""
+Move messages older than the hot window into compressed archive segments.
+
+Each conversation's cold messages are packed oldest first into append-only
+segments of up to --segment-size messages in messages_archive and removed
+from the hot messages collection. Threads keep paging into the archive
+transparently. Legacy-layout messages are skipped: run
+scripts/migrate_messages_v2.py first. Safe to re-run, e.g. nightly.
+
+    python scripts/archive_messages.py --dry-run
+    python scripts/archive_messages.py --hot-days 90
+"""
+import os
+import sys
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import MESSAGES_HOT_DAYS, MESSAGE_SEGMENT_SIZE  # noqa: E402
+from app.core.database import db, ensure_indexes  # noqa: E402
+from app.models.message import MESSAGE_SCHEMA_VERSION  # noqa: E402
+from app.services.message_archive import archive_cold_messages  # noqa: E402
+
+
+async def run(hot_days: int, segment_size: int, dry_run: bool):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=hot_days)
+    cold = await db.messages.count_documents({"v": MESSAGE_SCHEMA_VERSION, "t": {"$lt": cutoff}})
+    print(f"{cold} messages older than {cutoff.isoformat()}")
+    if dry_run or not cold:
+        return
+    await ensure_indexes()
+    result = await archive_cold_messages(hot_days, segment_size)
+    print(f"Archived {result['messages']} messages from {result['conversations']} conversations")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hot-days", type=int, default=MESSAGES_HOT_DAYS, help="keep messages newer than this hot")
+    parser.add_argument("--segment-size", type=int, default=MESSAGE_SEGMENT_SIZE, help="messages per archive segment")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(run(args.hot_days, args.segment_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Build conversations and unread_counters from existing messages.
+
+Each user gets one conversations row per peer holding the last message, the
+number of unread messages and a read cursor (the newest message they had
+read), and one unread_counters row with the badge total. Rebuilt from the
+legacy per-message is_read flags, so it is safe to re-run.
+
+    python scripts/backfill_conversations.py --dry-run
+    python scripts/backfill_conversations.py
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne  # noqa: E402
+from app.core.database import db, ensure_indexes  # noqa: E402
+
+
+async def backfill(dry_run: bool):
+    # One row per (user, peer) from both directions of every message
+    sides = db.messages.aggregate([
+        {"$sort": {"created_at": 1}},
+        {"$project": {"sides": [
+            {"user_id": "$sender_id", "peer_id": "$recipient_id", "incoming": False},
+            {"user_id": "$recipient_id", "peer_id": "$sender_id", "incoming": True}
+        ], "content": 1, "created_at": 1, "sender_id": 1, "is_read": 1}},
+        {"$unwind": "$sides"},
+        {"$group": {
+            "_id": {"user_id": "$sides.user_id", "peer_id": "$sides.peer_id"},
+            "last_message": {"$last": "$content"},
+            "last_message_time": {"$last": "$created_at"},
+            "last_sender_id": {"$last": "$sender_id"},
+            "unread_count": {"$sum": {"$cond": [
+                {"$and": ["$sides.incoming", {"$ne": ["$is_read", True]}]}, 1, 0
+            ]}},
+            "last_read_at": {"$max": {"$cond": [
+                {"$and": ["$sides.incoming", {"$eq": ["$is_read", True]}]}, "$created_at", None
+            ]}}
+        }}
+    ], allowDiskUse=True)
+
+    ops, totals, conversations = [], {}, 0
+    async for row in sides:
+        user_id, peer_id = row["_id"]["user_id"], row["_id"]["peer_id"]
+        conversations += 1
+        totals[user_id] = totals.get(user_id, 0) + row["unread_count"]
+        ops.append(UpdateOne({"user_id": user_id, "peer_id": peer_id}, {"$set": {
+            "last_message": row["last_message"],
+            "last_message_time": row["last_message_time"],
+            "last_sender_id": row["last_sender_id"],
+            "unread_count": row["unread_count"],
+            "last_read_at": row["last_read_at"]
+        }}, upsert=True))
+        if len(ops) >= 1000 and not dry_run:
+            await db.conversations.bulk_write(ops, ordered=False)
+            ops = []
+    if ops and not dry_run:
+        await db.conversations.bulk_write(ops, ordered=False)
+    print(f"{'Would write' if dry_run else 'Wrote'} {conversations} conversation rows")
+
+    if not dry_run and totals:
+        await db.unread_counters.bulk_write([
+            UpdateOne({"user_id": user_id}, {"$set": {"total": total}}, upsert=True)
+            for user_id, total in totals.items()
+        ], ordered=False)
+    print(f"{'Would write' if dry_run else 'Wrote'} unread totals for {len(totals)} users")
+
+    if not dry_run:
+        await ensure_indexes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
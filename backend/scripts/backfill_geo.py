@@ -0,0 +1,74 @@
+"""
+Geocode the free-text location of existing users, providers and events.
+
+Each location is matched against the bundled gazetteer (app/data/gazetteer.tsv)
+and stored as a GeoJSON point in geo, with the canonical "City, CC" in place,
+which is what the near/lat/lng/bbox search options query. Locations that
+don't match are listed so they can be added to the gazetteer; re-running
+after that picks them up. Documents that already have geo are skipped
+unless --all is given.
+
+    python scripts/backfill_geo.py --dry-run
+    python scripts/backfill_geo.py --collections users providers
+"""
+import os
+import sys
+import asyncio
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne  # noqa: E402
+from app.core.database import db, ensure_indexes  # noqa: E402
+from app.core.geo import location_fields  # noqa: E402
+
+COLLECTIONS = ("users", "providers", "events")
+
+
+async def backfill_collection(name: str, everything: bool, dry_run: bool, batch_size: int, unmatched: Counter):
+    query = {"location": {"$nin": [None, ""]}}
+    if not everything:
+        query["geo"] = {"$exists": False}
+    ops, matched, missed = [], 0, 0
+    async for doc in db[name].find(query, {"_id": 1, "location": 1}).batch_size(batch_size):
+        fields = location_fields(doc["location"])
+        if not fields:
+            missed += 1
+            unmatched[doc["location"].strip()] += 1
+            continue
+        matched += 1
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+        if len(ops) >= batch_size and not dry_run:
+            await db[name].bulk_write(ops, ordered=False)
+            ops = []
+    if ops and not dry_run:
+        await db[name].bulk_write(ops, ordered=False)
+    print(f"{name}: {'would geocode' if dry_run else 'geocoded'} {matched}, unmatched {missed}")
+
+
+async def backfill(args):
+    if not args.dry_run:
+        await ensure_indexes()
+    unmatched: Counter = Counter()
+    for name in args.collections:
+        await backfill_collection(name, args.all, args.dry_run, args.batch_size, unmatched)
+    if unmatched:
+        print(f"\nMost common unmatched locations ({len(unmatched)} distinct):")
+        for location, count in unmatched.most_common(args.show_unmatched):
+            print(f"  {count:6}  {location}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", nargs="+", choices=COLLECTIONS, default=list(COLLECTIONS))
+    parser.add_argument("--all", action="store_true", help="re-geocode documents that already have geo")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents updated per bulk write")
+    parser.add_argument("--show-unmatched", type=int, default=30, help="unmatched locations listed")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(backfill(args))
+
+
+if __name__ == "__main__":
+    main()
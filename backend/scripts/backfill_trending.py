@@ -0,0 +1,84 @@
+"""
+Compute the trending score (see app.services.trending) of existing forum posts and resources.
+
+Comments are replayed at their own timestamps. Likes and views have no
+timestamps, so they are counted as of the item's created_at, which lets
+old popular items decay as they would have. Re-run after changing
+TRENDING_HALF_LIFE_HOURS; new engagement keeps the scores current afterwards.
+
+    python scripts/backfill_trending.py --dry-run
+    python scripts/backfill_trending.py
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne  # noqa: E402
+from app.core.database import db, ensure_indexes  # noqa: E402
+from app.services.trending import (  # noqa: E402
+    CREATE_WEIGHT, VIEW_WEIGHT, LIKE_WEIGHT, COMMENT_WEIGHT, add_event
+)
+
+
+async def _write(collection, ops: list, dry_run: bool):
+    if ops and not dry_run:
+        await collection.bulk_write(ops, ordered=False)
+
+
+async def backfill_posts(dry_run: bool, batch_size: int):
+    # One float per post with comments, folded from a single pass over the comments
+    comment_trends = {}
+    async for comment in db.comments.find({}, {"_id": 0, "post_id": 1, "created_at": 1}).batch_size(5000):
+        post_id = comment["post_id"]
+        comment_trends[post_id] = add_event(comment_trends.get(post_id), COMMENT_WEIGHT, comment["created_at"])
+
+    ops, updated = [], 0
+    cursor = db.forum_posts.find({}, {"_id": 1, "id": 1, "created_at": 1, "likes": 1})
+    async for post in cursor.batch_size(batch_size):
+        trend = add_event(comment_trends.get(post["id"]), CREATE_WEIGHT, post["created_at"])
+        if post.get("likes", 0) > 0:
+            trend = add_event(trend, LIKE_WEIGHT * post["likes"], post["created_at"])
+        ops.append(UpdateOne({"_id": post["_id"]}, {"$set": {"trend": trend}}))
+        updated += 1
+        if len(ops) >= batch_size:
+            await _write(db.forum_posts, ops, dry_run)
+            ops = []
+    await _write(db.forum_posts, ops, dry_run)
+    print(f"{'Would score' if dry_run else 'Scored'} {updated} forum posts")
+
+
+async def backfill_resources(dry_run: bool, batch_size: int):
+    ops, updated = [], 0
+    async for resource in db.resources.find({}, {"_id": 1, "created_at": 1, "views": 1}).batch_size(batch_size):
+        trend = add_event(None, CREATE_WEIGHT, resource["created_at"])
+        if resource.get("views", 0) > 0:
+            trend = add_event(trend, VIEW_WEIGHT * resource["views"], resource["created_at"])
+        ops.append(UpdateOne({"_id": resource["_id"]}, {"$set": {"trend": trend}}))
+        updated += 1
+        if len(ops) >= batch_size:
+            await _write(db.resources, ops, dry_run)
+            ops = []
+    await _write(db.resources, ops, dry_run)
+    print(f"{'Would score' if dry_run else 'Scored'} {updated} resources")
+
+
+async def backfill(args):
+    if not args.dry_run:
+        await ensure_indexes()
+    await backfill_posts(args.dry_run, args.batch_size)
+    await backfill_resources(args.dry_run, args.batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents updated per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(backfill(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Realtime bus throughput benchmark.
+
+Starts one hub plus N client workers of the local socket bus (each in its own
+process, like uvicorn workers) and measures how fast frames published by one
+worker reach every worker. Runs the same measurement against RabbitMQ when it
+is reachable.
+
+    python scripts/bench_bus.py --workers 4 --messages 20000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.bus import LocalSocketBus, RabbitMQBus  # noqa: E402
+
+PAYLOAD = {"type": "new_message", "message": {"id": "x" * 36, "content": "y" * 120}}
+
+
+async def _subscriber(make_bus, expected: int, ready, done):
+    received = 0
+    finished = asyncio.Event()
+
+    async def on_message(routing_key, payload):
+        nonlocal received
+        received += 1
+        if received >= expected:
+            finished.set()
+
+    bus = make_bus()
+    await bus.start(on_message)
+    ready.set()
+    await finished.wait()
+    done.put(time.perf_counter())
+    await bus.close()
+
+
+def _run_subscriber(backend, path, expected, ready, done):
+    make_bus = (lambda: LocalSocketBus(path)) if backend == "local" else RabbitMQBus
+    asyncio.run(_subscriber(make_bus, expected, ready, done))
+
+
+async def _publish(make_bus, messages: int):
+    async def on_message(routing_key, payload):
+        pass
+
+    bus = make_bus()
+    if not await bus.start(on_message):
+        return None
+    start = time.perf_counter()
+    for i in range(messages):
+        await bus.publish(f"user.{i % 100}", PAYLOAD)
+    await asyncio.sleep(0) # let the last frames flush
+    return bus, start
+
+
+def run(backend: str, workers: int, messages: int, path: str):
+    ctx = multiprocessing.get_context("spawn")
+    done = ctx.Queue()
+    readies, procs = [], []
+    for _ in range(workers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=_run_subscriber, args=(backend, path, messages, ready, done))
+        proc.start()
+        readies.append(ready)
+        procs.append(proc)
+    for ready in readies:
+        if not ready.wait(15):
+            for proc in procs:
+                proc.terminate()
+            return None
+
+    make_bus = (lambda: LocalSocketBus(path)) if backend == "local" else RabbitMQBus
+
+    async def publish_and_wait():
+        started = await _publish(make_bus, messages)
+        if not started:
+            return None
+        bus, start = started
+        ends = [await asyncio.get_running_loop().run_in_executor(None, done.get, True, 120) for _ in procs]
+        await bus.close()
+        return max(ends) - start
+
+    elapsed = asyncio.run(publish_and_wait())
+    for proc in procs:
+        proc.join(5)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="subscribing worker processes")
+    parser.add_argument("--messages", type=int, default=20000, help="frames published")
+    parser.add_argument("--backends", default="local,rabbitmq")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench-bus.sock")
+    for backend in args.backends.split(","):
+        if backend == "local":
+            elapsed = _run_local(args.workers, args.messages, path)
+        else:
+            elapsed = run(backend, args.workers, args.messages, path)
+        if elapsed is None:
+            print(f"{backend:>9}: unavailable")
+            continue
+        deliveries = args.messages * args.workers
+        print(f"{backend:>9}: {args.messages} msgs x {args.workers} workers in {elapsed:.3f}s "
+              f"-> {args.messages / elapsed:,.0f} publishes/s, {deliveries / elapsed:,.0f} deliveries/s")
+
+
+def _run_local(workers: int, messages: int, path: str):
+    # Hold the hub in its own process so every worker, publisher included, is a client
+    ctx = multiprocessing.get_context("spawn")
+    started, stop = ctx.Event(), ctx.Event()
+    hub_proc = ctx.Process(target=_hold_hub_entry, args=(path, started, stop))
+    hub_proc.start()
+    started.wait(10)
+    try:
+        return run("local", workers, messages, path)
+    finally:
+        stop.set()
+        hub_proc.join(5)
+
+
+def _hold_hub_entry(path, started, stop):
+    async def hold():
+        async def on_message(routing_key, payload):
+            pass
+        hub = LocalSocketBus(path)
+        await hub.start(on_message)
+        started.set()
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        await hub.close()
+    asyncio.run(hold())
+
+
+if __name__ == "__main__":
+    main()
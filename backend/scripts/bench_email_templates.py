@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of email rendering cost per thousand emails.
+
+Compares building the HTML with an f-string per call (how email_service used
+to render) against the precompiled template registry, one at a time and in
+batch. Rendering only, nothing is queued or sent.
+
+    python scripts/bench_email_templates.py --emails 1000 --rounds 20
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_templates import email_templates  # noqa: E402
+
+
+def fstring_reset_email(reset_link: str) -> str:
+    return f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background-color: #ffffff;">
+        <h2 style="color: #333333; text-align: center;">Reset Your Password</h2>
+        <p style="color: #555555; font-size: 16px; line-height: 1.5;">
+            You requested to reset your password for your <strong>MyEnAb</strong> account. Click the button below to set a new password:
+        </p>
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{reset_link}" style="background-color: #000000; color: #ffffff; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block;">Reset Password</a>
+        </div>
+        <p style="color: #777777; font-size: 14px; line-height: 1.5;">
+            If the button doesn't work, you can copy and paste this link into your browser:
+            <br>
+            <a href="{reset_link}" style="color: #007bff;">{reset_link}</a>
+        </p>
+        <hr style="border: 0; border-top: 1px solid #eeeeee; margin: 30px 0;">
+        <p style="color: #999999; font-size: 12px; text-align: center;">
+            If you didn't request this, you can safely ignore this email. This link will expire in 1 hour.
+        </p>
+    </div>
+    """
+
+
+def best_of(rounds: int, fn) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=1000, help="emails rendered per round")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds, the fastest is reported")
+    args = parser.parse_args()
+
+    links = [f"http://localhost:3000/reset-password?token=tok{i:08d}" for i in range(args.emails)]
+    contexts = [("es" if i % 4 == 0 else "en", {"link": link}) for i, link in enumerate(links)]
+
+    results = {
+        "f-string (html only)": best_of(args.rounds, lambda: [fstring_reset_email(link) for link in links]),
+        "registry.render": best_of(args.rounds, lambda: [
+            email_templates.render("reset_password", context, locale) for locale, context in contexts
+        ]),
+        "registry.render_many": best_of(args.rounds, lambda: email_templates.render_many("reset_password", contexts)),
+    }
+    for label, elapsed in results.items():
+        per_thousand = elapsed / args.emails * 1000 * 1000
+        print(f"{label:>22}: {per_thousand:.2f} ms per 1000 emails")
+
+
+if __name__ == "__main__":
+    main()
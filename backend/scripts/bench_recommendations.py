@@ -0,0 +1,82 @@
+"""
+Time provider recommendations on a synthetic directory.
+
+Builds the same in-memory matrix the /providers/recommended endpoint uses,
+filled with random providers spread over the gazetteer's cities, and reports
+how long scoring every provider and picking the top k takes per member.
+No database is needed.
+
+    python scripts/bench_recommendations.py
+    python scripts/bench_recommendations.py --providers 100000 --members 500 --top 10
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.geo import gazetteer  # noqa: E402
+from app.services.recommendation_service import ProviderMatrix  # noqa: E402
+
+CATEGORIES = [
+    "physical", "visual", "hearing", "speech", "intellectual", "learning",
+    "autism", "mental_health", "chronic_illness", "neurological", "multiple", "other"
+]
+SERVICES = [
+    "therapy", "rehabilitation", "assistive_technology", "education", "employment", "legal",
+    "counseling", "transport", "home_care", "medical", "sign_language", "advocacy"
+]
+
+
+def build(providers: int, places: list, seed: int) -> ProviderMatrix:
+    rng = random.Random(seed)
+    matrix = ProviderMatrix()
+    for i in range(providers):
+        place = rng.choice(places)
+        reviews = rng.randint(0, 40)
+        matrix.upsert({
+            "id": f"p{i}",
+            "disability_focus": rng.sample(CATEGORIES, rng.randint(1, 3)),
+            "services": rng.sample(SERVICES, rng.randint(1, 4)),
+            "geo": {"type": "Point", "coordinates": [
+                place.lng + rng.uniform(-0.2, 0.2), place.lat + rng.uniform(-0.2, 0.2)
+            ]},
+            "rating": rng.uniform(1, 5) if reviews else 0.0,
+            "reviews_count": reviews
+        })
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, default=100000)
+    parser.add_argument("--members", type=int, default=200, help="members scored for the timing")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    places = gazetteer.places()
+    started = time.perf_counter()
+    matrix = build(args.providers, places, args.seed)
+    print(f"Encoded {len(matrix)} providers in {time.perf_counter() - started:.1f}s "
+          f"({matrix.focus.nbytes + matrix.services.nbytes + matrix.position.nbytes:,} B of features)")
+
+    rng = random.Random(args.seed + 1)
+    timings = []
+    for _ in range(args.members):
+        place = rng.choice(places)
+        categories = rng.sample(CATEGORIES, rng.randint(1, 2))
+        services = rng.sample(SERVICES, rng.randint(0, 2))
+        started = time.perf_counter()
+        matrix.top(matrix.score(categories, services, place.lat, place.lng), args.top)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"Top {args.top} over {len(matrix)} providers: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Backfill connections.pair_key and remove duplicate rows for the same pair.
+
+For every pair of users that has more than one connection row (requests sent
+in both directions, double clicks before the unique index existed) the row
+that matters most is kept: accepted, then pending, then declined, and the
+oldest among equals. Safe to re-run.
+
+    python scripts/migrate_connection_pairs.py --dry-run
+    python scripts/migrate_connection_pairs.py
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import db, ensure_indexes  # noqa: E402
+
+STATUS_RANK = {"accepted": 0, "pending": 1, "declined": 2}
+
+# Same ordering as app.models.connection.pair_key, expressed in the aggregation language
+PAIR_KEY_EXPR = {"$cond": [
+    {"$lte": ["$sender_id", "$receiver_id"]},
+    {"$concat": ["$sender_id", ":", "$receiver_id"]},
+    {"$concat": ["$receiver_id", ":", "$sender_id"]}
+]}
+
+
+async def migrate(dry_run: bool):
+    duplicates = db.connections.aggregate([
+        {"$group": {
+            "_id": PAIR_KEY_EXPR,
+            "rows": {"$push": {"_id": "$_id", "status": "$status", "created_at": "$created_at"}},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    pairs, removed = 0, 0
+    async for group in duplicates:
+        rows = sorted(group["rows"], key=lambda r: (STATUS_RANK.get(r.get("status"), 3), str(r.get("created_at"))))
+        stale = [r["_id"] for r in rows[1:]]
+        pairs += 1
+        removed += len(stale)
+        if not dry_run:
+            await db.connections.delete_many({"_id": {"$in": stale}})
+    print(f"{'Would remove' if dry_run else 'Removed'} {removed} duplicate rows across {pairs} pairs")
+
+    missing = await db.connections.count_documents({"pair_key": {"$exists": False}})
+    if not dry_run and missing:
+        await db.connections.update_many({"pair_key": {"$exists": False}}, [{"$set": {"pair_key": PAIR_KEY_EXPR}}])
+    print(f"{'Would backfill' if dry_run else 'Backfilled'} pair_key on {missing} rows")
+
+    if not dry_run:
+        await ensure_indexes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Rewrite legacy messages into the compact v2 layout (see app.models.message).
+
+Documents are rewritten in place in _id order, keeping their _id (which then
+becomes the message id) and dropping the denormalized sender_name and is_read
+fields. Progress is checkpointed in the migrations collection, so an
+interrupted run resumes where it stopped. Storage and thread-read latency
+are reported before and after.
+
+Run scripts/backfill_conversations.py first if it hasn't been: it reads the
+legacy per-message is_read flags this migration removes.
+
+    python scripts/migrate_messages_v2.py --dry-run
+    python scripts/migrate_messages_v2.py --batch-size 500 --rate 2000
+    MESSAGES_LEGACY_READS=false   # once this reports 0 remaining
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import ReplaceOne  # noqa: E402
+from app.core.database import db, ensure_indexes  # noqa: E402
+from app.models.message import compact_message  # noqa: E402
+
+CHECKPOINT_ID = "messages_v2"
+LEGACY = {"v": {"$exists": False}}
+
+
+async def report_storage(label: str):
+    stats = await db.command("collStats", "messages")
+    print(f"[{label}] {stats.get('count', 0)} messages, data {stats.get('size', 0):,} B "
+          f"(avg {stats.get('avgObjSize', 0):,.0f} B/doc), storage {stats.get('storageSize', 0):,} B, "
+          f"indexes {stats.get('totalIndexSize', 0):,} B")
+
+
+async def report_latency(label: str, samples: int):
+    """Time the thread read of message_service for a sample of conversations"""
+    pairs = await db.conversations.find({}, {"_id": 0, "user_id": 1, "peer_id": 1}).limit(samples).to_list(samples)
+    if not pairs:
+        print(f"[{label}] no conversations to sample, run scripts/backfill_conversations.py")
+        return
+    timings = []
+    for pair in pairs:
+        a, b = pair["user_id"], pair["peer_id"]
+        started = time.perf_counter()
+        await db.messages.find({"$or": [{"s": a, "r": b}, {"s": b, "r": a}]}).sort("t", -1).limit(100).to_list(100)
+        await db.messages.find({"$or": [
+            {"sender_id": a, "recipient_id": b},
+            {"sender_id": b, "recipient_id": a}
+        ]}).sort("created_at", -1).limit(100).to_list(100)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"[{label}] thread read over {len(timings)} conversations: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+
+def _parse_created_at(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def migrate(batch_size: int, rate: float, dry_run: bool, restart: bool):
+    checkpoint = None if restart else await db.migrations.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    migrated = checkpoint.get("migrated", 0) if checkpoint else 0
+    remaining = await db.messages.count_documents(LEGACY)
+    print(f"{remaining} legacy messages remaining" + (f", resuming after {last_id}" if last_id else ""))
+    if dry_run or not remaining:
+        return
+
+    started = time.monotonic()
+    done = 0
+    while True:
+        query = dict(LEGACY, **({"_id": {"$gt": last_id}} if last_id else {}))
+        batch = await db.messages.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        ops = [
+            # The filter skips documents already rewritten by a concurrent run
+            ReplaceOne(dict(LEGACY, _id=doc["_id"]), compact_message(
+                doc["sender_id"], doc["recipient_id"], doc["content"],
+                _parse_created_at(doc["created_at"]), _id=doc["_id"]
+            ))
+            for doc in batch
+        ]
+        await db.messages.bulk_write(ops, ordered=False)
+        last_id = batch[-1]["_id"]
+        done += len(batch)
+        await db.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "migrated": migrated + done, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        print(f"  {done}/{remaining} migrated", end="\r", flush=True)
+        # Throughput control: stay at or below --rate documents per second
+        if rate > 0:
+            ahead = done / rate - (time.monotonic() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+
+    elapsed = time.monotonic() - started
+    print(f"\nMigrated {done} messages in {elapsed:.1f}s ({done / max(elapsed, 1e-9):,.0f}/s)")
+
+
+async def run(args):
+    if not args.dry_run:
+        await ensure_indexes()
+    await report_storage("before")
+    await report_latency("before", args.samples)
+    await migrate(args.batch_size, args.rate, args.dry_run, args.restart)
+    if not args.dry_run:
+        await report_storage("after")
+        await report_latency("after", args.samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="documents rewritten per bulk write")
+    parser.add_argument("--rate", type=float, default=0, help="max documents per second (0: unlimited)")
+    parser.add_argument("--samples", type=int, default=200, help="conversations timed for the latency report")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,8 @@ from app.main import app
 if __name__ == "__main__":
     import uvicorn
     import os
-    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
+    from app.core.config import WS_PING_INTERVAL, WS_PING_TIMEOUT
+    uvicorn.run(
+        app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)),
+        ws_ping_interval=WS_PING_INTERVAL, ws_ping_timeout=WS_PING_TIMEOUT
+    )
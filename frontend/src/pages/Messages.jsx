@@ -29,6 +29,8 @@ export default function Messages() {
     const [onlineUsers, setOnlineUsers] = useState(new Set());
     const [typingUsers, setTypingUsers] = useState({}); // senderId -> boolean
     const typingTimeoutRef = useRef({});
+    const sessionRef = useRef({ epoch: null, seq: 0 }); // last WS session, used to resume after a drop
+    const syncVersionRef = useRef(0); // last change-log version applied, see syncState
     const selectedUserRef = useRef(null);
     const messagesEndRef = useRef(null);
 
@@ -39,54 +41,102 @@ export default function Messages() {
 
     useEffect(() => {
         if (!user?.id) return;
-        const socket = new WebSocket(`${SOCKET_URL}/api/ws/${user.id}`);
+        let socket;
+        let closedByUs = false;
+        let retries = 0;
+        let retryTimer;
+        let reconnectHint = null;
 
-        socket.onopen = () => {
-            console.log('WebSocket Connected');
-        };
-
-        socket.onmessage = (event) => {
-            try {
-                const data = JSON.parse(event.data);
-                console.log('WS Event Received:', data);
+        const handleEvent = (data) => {
+            if (typeof data.seq === 'number') {
+                sessionRef.current.seq = data.seq;
+            }
+            if (data.type === 'session' || data.type === 'resync') {
+                sessionRef.current = { epoch: data.epoch, seq: data.seq };
+                if (data.type === 'resync') {
+                    // Missed events are no longer buffered server-side, catch up from the change log
+                    syncState();
+                }
+            } else if (data.type === 'reconnect') {
+                // Server is restarting and spreads reconnects out with a randomized delay
+                reconnectHint = data.retry_after_ms;
+            } else if (data.type === 'ping') {
+                socket.send(JSON.stringify({ type: 'pong' }));
+            } else if (data.type === 'evicted') {
+                // Replaced by a newer session (e.g. another tab), don't fight it
+                closedByUs = true;
+            } else if (data.type === 'batch') {
+                // Server coalesces ephemeral events (e.g. typing) into one frame
+                data.events.forEach(handleEvent);
+            } else if (data.type === 'initial_presence') {
+                setOnlineUsers(new Set(data.online_users.map(id => String(id))));
+            } else if (data.type === 'new_message') {
+                const msg = data.message;
+                const currentSelected = selectedUserRef.current;
+                const contactId = currentSelected?.id || currentSelected?.user_id;
                 
-                if (data.type === 'initial_presence') {
-                    setOnlineUsers(new Set(data.online_users.map(id => String(id))));
-                } else if (data.type === 'new_message') {
-                    const msg = data.message;
-                    const currentSelected = selectedUserRef.current;
-                    const contactId = currentSelected?.id || currentSelected?.user_id;
-                    
-                    if (contactId && String(msg.sender_id) === String(contactId)) {
-                        setMessages(prev => [...prev, msg]);
-                    }
-                    fetchConversations();
-                } else if (data.type === 'presence') {
-                    setOnlineUsers(prev => {
-                        const next = new Set(prev);
-                        const uid = String(data.user_id);
-                        if (data.status === 'online') next.add(uid);
-                        else next.delete(uid);
-                        return next;
-                    });
-                } else if (data.type === 'typing') {
-                    setTypingUsers(prev => ({
-                        ...prev,
-                        [String(data.sender_id)]: data.is_typing
-                    }));
+                if (contactId && String(msg.sender_id) === String(contactId)) {
+                    setMessages(prev => [...prev, msg]);
                 }
-            } catch (err) {
-                console.error('Error parsing WS message:', err);
+                fetchConversations();
+            } else if (data.type === 'unread') {
+                applyUnread(data);
+            } else if (data.type === 'read') {
+                applyRead(data);
+            } else if (data.type === 'presence') {
+                setOnlineUsers(prev => {
+                    const next = new Set(prev);
+                    const uid = String(data.user_id);
+                    if (data.status === 'online') next.add(uid);
+                    else next.delete(uid);
+                    return next;
+                });
+            } else if (data.type === 'typing') {
+                setTypingUsers(prev => ({
+                    ...prev,
+                    [String(data.sender_id)]: data.is_typing
+                }));
             }
         };
 
-        socket.onclose = () => {
-            console.log('WebSocket Disconnected');
+        const connect = () => {
+            const { epoch, seq } = sessionRef.current;
+            const resume = epoch ? `?epoch=${epoch}&last_seq=${seq}` : '';
+            socket = new WebSocket(`${SOCKET_URL}/api/ws/${user.id}${resume}`);
+
+            socket.onopen = () => {
+                console.log('WebSocket Connected');
+                retries = 0;
+            };
+
+            socket.onmessage = (event) => {
+                try {
+                    const data = JSON.parse(event.data);
+                    console.log('WS Event Received:', data);
+                    handleEvent(data);
+                } catch (err) {
+                    console.error('Error parsing WS message:', err);
+                }
+            };
+
+            socket.onclose = () => {
+                console.log('WebSocket Disconnected');
+                if (closedByUs) return;
+                // Reconnect with backoff; the server replays whatever we missed
+                const delay = reconnectHint ?? Math.min(30000, 1000 * 2 ** retries) * (0.5 + Math.random() / 2);
+                reconnectHint = null;
+                retries += 1;
+                retryTimer = setTimeout(connect, delay);
+            };
+
+            setWs(socket);
         };
 
-        setWs(socket);
+        connect();
         return () => {
             console.log('Cleaning up WebSocket');
+            closedByUs = true;
+            clearTimeout(retryTimer);
             socket.close();
         };
     }, [user?.id]);
@@ -123,10 +173,68 @@ export default function Messages() {
     };
 
     useEffect(() => {
-        fetchConversations();
-        fetchConnections();
+        syncState();
     }, []);
 
+    const applyUnread = (data) => {
+        setConversations(prev => prev.map(conv => (
+            String(conv.user_id) === String(data.user_id) ? { ...conv, unread_count: data.count } : conv
+        )));
+    };
+
+    const applyRead = (data) => {
+        // The other side moved their read cursor past our messages
+        setMessages(prev => prev.map(msg => (
+            String(msg.recipient_id) === String(data.reader_id) && msg.created_at <= data.last_read_at
+                ? { ...msg, is_read: true } : msg
+        )));
+    };
+
+    // Full snapshot on first load or when our version is too old, otherwise only the changes since
+    const syncState = async () => {
+        try {
+            const response = await axios.get(`${API}/sync`, { params: { since: syncVersionRef.current } });
+            const data = response.data;
+            syncVersionRef.current = data.version;
+            const currentSelected = selectedUserRef.current;
+            const contactId = String(currentSelected?.id || currentSelected?.user_id || '');
+
+            if (data.full) {
+                setConversations(data.snapshot.conversations);
+                setConnections(data.snapshot.connections);
+                if (contactId) fetchMessages(contactId);
+            } else {
+                let conversationsChanged = false;
+                let connectionsChanged = false;
+                data.changes.forEach(change => {
+                    if (change.kind === 'new_message') {
+                        const msg = change.data;
+                        if (contactId && [String(msg.sender_id), String(msg.recipient_id)].includes(contactId)) {
+                            setMessages(prev => prev.some(m => m.id === msg.id) ? prev : [...prev, msg]);
+                        }
+                        conversationsChanged = true;
+                    } else if (change.kind === 'unread') {
+                        applyUnread(change.data);
+                    } else if (change.kind === 'read') {
+                        applyRead(change.data);
+                    } else if (change.kind === 'connection') {
+                        connectionsChanged = true;
+                    }
+                });
+                if (conversationsChanged) fetchConversations();
+                if (connectionsChanged) fetchConnections();
+            }
+            if (data.has_more) syncState();
+        } catch (error) {
+            console.error('Failed to sync:', error);
+            fetchConversations();
+            fetchConnections();
+        } finally {
+            setLoading(false);
+            setLoadingConnections(false);
+        }
+    };
+
     const fetchConnections = async () => {
         try {
             const response = await axios.get(`${API}/connections`);
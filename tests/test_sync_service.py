@@ -0,0 +1,54 @@
+import os
+import sys
+import asyncio
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+os.environ.setdefault("REALTIME_BUS", "memory")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.services import sync_service  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(sync_service, "db", database)
+
+    async def snapshot(user_id, version):
+        return {"version": version, "full": True, "changes": [], "has_more": False}
+    monkeypatch.setattr(sync_service, "_snapshot", snapshot)
+    return database
+
+
+async def _seed(db, user_id, versions, current):
+    await db.sync_versions.insert_one({"user_id": user_id, "version": current})
+    for version in versions:
+        await db.changes.insert_one({"user_id": user_id, "version": version, "kind": "read", "data": {}})
+
+
+def test_hole_inside_page_is_not_skipped(db):
+    async def run():
+        await _seed(db, "u1", [5, 7], 7)
+        page = await sync_service.get_changes_since("u1", 4)
+        assert [c["version"] for c in page["changes"]] == [5]
+        assert page["version"] == 5
+        assert page["has_more"] is True
+
+        # The client resumes at the hole and must not be moved past version 6 without it
+        page = await sync_service.get_changes_since("u1", page["version"])
+        assert page["full"] is True
+
+    asyncio.run(run())
+
+
+def test_contiguous_page(db):
+    async def run():
+        await _seed(db, "u1", [5, 6, 7], 7)
+        page = await sync_service.get_changes_since("u1", 4)
+        assert [c["version"] for c in page["changes"]] == [5, 6, 7]
+        assert page["version"] == 7
+        assert page["has_more"] is False
+
+    asyncio.run(run())